@@ -15,6 +15,16 @@ class Settings(BaseSettings):
     SUPABASE_URL: str = ""
     SUPABASE_ANON_KEY: str = ""
     SUPABASE_SERVICE_KEY: str = ""
+    # JWT secret (Settings → API) for local token verification; without it
+    # every new token is checked with a call to Supabase Auth
+    SUPABASE_JWT_SECRET: str = ""
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    JWT_CACHE_SIZE: int = 10000
+    # Seconds a WebSocket has to send its auth frame after connecting
+    WS_AUTH_TIMEOUT_SECONDS: int = 10
+    # Comma-separated user ids allowed to call admin endpoints (e.g.
+    # POST /catalog/refresh); empty means nobody
+    ADMIN_USER_IDS: str = ""
 
     # Google Cloud Translation API key
     GOOGLE_TRANSLATE_API_KEY: str = ""
@@ -22,9 +32,112 @@ class Settings(BaseSettings):
     # Deepgram (Speech-to-Text)
     DEEPGRAM_API_KEY: str = ""
 
+    # Largest audio upload accepted for transcription (enforced while streaming)
+    STT_MAX_UPLOAD_BYTES: int = 25 * 1024 * 1024
+    # Longest wait for the next chunk of an upload before giving up on it
+    STT_UPLOAD_STALL_SECONDS: int = 15
+
+    # Audio normalization before STT: WAV is downmixed/resampled in Python;
+    # with ffmpeg enabled (and on PATH) other formats become 16 kHz mono Opus
+    AUDIO_NORMALIZE_ENABLED: bool = True
+    AUDIO_TARGET_SAMPLE_RATE: int = 16000
+    AUDIO_FFMPEG_ENABLED: bool = False
+    # Output requested from Cartesia (16 kHz / 64 kbps is plenty for chat speech)
+    TTS_SAMPLE_RATE: int = 16000
+    TTS_MP3_BIT_RATE: int = 64000
+
+    # Streaming STT backend for /voice/ws/transcribe: "deepgram" or "fake"
+    STT_STREAM_BACKEND: str = "deepgram"
+    # Longest silence (no audio frames) before a streaming session is closed
+    STT_STREAM_IDLE_SECONDS: int = 10
+
     # Cartesia (Text-to-Speech)
     CARTESIA_API_KEY: str = ""
 
+    # Streaming TTS: bytes per chunk, chunks read ahead of a slow client,
+    # and the longest pause allowed between chunks from Cartesia
+    TTS_STREAM_CHUNK_BYTES: int = 16384
+    TTS_STREAM_BUFFER_CHUNKS: int = 8
+    TTS_STREAM_READ_TIMEOUT_SECONDS: int = 15
+
+    # Supabase Storage bucket for voice message audio (recording + translation)
+    VOICE_STORAGE_BUCKET: str = "voice-messages"
+
+    # TTS audio cache (content-addressed; memory LRU + disk tier)
+    TTS_CACHE_ENABLED: bool = True
+    TTS_CACHE_DIR: str = "/tmp/familia-tts-cache"
+    TTS_CACHE_MEMORY_BYTES: int = 64 * 1024 * 1024
+    TTS_CACHE_DISK_BYTES: int = 1024 * 1024 * 1024
+    TTS_CACHE_MAX_ITEM_BYTES: int = 5 * 1024 * 1024
+
+    # Identical concurrent translate/detect calls share one in-flight request
+    TRANSLATE_COALESCE_ENABLED: bool = True
+    # Translation micro-batching: concurrent texts for the same language
+    # pair within the window go to Google as one multi-`q` request
+    TRANSLATE_BATCH_ENABLED: bool = True
+    TRANSLATE_BATCH_WINDOW_MS: int = 5
+    TRANSLATE_BATCH_MAX_ITEMS: int = 32
+    TRANSLATE_BATCH_MAX_CHARS: int = 5000
+    TRANSLATE_BATCH_MAX_IN_FLIGHT: int = 4
+
+    # Outbound vendor calls (Google Translate, Deepgram, Cartesia): circuit
+    # breaker, timeouts adapted to recent p95 latency, hedged retries
+    VENDOR_BREAKER_FAILURES: int = 5
+    VENDOR_BREAKER_OPEN_SECONDS: int = 30
+    VENDOR_TIMEOUT_P95_MULTIPLIER: float = 3.0
+    VENDOR_TIMEOUT_MIN_SECONDS: float = 1.0
+    VENDOR_LATENCY_WINDOW: int = 200
+    VENDOR_HEDGE_ENABLED: bool = True
+    # Per-vendor request limits: in flight at once, and started per second
+    # (token bucket, bursts up to one second's worth)
+    GOOGLE_TRANSLATE_MAX_CONCURRENCY: int = 32
+    GOOGLE_TRANSLATE_RATE_PER_SECOND: float = 50
+    DEEPGRAM_MAX_CONCURRENCY: int = 40
+    DEEPGRAM_RATE_PER_SECOND: float = 20
+    CARTESIA_MAX_CONCURRENCY: int = 8
+    CARTESIA_RATE_PER_SECOND: float = 10
+    # Longest wait for a request slot; bulk work (the direct /translate API)
+    # may use only VENDOR_BULK_SHARE of the slots and waits behind chat
+    VENDOR_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    VENDOR_BULK_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    VENDOR_BULK_SHARE: float = 0.5
+
+    # Contest scheduler (pre-generates weekly contests off-peak, hours in UTC)
+    CONTEST_SCHEDULER_ENABLED: bool = True
+    CONTEST_SCHEDULER_INTERVAL_MINUTES: int = 30
+    CONTEST_SCHEDULER_BATCH_SIZE: int = 50
+    # Pages of relationships scanned per run when the eligibility RPC is missing
+    CONTEST_SCHEDULER_MAX_PAGES: int = 20
+    CONTEST_SCHEDULER_CONCURRENCY: int = 4
+    CONTEST_OFFPEAK_START_HOUR: int = 2
+    CONTEST_OFFPEAK_END_HOUR: int = 6
+
+    # Game session engine (in-memory state, periodic checkpoints)
+    GAME_CHECKPOINT_INTERVAL_SECONDS: int = 10
+    GAME_SESSION_IDLE_MINUTES: int = 30
+    # Tries at persisting + awarding a completed session before it is dropped
+    GAME_FINISH_MAX_ATTEMPTS: int = 5
+
+    # Activity sweeper (streak resets + auto-pausing inactive relationships)
+    ACTIVITY_SWEEP_ENABLED: bool = True
+    ACTIVITY_SWEEP_INTERVAL_MINUTES: int = 60
+    ACTIVITY_SWEEP_BATCH_SIZE: int = 500
+    INACTIVITY_PAUSE_DAYS: int = 7
+
+    # Moderation worker pool (claims moderation_queue items by priority)
+    MODERATION_WORKER_ENABLED: bool = True
+    MODERATION_WORKER_CONCURRENCY: int = 4
+    MODERATION_POLL_INTERVAL_SECONDS: int = 5
+    MODERATION_LEASE_SECONDS: int = 300
+    # Claims of one item before a failing check is left to a human
+    MODERATION_MAX_ATTEMPTS: int = 3
+    MODERATION_SCAN_PAGE_SIZE: int = 500
+    MODERATION_SCAN_MAX_MESSAGES: int = 20000
+
+    # Public profile cache (read-through, invalidated on profile writes)
+    PROFILE_CACHE_TTL_SECONDS: int = 30
+    PROFILE_CACHE_SIZE: int = 5000
+
     # CORS - accept all origins (Cloud Run deployment)
     CORS_ORIGINS: str = "*"
     
@@ -35,6 +148,11 @@ class Settings(BaseSettings):
             return ["*"]
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
 
+    @property
+    def admin_user_ids(self) -> List[str]:
+        """Return ADMIN_USER_IDS as a list."""
+        return [uid.strip() for uid in self.ADMIN_USER_IDS.split(",") if uid.strip()]
+
     class Config:
         env_file = ".env"
         extra = "allow"
@@ -71,6 +189,7 @@ To fix this in Cloud Run:
    - SUPABASE_SERVICE_KEY: Your Supabase service role key
 
 Optional variables (features will be disabled without them):
+   - SUPABASE_JWT_SECRET: For local (fast) access token verification
    - GOOGLE_TRANSLATE_API_KEY: For translation features
    - DEEPGRAM_API_KEY: For speech-to-text
    - CARTESIA_API_KEY: For text-to-speech
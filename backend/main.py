@@ -11,7 +11,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config import get_settings
 
-from routers import auth, profiles, matching, chat, contests, games, family_rooms, safety, translation, voice
+from routers import auth, profiles, matching, chat, contests, games, family_rooms, safety, translation, voice, catalog
+from services.contest_scheduler import start_contest_scheduler, stop_contest_scheduler
+from services.activity_tracker import start_activity_sweeper, stop_activity_sweeper
+from services.game_engine import game_engine
+from services.moderation_worker import moderation_pool, screening_batcher
+from services.catalog import load_catalog
+from services.achievement_engine import register_achievement_handlers
+from services.loader import LoaderMiddleware
+from services.vendor_client import get_vendor_metrics
 
 settings = get_settings()
 
@@ -32,6 +40,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request profile/relationship loaders
+app.add_middleware(LoaderMiddleware)
+
 # Register routers
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(profiles.router, prefix="/api/v1")
@@ -43,6 +54,32 @@ app.include_router(family_rooms.router, prefix="/api/v1")
 app.include_router(safety.router, prefix="/api/v1")
 app.include_router(translation.router, prefix="/api/v1")
 app.include_router(voice.router, prefix="/api/v1")
+app.include_router(catalog.router, prefix="/api/v1")
+
+
+# Background workers
+@app.on_event("startup")
+async def start_background_workers():
+    try:
+        load_catalog()
+    except Exception as e:
+        # Loaded lazily on first use instead
+        print(f"[Startup] Catalog load failed: {e}")
+    register_achievement_handlers()
+    start_contest_scheduler()
+    start_activity_sweeper()
+    game_engine.start()
+    moderation_pool.start()
+    screening_batcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await stop_contest_scheduler()
+    await stop_activity_sweeper()
+    await game_engine.stop()
+    await screening_batcher.stop()
+    await moderation_pool.stop()
 
 
 @app.get("/")
@@ -61,6 +98,12 @@ async def health_check():
     return {"status": "healthy", "service": "familia-api"}
 
 
+@app.get("/health/vendors")
+async def vendor_health():
+    """Circuit breaker state and recent latency of each outbound vendor."""
+    return get_vendor_metrics()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
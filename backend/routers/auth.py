@@ -1,4 +1,5 @@
 """Authentication router - Sign up, login, verification."""
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
 from datetime import datetime
 from models.schemas import (
@@ -7,6 +8,8 @@ from models.schemas import (
 )
 from services.supabase_client import get_supabase, get_auth_client
 from services.auth_service import get_current_user_id
+from services.loader import load_profile, load_profiles, load_languages, prime_relationships
+from services.profile_cache import profile_cache
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -124,6 +127,7 @@ async def login(req: LoginRequest):
                 "last_active_at": datetime.utcnow().isoformat(),
                 "status": "active"
             }).eq("id", user_id).execute()
+            profile_cache.invalidate(user_id)
         
         return AuthResponse(
             access_token=auth_response.session.access_token,
@@ -170,6 +174,7 @@ async def submit_verification(req: VerificationRequest, user_id: str = Depends(g
             "verification_method": req.verification_type,
             "verified_at": datetime.utcnow().isoformat()
         }).eq("id", user_id).execute()
+        profile_cache.invalidate(user_id)
         
         db.table("verification_records").update({
             "status": "approved"
@@ -183,13 +188,10 @@ async def get_current_user(user_id: str = Depends(get_current_user_id)):
     """Get current user's profile."""
     db = get_supabase()
     
-    profile = db.table("profiles").select("*").eq("id", user_id).execute()
-    if not profile.data or len(profile.data) == 0:
+    profile_data, languages = await asyncio.gather(load_profile(user_id), load_languages(user_id))
+    if not profile_data:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    profile_data = profile.data[0]
-    
-    languages = db.table("user_languages").select("*").eq("user_id", user_id).execute()
     achievements = db.table("user_achievements") \
         .select("*, achievements(*)") \
         .eq("user_id", user_id) \
@@ -201,30 +203,29 @@ async def get_current_user(user_id: str = Depends(get_current_user_id)):
         .or_(f"user_a_id.eq.{user_id},user_b_id.eq.{user_id}") \
         .eq("status", "active") \
         .execute()
+    prime_relationships(rels.data or [])
+    
+    partner_ids = [
+        rel["user_b_id"] if rel["user_a_id"] == user_id else rel["user_a_id"]
+        for rel in (rels.data or [])
+    ]
+    partners = await load_profiles(partner_ids, "id, display_name, country, avatar_config, is_verified, status")
     
     enriched_rels = []
-    for rel in (rels.data or []):
-        partner_id = rel["user_b_id"] if rel["user_a_id"] == user_id else rel["user_a_id"]
-        partner = db.table("profiles") \
-            .select("id, display_name, country, avatar_config, is_verified, status") \
-            .eq("id", partner_id) \
-            .execute()
-        
-        partner_data = partner.data[0] if partner.data else None
-        
+    for rel, partner_id in zip(rels.data or [], partner_ids):
         my_role = rel["user_a_role"] if rel["user_a_id"] == user_id else rel["user_b_role"]
         partner_role = rel["user_b_role"] if rel["user_a_id"] == user_id else rel["user_a_role"]
         
         enriched_rels.append({
             **rel,
-            "partner": partner_data,
+            "partner": partners.get(partner_id),
             "my_role": my_role,
             "partner_role": partner_role
         })
     
     return {
         "profile": profile_data,
-        "languages": languages.data or [],
+        "languages": languages,
         "achievements": achievements.data or [],
         "relationships": enriched_rels
     }
@@ -240,6 +241,7 @@ async def logout(user_id: str = Depends(get_current_user_id)):
         "status": "offline",
         "last_active_at": datetime.utcnow().isoformat()
     }).eq("id", user_id).execute()
+    profile_cache.invalidate(user_id)
     
     return {"status": "logged_out"}
 
@@ -0,0 +1,24 @@
+"""Catalog router - Cached seed data (games, achievements, roles, languages)."""
+from fastapi import APIRouter, Depends, Request
+from services.auth_service import get_admin_user_id
+from services.catalog import get_catalog_payload, cached_response, refresh_catalog, get_games, get_achievements
+
+router = APIRouter(prefix="/catalog", tags=["Catalog"])
+
+
+@router.get("/")
+async def get_catalog(request: Request):
+    """Get the full catalog in one cacheable response."""
+    return cached_response(request, "catalog", get_catalog_payload())
+
+
+@router.post("/refresh")
+async def refresh(user_id: str = Depends(get_admin_user_id)):
+    """Reload games and achievements from the database (admins only)."""
+    refresh_catalog()
+    
+    return {
+        "status": "refreshed",
+        "games": len(get_games(active_only=False)),
+        "achievements": len(get_achievements())
+    }
@@ -1,39 +1,68 @@
 """Chat router - Messages with real-time translation."""
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends, UploadFile, File, Form
 from datetime import datetime
-from typing import Dict, Set
+from typing import Awaitable, Callable, Dict, Optional, Set
+import asyncio
 import json
+import time
+import uuid
 
 from models.schemas import SendMessageRequest
 from services.supabase_client import get_supabase
 from services.translation_service import translate_text, extract_facts_from_message, detect_language
-from services.auth_service import get_current_user_id
+from services.auth_service import get_current_user_id, authenticate_websocket
+from services.counter_service import get_unread_message_counts
+from services.events import publish
+from services.activity_tracker import resume_relationship
+from services.content_screening import screen_message
+from services.moderation_worker import screening_batcher
+from services.deepgram_stt import read_in_chunks
+from services import voice_pipeline, voice_storage
+from services.voice_pipeline import StageTimings, VoicePipelineError
+from services.loader import (
+    load_profile, load_primary_language, load_relationship, invalidate_relationship,
+)
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 # WebSocket connection manager
+class ChatConnection:
+    """An authenticated chat socket and what it needs to send messages.
+
+    Identity, relationship membership and the partner's language are
+    resolved once during the handshake, so the message loop does no
+    per-frame auth or relationship lookups.
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: str, relationship_id: str, partner_id: str, partner_language: str):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.relationship_id = relationship_id
+        self.partner_id = partner_id
+        self.partner_language = partner_language
+        self.checked_at = time.monotonic()
+
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
-    
-    async def connect(self, websocket: WebSocket, relationship_id: str):
-        await websocket.accept()
-        if relationship_id not in self.active_connections:
-            self.active_connections[relationship_id] = set()
-        self.active_connections[relationship_id].add(websocket)
-    
-    def disconnect(self, websocket: WebSocket, relationship_id: str):
-        if relationship_id in self.active_connections:
-            self.active_connections[relationship_id].discard(websocket)
-    
-    async def broadcast(self, relationship_id: str, message: dict, exclude: WebSocket = None):
-        if relationship_id in self.active_connections:
-            for connection in self.active_connections[relationship_id]:
-                if connection != exclude:
-                    try:
-                        await connection.send_json(message)
-                    except Exception:
-                        pass
+        self.active_connections: Dict[str, Set[ChatConnection]] = {}
+    
+    def connect(self, connection: ChatConnection):
+        self.active_connections.setdefault(connection.relationship_id, set()).add(connection)
+    
+    def disconnect(self, connection: ChatConnection):
+        if connection.relationship_id in self.active_connections:
+            self.active_connections[connection.relationship_id].discard(connection)
+            if not self.active_connections[connection.relationship_id]:
+                del self.active_connections[connection.relationship_id]
+    
+    async def broadcast(self, relationship_id: str, message: dict, exclude: ChatConnection = None):
+        for connection in list(self.active_connections.get(relationship_id, ())):
+            if connection is not exclude:
+                try:
+                    await connection.websocket.send_json(message)
+                except Exception:
+                    pass
 
 manager = ConnectionManager()
 
@@ -41,21 +70,13 @@ manager = ConnectionManager()
 @router.post("/send")
 async def send_message(req: SendMessageRequest, current_user: str = Depends(get_current_user_id)):
     """Send a message with auto-translation."""
-    db = get_supabase()
     user_id = current_user
     
     # Verify relationship exists and is active
-    rel = db.table("relationships") \
-        .select("*") \
-        .eq("id", req.relationship_id) \
-        .eq("status", "active") \
-        .execute()
-    
-    if not rel.data or len(rel.data) == 0:
+    rel_data = await load_relationship(req.relationship_id)
+    if not rel_data or rel_data["status"] != "active":
         raise HTTPException(status_code=404, detail="Relationship not found or inactive")
     
-    rel_data = rel.data[0]
-    
     # Verify this user is part of the relationship
     if user_id not in [rel_data["user_a_id"], rel_data["user_b_id"]]:
         raise HTTPException(status_code=403, detail="You are not part of this relationship")
@@ -75,14 +96,7 @@ async def send_message(req: SendMessageRequest, current_user: str = Depends(get_
     # Get partner's primary language
     target_lang = "en"
     try:
-        partner_lang = db.table("user_languages") \
-            .select("language_code") \
-            .eq("user_id", partner_id) \
-            .eq("is_primary", True) \
-            .limit(1) \
-            .execute()
-        if partner_lang.data:
-            target_lang = partner_lang.data[0]["language_code"]
+        target_lang = await load_primary_language(partner_id, "en")
     except Exception:
         pass
     
@@ -105,20 +119,41 @@ async def send_message(req: SendMessageRequest, current_user: str = Depends(get_
     except Exception:
         pass
     
+    msg_data = await _deliver_message(
+        user_id, req.relationship_id, partner_id,
+        {
+            "content_type": req.content_type,
+            "original_text": req.original_text,
+            "original_language": source_lang,
+            "translated_text": translation["translated_text"],
+            "target_language": target_lang,
+            "has_idiom": translation.get("has_idiom", False),
+            "idiom_explanation": translation.get("idiom_explanation"),
+            "cultural_note": translation.get("cultural_note"),
+            "voice_url": req.voice_url,
+            "image_url": req.image_url,
+        },
+        facts,
+    )
+    return {"message": msg_data}
+
+
+async def _deliver_message(
+    user_id: str,
+    relationship_id: str,
+    partner_id: str,
+    fields: dict,
+    facts: list,
+    before_broadcast: Optional[Callable[[dict], Awaitable[None]]] = None,
+) -> dict:
+    """Store a message, then screen, record facts, notify and broadcast it."""
+    db = get_supabase()
+    
     # Save message
     message = db.table("messages").insert({
-        "relationship_id": req.relationship_id,
+        "relationship_id": relationship_id,
         "sender_id": user_id,
-        "content_type": req.content_type,
-        "original_text": req.original_text,
-        "original_language": source_lang,
-        "translated_text": translation["translated_text"],
-        "target_language": target_lang,
-        "has_idiom": translation.get("has_idiom", False),
-        "idiom_explanation": translation.get("idiom_explanation"),
-        "cultural_note": translation.get("cultural_note"),
-        "voice_url": req.voice_url,
-        "image_url": req.image_url,
+        **fields,
         "extracted_facts": [{"fact": f["category"], "value": f["value"]} for f in facts] if facts else []
     }).execute()
     
@@ -126,23 +161,24 @@ async def send_message(req: SendMessageRequest, current_user: str = Depends(get_
         raise HTTPException(status_code=500, detail="Failed to send message")
     
     msg_data = message.data[0]
+    original_text = fields.get("original_text") or ""
+    translated_text = fields.get("translated_text")
     
-    # Update relationship stats
-    try:
-        db.table("relationships").update({
-            "messages_exchanged": rel_data.get("messages_exchanged", 0) + 1,
-            "last_interaction_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
-        }).eq("id", req.relationship_id).execute()
-    except Exception:
-        pass
+    # Relationship stats (messages_exchanged, last_interaction_at) are
+    # incremented atomically by the messages_count_trigger on insert.
+    publish("message_sent", user_id=user_id, relationship_id=relationship_id)
+    
+    # Screen for risky content (minor protection); hits are queued in batches
+    screening = screen_message(original_text, translated_text)
+    if screening:
+        screening_batcher.submit(msg_data, screening)
     
     # Save extracted facts (non-blocking)
     for fact in facts:
         try:
             db.table("chat_facts").insert({
                 "user_id": user_id,
-                "relationship_id": req.relationship_id,
+                "relationship_id": relationship_id,
                 "source_message_id": msg_data["id"],
                 "fact_category": fact["category"],
                 "fact_value": fact["value"],
@@ -153,29 +189,153 @@ async def send_message(req: SendMessageRequest, current_user: str = Depends(get_
     
     # Send notification to partner (non-blocking)
     try:
-        sender_profile = db.table("profiles").select("display_name").eq("id", user_id).execute()
-        sender_name = sender_profile.data[0]["display_name"] if sender_profile.data else "Someone"
+        sender_profile = await load_profile(user_id, "display_name")
+        sender_name = sender_profile["display_name"] if sender_profile else "Someone"
         
         db.table("notifications").insert({
             "user_id": partner_id,
             "type": "new_message",
             "title": f"💬 New message from {sender_name}",
-            "body": (translation["translated_text"] or req.original_text)[:100],
-            "data": {"relationship_id": req.relationship_id, "message_id": msg_data["id"]}
+            "body": (translated_text or original_text)[:100],
+            "data": {"relationship_id": relationship_id, "message_id": msg_data["id"]}
         }).execute()
     except Exception:
         pass
     
+    if before_broadcast:
+        await before_broadcast(msg_data)
+    
     # Broadcast via WebSocket
     try:
-        await manager.broadcast(req.relationship_id, {
+        await manager.broadcast(relationship_id, {
             "type": "new_message",
             "message": msg_data
         })
     except Exception:
         pass
     
-    return {"message": msg_data}
+    return msg_data
+
+
+@router.post("/voice")
+async def send_voice_message(
+    relationship_id: str = Form(...),
+    audio: UploadFile = File(...),
+    language: Optional[str] = Form(None),
+    current_user: str = Depends(get_current_user_id),
+):
+    """Send a voice message: transcribe, translate and voice it in one request.
+
+    The recording is transcribed (language auto-detected unless given),
+    translated to the partner's language and synthesized in that language.
+    `voice_url` is the original recording and `translated_voice_url` the
+    synthesized translation, both kept in durable storage. The message row
+    is written while they upload and the broadcast waits for them; audio
+    that fails to store is left null (a message with neither is sent as
+    text). Per-stage latency (ms) is returned in `timings`.
+    """
+    user_id = current_user
+    timings = StageTimings()
+    
+    with timings.stage("context"):
+        rel_data = await load_relationship(relationship_id)
+        if not rel_data or rel_data["status"] != "active":
+            raise HTTPException(status_code=404, detail="Relationship not found or inactive")
+        if user_id not in [rel_data["user_a_id"], rel_data["user_b_id"]]:
+            raise HTTPException(status_code=403, detail="You are not part of this relationship")
+        partner_id = rel_data["user_b_id"] if user_id == rel_data["user_a_id"] else rel_data["user_a_id"]
+        target_lang = "en"
+        try:
+            target_lang = await load_primary_language(partner_id, "en")
+        except Exception:
+            pass
+    
+    mime = audio.content_type or "audio/webm"
+    try:
+        stt = await voice_pipeline.transcribe(read_in_chunks(audio), language, mime, timings)
+    except VoicePipelineError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=f"{exc.stage}: {exc}")
+    
+    # STT read the upload once; it's spooled, so read it again to keep it
+    await audio.seek(0)
+    audio_id = uuid.uuid4().hex
+    original_name = voice_storage.file_name(audio_id, mime)
+    original = asyncio.create_task(
+        voice_storage.save(relationship_id, original_name, await audio.read(), mime)
+    )
+    
+    text = stt["transcript"]
+    source_lang = (language or stt.get("language") or "en").split("-")[0]
+    
+    # Fact extraction is local and cheap; run it alongside translation
+    translation, facts = await asyncio.gather(
+        voice_pipeline.translate(text, source_lang, target_lang, timings),
+        extract_facts_from_message(text, user_id),
+        return_exceptions=True,
+    )
+    if isinstance(translation, BaseException):
+        original.cancel()
+        raise translation
+    if isinstance(facts, BaseException):
+        facts = []
+    
+    spoken_text = translation["translated_text"] or text
+    # Synthesized as mp3, so its name is known before synthesis finishes
+    translated_name = voice_storage.file_name(f"{audio_id}-{target_lang}", "audio/mpeg")
+    
+    async def synthesize_and_store() -> str:
+        speech, content_type = await voice_pipeline.synthesize(spoken_text, target_lang, timings)
+        return await voice_storage.save(relationship_id, translated_name, speech, content_type)
+    
+    translated = asyncio.create_task(synthesize_and_store())
+    
+    async def audio_ready(msg: dict):
+        update = {}
+        try:
+            await original
+        except Exception as exc:
+            print(f"[Chat] Storing voice recording failed: {exc}")
+            update["voice_url"] = None
+        try:
+            await translated
+        except Exception as exc:
+            # The partner can still read the translation
+            print(f"[Chat] Voice synthesis failed, sending without translated audio: {exc}")
+            update["translated_voice_url"] = None
+        if len(update) == 2:
+            update["content_type"] = "text"
+        if update:
+            msg.update(update)
+            get_supabase().table("messages").update(update).eq("id", msg["id"]).execute()
+    
+    try:
+        with timings.stage("deliver"):
+            msg_data = await _deliver_message(
+                user_id, relationship_id, partner_id,
+                {
+                    "content_type": "voice",
+                    "original_text": text,
+                    "original_language": source_lang,
+                    "translated_text": translation["translated_text"],
+                    "target_language": target_lang,
+                    "has_idiom": translation.get("has_idiom", False),
+                    "idiom_explanation": translation.get("idiom_explanation"),
+                    "cultural_note": translation.get("cultural_note"),
+                    "voice_url": voice_storage.audio_url(relationship_id, original_name),
+                    "translated_voice_url": voice_storage.audio_url(relationship_id, translated_name),
+                    "voice_duration_seconds": stt.get("duration_seconds"),
+                },
+                facts,
+                before_broadcast=audio_ready,
+            )
+    finally:
+        for task in (original, translated):
+            if not task.done():
+                task.cancel()
+    
+    summary = timings.summary()
+    print(f"[Chat] Voice message {msg_data['id']} stage timings (ms): {summary}")
+    return {"message": msg_data, "transcript": text, "timings": summary}
 
 
 @router.get("/messages/{relationship_id}")
@@ -184,10 +344,9 @@ async def get_messages(relationship_id: str, limit: int = 50, offset: int = 0, c
     db = get_supabase()
     
     # Verify user is part of this relationship
-    rel = db.table("relationships").select("user_a_id, user_b_id").eq("id", relationship_id).execute()
-    if not rel.data:
+    rel_data = await load_relationship(relationship_id)
+    if not rel_data:
         raise HTTPException(status_code=404, detail="Relationship not found")
-    rel_data = rel.data[0]
     if current_user not in [rel_data["user_a_id"], rel_data["user_b_id"]]:
         raise HTTPException(status_code=403, detail="You are not part of this relationship")
     
@@ -199,16 +358,18 @@ async def get_messages(relationship_id: str, limit: int = 50, offset: int = 0, c
         .range(offset, offset + limit - 1) \
         .execute()
     
-    # Mark unread messages as read
-    try:
-        db.table("messages") \
-            .update({"is_read": True, "read_at": datetime.utcnow().isoformat()}) \
-            .eq("relationship_id", relationship_id) \
-            .neq("sender_id", current_user) \
-            .eq("is_read", False) \
-            .execute()
-    except Exception:
-        pass
+    # Mark unread messages as read (only when the counter says there are any)
+    unread = get_unread_message_counts(current_user, relationship_id)
+    if unread is None or unread.get(relationship_id):
+        try:
+            db.table("messages") \
+                .update({"is_read": True, "read_at": datetime.utcnow().isoformat()}) \
+                .eq("relationship_id", relationship_id) \
+                .neq("sender_id", current_user) \
+                .eq("is_read", False) \
+                .execute()
+        except Exception:
+            pass
     
     return {"messages": list(reversed(messages.data or []))}
 
@@ -218,24 +379,20 @@ async def get_relationship_details(relationship_id: str, current_user: str = Dep
     """Get full relationship details including partner info."""
     db = get_supabase()
     
-    rel = db.table("relationships").select("*").eq("id", relationship_id).execute()
-    if not rel.data or len(rel.data) == 0:
+    rel_data = await load_relationship(relationship_id)
+    if not rel_data:
         raise HTTPException(status_code=404, detail="Relationship not found")
     
-    rel_data = rel.data[0]
-    
     # Verify user is part of this relationship
     if current_user not in [rel_data["user_a_id"], rel_data["user_b_id"]]:
         raise HTTPException(status_code=403, detail="You are not part of this relationship")
     
     # Get partner profile
     partner_id = rel_data["user_b_id"] if rel_data["user_a_id"] == current_user else rel_data["user_a_id"]
-    partner = db.table("profiles") \
-        .select("id, display_name, country, city, timezone, avatar_config, is_verified, care_score, status, status_message, last_active_at") \
-        .eq("id", partner_id) \
-        .execute()
-    
-    partner_data = partner.data[0] if partner.data else None
+    partner_data = await load_profile(
+        partner_id,
+        "id, display_name, country, city, timezone, avatar_config, is_verified, care_score, status, status_message, last_active_at",
+    )
     
     # Get milestones (non-blocking)
     milestones_data = []
@@ -276,10 +433,92 @@ async def get_relationship_details(relationship_id: str, current_user: str = Dep
     }
 
 
+@router.post("/relationship/{relationship_id}/resume")
+async def resume_paused_relationship(relationship_id: str, current_user: str = Depends(get_current_user_id)):
+    """Reactivate a relationship that was auto-paused for inactivity."""
+    rel_data = await load_relationship(relationship_id)
+    if not rel_data:
+        raise HTTPException(status_code=404, detail="Relationship not found")
+    
+    if current_user not in [rel_data["user_a_id"], rel_data["user_b_id"]]:
+        raise HTTPException(status_code=403, detail="You are not part of this relationship")
+    
+    if rel_data["status"] != "paused":
+        raise HTTPException(status_code=400, detail="Relationship is not paused")
+    
+    invalidate_relationship(relationship_id)
+    return {"relationship": resume_relationship(relationship_id)}
+
+
+# Close codes for a rejected handshake
+WS_UNAUTHORIZED = 4401
+WS_FORBIDDEN = 4403
+WS_NOT_FOUND = 4404
+
+# How often an open socket re-checks that its relationship is still active
+WS_RELATIONSHIP_RECHECK_SECONDS = 300
+
+
+async def _load_chat_context(relationship_id: str, user_id: str) -> tuple[dict | None, str]:
+    """Relationship row and the partner's primary language, read once per socket."""
+    rel_data = await load_relationship(relationship_id, "id, user_a_id, user_b_id, status")
+    if not rel_data:
+        return None, "en"
+
+    partner_id = rel_data["user_b_id"] if rel_data["user_a_id"] == user_id else rel_data["user_a_id"]
+    target_lang = "en"
+    try:
+        target_lang = await load_primary_language(partner_id, "en")
+    except Exception:
+        pass
+    return rel_data, target_lang
+
+
+async def _authenticate_socket(websocket: WebSocket, relationship_id: str, claimed_user_id: Optional[str]) -> ChatConnection | None:
+    """Run the handshake: token from ?token= or a first {"type": "auth"} frame.
+
+    Closes the socket and returns None if the token is invalid or the user
+    is not part of an active relationship.
+    """
+    user_id = await authenticate_websocket(websocket)
+    if not user_id or (claimed_user_id and claimed_user_id != user_id):
+        await websocket.close(code=WS_UNAUTHORIZED, reason="Authentication required")
+        return None
+
+    rel_data, partner_language = await _load_chat_context(relationship_id, user_id)
+    if not rel_data or rel_data["status"] != "active":
+        await websocket.close(code=WS_NOT_FOUND, reason="Relationship not found or inactive")
+        return None
+    if user_id not in (rel_data["user_a_id"], rel_data["user_b_id"]):
+        await websocket.close(code=WS_FORBIDDEN, reason="You are not part of this relationship")
+        return None
+
+    partner_id = rel_data["user_b_id"] if rel_data["user_a_id"] == user_id else rel_data["user_a_id"]
+    return ChatConnection(websocket, user_id, relationship_id, partner_id, partner_language)
+
+
+def _relationship_active(relationship_id: str) -> bool:
+    db = get_supabase()
+    rel = db.table("relationships").select("status").eq("id", relationship_id).execute()
+    return bool(rel.data) and rel.data[0]["status"] == "active"
+
+
+@router.websocket("/ws/{relationship_id}")
 @router.websocket("/ws/{relationship_id}/{user_id}")
-async def websocket_chat(websocket: WebSocket, relationship_id: str, user_id: str):
-    """WebSocket endpoint for real-time chat."""
-    await manager.connect(websocket, relationship_id)
+async def websocket_chat(websocket: WebSocket, relationship_id: str, user_id: Optional[str] = None):
+    """WebSocket endpoint for real-time chat.
+
+    Authenticate with `?token=<access token>` or by sending
+    {"type": "auth", "token": "..."} as the first frame. The legacy
+    `/{user_id}` path segment is only accepted if it matches the token.
+    """
+    await websocket.accept()
+    conn = await _authenticate_socket(websocket, relationship_id, user_id)
+    if conn is None:
+        return
+
+    manager.connect(conn)
+    await websocket.send_json({"type": "ready", "user_id": conn.user_id, "relationship_id": relationship_id})
     
     try:
         while True:
@@ -289,8 +528,8 @@ async def websocket_chat(websocket: WebSocket, relationship_id: str, user_id: st
             if message_data.get("type") == "typing":
                 await manager.broadcast(relationship_id, {
                     "type": "typing",
-                    "user_id": user_id
-                }, exclude=websocket)
+                    "user_id": conn.user_id
+                }, exclude=conn)
             
             elif message_data.get("type") == "message":
                 # Process message via internal helper
@@ -300,15 +539,13 @@ async def websocket_chat(websocket: WebSocket, relationship_id: str, user_id: st
                 content_type = message_data.get("content_type", "text")
                 original_language = message_data.get("language")
                 
-                # Get relationship
-                rel = db.table("relationships").select("*").eq("id", relationship_id).eq("status", "active").execute()
-                if not rel.data:
-                    await websocket.send_json({"type": "error", "message": "Relationship not found"})
-                    continue
-                    
-                rel_data = rel.data[0]
-                is_user_a = user_id == rel_data["user_a_id"]
-                partner_id = rel_data["user_b_id"] if is_user_a else rel_data["user_a_id"]
+                # Paused/ended relationships are noticed on a slow interval, not per frame
+                if time.monotonic() - conn.checked_at > WS_RELATIONSHIP_RECHECK_SECONDS:
+                    if not await asyncio.to_thread(_relationship_active, relationship_id):
+                        await websocket.send_json({"type": "error", "message": "Relationship not found or inactive"})
+                        await websocket.close(code=WS_NOT_FOUND)
+                        break
+                    conn.checked_at = time.monotonic()
                 
                 # Detect language
                 source_lang = original_language or "en"
@@ -318,19 +555,7 @@ async def websocket_chat(websocket: WebSocket, relationship_id: str, user_id: st
                     except Exception:
                         source_lang = "en"
                 
-                # Get target language
-                target_lang = "en"
-                try:
-                    partner_lang = db.table("user_languages") \
-                        .select("language_code") \
-                        .eq("user_id", partner_id) \
-                        .eq("is_primary", True) \
-                        .limit(1) \
-                        .execute()
-                    if partner_lang.data:
-                        target_lang = partner_lang.data[0]["language_code"]
-                except Exception:
-                    pass
+                target_lang = conn.partner_language
                 
                 # Translate
                 translation = {
@@ -347,7 +572,7 @@ async def websocket_chat(websocket: WebSocket, relationship_id: str, user_id: st
                 # Save message
                 message = db.table("messages").insert({
                     "relationship_id": relationship_id,
-                    "sender_id": user_id,
+                    "sender_id": conn.user_id,
                     "content_type": content_type,
                     "original_text": original_text,
                     "original_language": source_lang,
@@ -359,12 +584,18 @@ async def websocket_chat(websocket: WebSocket, relationship_id: str, user_id: st
                 }).execute()
                 
                 if message.data:
+                    publish("message_sent", user_id=conn.user_id, relationship_id=relationship_id)
+                    screening = screen_message(original_text, translation["translated_text"])
+                    if screening:
+                        screening_batcher.submit(message.data[0], screening)
                     await manager.broadcast(relationship_id, {
                         "type": "new_message",
                         "message": message.data[0]
                     })
     
     except WebSocketDisconnect:
-        manager.disconnect(websocket, relationship_id)
+        pass
     except Exception:
-        manager.disconnect(websocket, relationship_id)
+        pass
+    finally:
+        manager.disconnect(conn)
@@ -2,14 +2,22 @@
 from fastapi import APIRouter, HTTPException
 from models.schemas import ContestRequest, AnswerRequest
 from services.supabase_client import get_supabase
-from services.contest_service import generate_contest, submit_answer, complete_contest
+from services.contest_service import generate_contest, start_scheduled_contest, submit_answer, complete_contest
 
 router = APIRouter(prefix="/contests", tags=["Contests"])
 
 
 @router.post("/create")
 async def create_contest(req: ContestRequest, user_id: str = ""):
-    """Create a new bonding contest for a relationship."""
+    """Start a bonding contest for a relationship.
+
+    Uses a contest pre-generated by the scheduler when one is ready and
+    only generates on demand otherwise.
+    """
+    result = await start_scheduled_contest(req.relationship_id, req.contest_type)
+    if result:
+        return result
+    
     result = await generate_contest(req.relationship_id, req.contest_type)
     
     if "error" in result:
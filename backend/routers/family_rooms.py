@@ -6,6 +6,7 @@ from models.schemas import CreateRoomRequest, InviteToRoomRequest, RoomMessageRe
 from services.supabase_client import get_supabase
 from services.translation_service import translate_text
 from services.auth_service import get_current_user_id, get_optional_user_id
+from services.events import publish
 from models.schemas import CreateJoinCodeRequest, JoinByCodeRequest
 import secrets
 from datetime import datetime
@@ -47,6 +48,7 @@ async def create_room(req: CreateRoomRequest, user_id: str = Depends(get_current
         "role_in_room": "mother",  # Default, can be changed
         "is_moderator": True
     }).execute()
+    publish("room_joined", user_id=user_id, room_id=room_data["id"])
     
     return {"room": room_data}
 
@@ -123,6 +125,8 @@ async def invite_to_room(room_id: str, req: InviteToRoomRequest, user_id: str =
         "role_in_room": req.role_in_room,
         "is_moderator": is_moderator
     }).execute()
+    if member.data:
+        publish("room_joined", user_id=req.user_id, room_id=room_id)
     
     # Notify invited user
     db.table("notifications").insert({
@@ -211,6 +215,8 @@ async def join_room(room_id: str, req: Optional[JoinRoomRequest] = None, user_id
         "role_in_room": role,
         "is_moderator": is_moderator
     }).execute()
+    if member.data:
+        publish("room_joined", user_id=target_user_id, room_id=room_id)
 
     # Notify the added user (if different)
     if target_user_id and (not user_id or target_user_id != user_id):
@@ -333,6 +339,8 @@ async def create_potluck(room_id: str, req: CreatePotluckRequest, user_id: str =
         "scheduled_at": req.scheduled_at,
         "status": "scheduled"
     }).execute()
+    if potluck.data:
+        publish("potluck_hosted", user_id=user_id, room_id=room_id)
     
     # Notify all room members
     members = db.table("family_room_members") \
@@ -451,6 +459,8 @@ async def join_by_code(req: JoinByCodeRequest, user_id: str = Depends(get_curren
         "role_in_room": "member",
         "is_moderator": False
     }).execute()
+    if member.data:
+        publish("room_joined", user_id=user_id, room_id=room_id)
 
     # Increment usage counter
     db.table("family_room_join_codes").update({"uses": row.get("uses", 0) + 1}).eq("id", row["id"]).execute()
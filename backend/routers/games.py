@@ -1,9 +1,12 @@
 """Games router - Fun & emotional games."""
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect
 from datetime import datetime
 from models.schemas import StartGameRequest, GameActionRequest
 from services.supabase_client import get_supabase
-from services.auth_service import get_current_user_id, get_optional_user_id
+from services.auth_service import get_current_user_id, get_optional_user_id, authenticate_websocket
+from services.game_engine import game_engine
+from services.catalog import get_game, get_games_payload, cached_response
+from services.loader import load_relationship
 
 router = APIRouter(prefix="/games", tags=["Games"])
 
@@ -48,25 +51,9 @@ def _get_initial_game_data(game_type: str) -> dict:
 
 
 @router.get("/")
-async def get_all_games():
-    """Get all available games."""
-    db = get_supabase()
-    
-    games = db.table("games") \
-        .select("*") \
-        .eq("is_active", True) \
-        .order("category") \
-        .execute()
-    
-    # Group by category
-    categories = {}
-    for game in (games.data or []):
-        cat = game.get("category", "other")
-        if cat not in categories:
-            categories[cat] = []
-        categories[cat].append(game)
-    
-    return {"games": games.data or [], "categories": categories}
+async def get_all_games(request: Request):
+    """Get all available games, grouped by category (served from the catalog cache)."""
+    return cached_response(request, "games", get_games_payload())
 
 
 @router.post("/start")
@@ -74,19 +61,16 @@ async def start_game(req: StartGameRequest, user_id: str = Depends(get_current_u
     """Start a game session."""
     db = get_supabase()
     
-    game = db.table("games").select("*").eq("id", req.game_id).execute()
-    if not game.data or len(game.data) == 0:
+    game_data = get_game(req.game_id)
+    if not game_data:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    game_data = game.data[0]
-    
     # Get partner(s)
     players = [{"user_id": user_id, "score": 0}]
     
     if req.relationship_id:
-        rel = db.table("relationships").select("*").eq("id", req.relationship_id).execute()
-        if rel.data and len(rel.data) > 0:
-            rel_data = rel.data[0]
+        rel_data = await load_relationship(req.relationship_id)
+        if rel_data:
             partner_id = rel_data["user_b_id"] if rel_data["user_a_id"] == user_id else rel_data["user_a_id"]
             players.append({"user_id": partner_id, "score": 0})
     
@@ -125,63 +109,10 @@ async def start_game(req: StartGameRequest, user_id: str = Depends(get_current_u
 @router.post("/action")
 async def game_action(req: GameActionRequest, user_id: str = Depends(get_current_user_id)):
     """Perform a game action (answer, submit, etc.)."""
-    db = get_supabase()
-    
-    session = db.table("game_sessions").select("*").eq("id", req.session_id).execute()
-    if not session.data or len(session.data) == 0:
-        raise HTTPException(status_code=404, detail="Game session not found")
-    
-    session_data = session.data[0]
-    game_data = session_data.get("game_data", {})
-    players = session_data.get("players", [])
-    
-    # Process action based on game type
-    game = db.table("games").select("game_type, bond_points_reward").eq("id", session_data["game_id"]).execute()
-    game_info = game.data[0] if game.data else {}
-    game_type = game_info.get("game_type", "")
-    
-    result = {"success": True}
-    
-    if req.action_type == "submit":
-        game_data[f"answer_{user_id}"] = req.action_data
-        result["submitted"] = True
-    elif req.action_type == "guess":
-        game_data.setdefault("guesses", []).append({
-            "user_id": user_id,
-            "guess": req.action_data,
-            "timestamp": datetime.utcnow().isoformat()
-        })
-        result["guess_recorded"] = True
-    elif req.action_type == "reveal":
-        game_data.setdefault("reveals", []).append(req.action_data)
-        result["revealed"] = True
-    elif req.action_type == "complete":
-        # End the game session
-        bond_points = game_info.get("bond_points_reward", 5)
-        
-        db.table("game_sessions").update({
-            "status": "completed",
-            "completed_at": datetime.utcnow().isoformat(),
-            "bond_points_awarded": bond_points
-        }).eq("id", req.session_id).execute()
-        
-        # Award bond points to relationship
-        if session_data.get("relationship_id"):
-            rel = db.table("relationships").select("bond_points").eq("id", session_data["relationship_id"]).execute()
-            current_points = rel.data[0].get("bond_points", 0) if rel.data else 0
-            db.table("relationships").update({
-                "bond_points": current_points + bond_points
-            }).eq("id", session_data["relationship_id"]).execute()
-        
-        result["completed"] = True
-        result["bond_points_awarded"] = bond_points
+    result = await game_engine.apply_action(req.session_id, user_id, req.action, req.data)
     
-    # Update game data
-    if req.action_type != "complete":
-        db.table("game_sessions").update({
-            "game_data": game_data,
-            "current_round": session_data.get("current_round", 0) + 1 if req.action_type == "next_round" else session_data.get("current_round", 0)
-        }).eq("id", req.session_id).execute()
+    if "error" in result:
+        raise HTTPException(status_code=result.get("status_code", 400), detail=result["error"])
     
     return result
 
@@ -199,7 +130,66 @@ async def get_game_session(session_id: str, user_id: str = Depends(get_current_u
     if not session.data or len(session.data) == 0:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return {"session": session.data[0]}
+    session_data = session.data[0]
+    
+    # Live state may not have been checkpointed yet
+    live = game_engine.peek(session_id)
+    if live:
+        session_data.update({
+            "game_data": live.game_data,
+            "current_round": live.current_round,
+            "status": live.status
+        })
+    
+    return {"session": session_data}
+
+
+# Close codes
+WS_UNAUTHORIZED = 4401
+WS_FORBIDDEN = 4403
+WS_NOT_FOUND = 4404
+
+
+@router.websocket("/ws/{session_id}/{user_id}")
+async def game_websocket(websocket: WebSocket, session_id: str, user_id: str):
+    """WebSocket for live game state: sends a snapshot, then diffs.
+
+    Authenticate like the chat socket (`?token=` or a first auth frame);
+    the token's user must be `user_id` and a player in the session.
+    """
+    await websocket.accept()
+    authed_user_id = await authenticate_websocket(websocket)
+    if not authed_user_id or authed_user_id != user_id:
+        await websocket.close(code=WS_UNAUTHORIZED, reason="Authentication required")
+        return
+
+    session = await game_engine.get(session_id)
+    if not session:
+        await websocket.close(code=WS_NOT_FOUND, reason="Game session not found")
+        return
+    if not session.is_player(user_id):
+        await websocket.close(code=WS_FORBIDDEN, reason="You are not a player in this game")
+        return
+
+    game_engine.connect(websocket, session_id)
+    
+    try:
+        await websocket.send_json({"type": "game_state", **session.snapshot()})
+        
+        while True:
+            message_data = await websocket.receive_json()
+            
+            if message_data.get("type") == "action":
+                result = await game_engine.apply_action(
+                    session_id, user_id, message_data.get("action", ""), message_data.get("data")
+                )
+                if "error" in result:
+                    await websocket.send_json({"type": "error", "message": result["error"]})
+    
+    except WebSocketDisconnect:
+        game_engine.disconnect(websocket, session_id)
+    except Exception:
+        game_engine.disconnect(websocket, session_id)
 
 
 @router.get("/history/{relationship_id}")
@@ -6,15 +6,11 @@ from models.schemas import MatchRequest
 from services.supabase_client import get_supabase
 from services.matching_service import find_match, create_relationship
 from services.auth_service import get_current_user_id
+from services.loader import load_profile, load_profiles
+from services.catalog import VALID_ROLES, ROLE_ALIASES
 
 router = APIRouter(prefix="/matching", tags=["Matching"])
 
-# Valid roles constant
-VALID_ROLES = ["mother", "father", "son", "daughter", "mentor", "student", 
-               "brother", "sister", "friend", "grandparent", "grandchild", 
-               "sibling", "penpal"]
-
-
 # ─── Public Endpoints (No Auth Required) ───────────────────────────────────────
 
 @router.get("/browse/{role}")
@@ -26,14 +22,7 @@ async def browse_by_role(role: str):
     role_lower = role.lower().strip()
     
     # Handle aliases
-    role_aliases = {
-        "sibling": ["brother", "sister", "sibling"],
-        "brother": ["brother", "sibling"],
-        "sister": ["sister", "sibling"],
-        "penpal": ["penpal", "friend"],
-    }
-    
-    search_roles = role_aliases.get(role_lower, [role_lower])
+    search_roles = ROLE_ALIASES.get(role_lower, [role_lower])
     
     if role_lower not in VALID_ROLES:
         raise HTTPException(
@@ -122,16 +111,20 @@ async def connect_with_user(
     db = get_supabase()
 
     # Check both profiles exist and aren't banned
-    my_profile = db.table("profiles").select("id, display_name, is_banned, matching_preferences").eq("id", current_user).execute()
-    target_profile = db.table("profiles").select("id, display_name, country, city, avatar_config, is_verified, care_score, bio, is_banned, matching_preferences").eq("id", target_user_id).execute()
+    profiles = await load_profiles(
+        [current_user, target_user_id],
+        "id, display_name, country, city, avatar_config, is_verified, care_score, bio, is_banned, matching_preferences",
+    )
+    my_profile = profiles.get(current_user)
+    target_profile = profiles.get(target_user_id)
 
-    if not my_profile.data:
+    if not my_profile:
         raise HTTPException(status_code=404, detail="Your profile was not found")
-    if not target_profile.data:
+    if not target_profile:
         raise HTTPException(status_code=404, detail="User not found")
-    if my_profile.data[0].get("is_banned"):
+    if my_profile.get("is_banned"):
         raise HTTPException(status_code=403, detail="Your account is banned")
-    if target_profile.data[0].get("is_banned"):
+    if target_profile.get("is_banned"):
         raise HTTPException(status_code=403, detail="This user is no longer available")
 
     # Check if there's already an active relationship between them
@@ -149,17 +142,17 @@ async def connect_with_user(
             return {
                 "status": "already_connected",
                 "relationship": rel,
-                "partner": target_profile.data[0],
+                "partner": target_profile,
                 "message": "You are already connected with this person!"
             }
 
     # Determine roles
     role_lower = role.lower().strip()
-    target_prefs = target_profile.data[0].get("matching_preferences") or {}
+    target_prefs = target_profile.get("matching_preferences") or {}
     target_offering = (target_prefs.get("offering_role") or role_lower).lower().strip()
 
     # My role: infer from my preferences or use a complementary role
-    my_prefs = my_profile.data[0].get("matching_preferences") or {}
+    my_prefs = my_profile.get("matching_preferences") or {}
     my_offering = (my_prefs.get("offering_role") or "").lower().strip()
     # If I don't have an offering role, use a sensible default
     if not my_offering:
@@ -182,8 +175,8 @@ async def connect_with_user(
     return {
         "status": "connected",
         "relationship": relationship,
-        "partner": target_profile.data[0],
-        "message": f"You are now connected with {target_profile.data[0].get('display_name', 'your new bond')}!"
+        "partner": target_profile,
+        "message": f"You are now connected with {target_profile.get('display_name', 'your new bond')}!"
     }
 
 
@@ -193,10 +186,9 @@ async def search_for_match(req: MatchRequest, user_id: str = Depends(get_current
     db = get_supabase()
     
     # Check if user is verified
-    profile = db.table("profiles").select("is_verified, is_banned").eq("id", user_id).execute()
-    if not profile.data or len(profile.data) == 0:
+    profile_data = await load_profile(user_id, "is_verified, is_banned")
+    if not profile_data:
         raise HTTPException(status_code=404, detail="Profile not found")
-    profile_data = profile.data[0]
     if profile_data.get("is_banned"):
         raise HTTPException(status_code=403, detail="Account is banned")
     
@@ -249,15 +241,14 @@ async def search_for_match(req: MatchRequest, user_id: str = Depends(get_current
             .execute()
         
         # Get partner profile
-        partner_profile = db.table("profiles") \
-            .select("id, display_name, country, city, avatar_config, is_verified, care_score, bio") \
-            .eq("id", candidate_id) \
-            .execute()
+        partner_profile = await load_profile(
+            candidate_id, "id, display_name, country, city, avatar_config, is_verified, care_score, bio"
+        )
         
         return {
             "status": "matched",
             "relationship": relationship,
-            "partner": partner_profile.data[0] if partner_profile.data else None,
+            "partner": partner_profile,
             "match_score": candidate["score"]
         }
     
@@ -1,4 +1,5 @@
 """Profile management router."""
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
 from datetime import datetime
 from typing import Optional, List
@@ -6,15 +7,16 @@ from pydantic import BaseModel
 from models.schemas import ProfileUpdate, LanguageInput
 from services.supabase_client import get_supabase
 from services.auth_service import get_current_user_id, get_optional_user_id
+from services.counter_service import get_unread_counts, get_unread_notification_count
+from services.catalog import VALID_ROLES
+from services.loader import (
+    load_profile, load_profiles, load_languages, prime_relationships,
+    invalidate_profile, invalidate_languages,
+)
+from services.profile_cache import profile_cache
 
 router = APIRouter(prefix="/profiles", tags=["Profiles"])
 
-# Valid roles
-VALID_ROLES = ["mother", "father", "son", "daughter", "mentor", "student", 
-               "brother", "sister", "friend", "grandparent", "grandchild", 
-               "sibling", "penpal"]
-
-
 class SetRoleRequest(BaseModel):
     offering_role: Optional[str] = None  # What role the user wants to BE (optional)
     seeking_role: Optional[str] = None  # What role they're looking for (optional)
@@ -48,12 +50,12 @@ async def set_my_role(req: SetRoleRequest, current_user: str = Depends(get_curre
         raise HTTPException(status_code=400, detail="You must provide either `offering_role` or `preferred_roles` (empty list to clear)")
     
     # Get current matching_preferences
-    profile = db.table("profiles").select("matching_preferences").eq("id", current_user).execute()
-    if not profile.data:
+    profile = await load_profile(current_user, "matching_preferences")
+    if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
     # Update matching_preferences with the role (using JSONB which exists)
-    prefs = profile.data[0].get("matching_preferences") or {}
+    prefs = dict(profile.get("matching_preferences") or {})
     # Set offering_role to the first preferred role if not explicitly set.
     # If preferred list is empty and no offering_role provided, clear offering_role.
     if req.offering_role:
@@ -78,6 +80,8 @@ async def set_my_role(req: SetRoleRequest, current_user: str = Depends(get_curre
     }
     
     result = db.table("profiles").update(update_data).eq("id", current_user).execute()
+    invalidate_profile(current_user)
+    profile_cache.invalidate(current_user)
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Failed to update profile")
@@ -101,23 +105,33 @@ async def get_my_profile(current_user: str = Depends(get_current_user_id)):
     return await get_profile(current_user, current_user)
 
 
+@router.get("/cache/metrics")
+async def get_profile_cache_metrics():
+    """Hit rate and size of this instance's profile cache."""
+    return profile_cache.metrics()
+
+
 @router.get("/{user_id}")
 async def get_profile(user_id: str, current_user: str = Depends(get_optional_user_id)):
-    """Get a user's public profile."""
+    """Get a user's public profile (served from the profile cache when fresh)."""
+    cached = profile_cache.get(user_id)
+    if cached is not None:
+        return cached
+    generation = profile_cache.generation(user_id)
+
     db = get_supabase()
 
-    profile = db.table("profiles") \
-        .select("id, username, display_name, country, city, timezone, bio, voice_bio_url, profile_photo_url, avatar_config, is_verified, care_score, reliability_score, total_bond_points, status, created_at") \
-        .eq("id", user_id) \
-        .execute()
+    profile_data, languages = await asyncio.gather(
+        load_profile(
+            user_id,
+            "id, username, display_name, country, city, timezone, bio, voice_bio_url, profile_photo_url, avatar_config, is_verified, care_score, reliability_score, total_bond_points, status, created_at",
+        ),
+        load_languages(user_id),
+    )
 
-    if not profile.data or len(profile.data) == 0:
+    if not profile_data:
         raise HTTPException(status_code=404, detail="Profile not found")
 
-    profile_data = profile.data[0]
-
-    languages = db.table("user_languages").select("*").eq("user_id", user_id).execute()
-
     # Get achievement count
     achievements = db.table("user_achievements") \
         .select("*, achievements(name, icon_emoji, rarity)") \
@@ -131,12 +145,14 @@ async def get_profile(user_id: str, current_user: str = Depends(get_optional_use
         .eq("status", "active") \
         .execute()
 
-    return {
+    result = {
         "profile": profile_data,
-        "languages": languages.data or [],
+        "languages": languages,
         "achievements": achievements.data or [],
         "active_relationships": len(rels.data or [])
     }
+    profile_cache.set(user_id, result, generation)
+    return result
 
 
 # ─── Current User Endpoints (/me) ───────────────────────────────────────────────
@@ -159,6 +175,8 @@ async def update_my_profile(update: ProfileUpdate, current_user: str = Depends(g
     update_data["updated_at"] = datetime.utcnow().isoformat()
     
     result = db.table("profiles").update(update_data).eq("id", current_user).execute()
+    invalidate_profile(current_user)
+    profile_cache.invalidate(current_user)
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Profile not found")
@@ -180,6 +198,8 @@ async def update_profile(user_id: str, update: ProfileUpdate, current_user: str
     update_data["updated_at"] = datetime.utcnow().isoformat()
     
     result = db.table("profiles").update(update_data).eq("id", user_id).execute()
+    invalidate_profile(user_id)
+    profile_cache.invalidate(user_id)
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Profile not found")
@@ -199,6 +219,8 @@ async def update_avatar(user_id: str, avatar_config: dict, current_user: str = D
         "avatar_config": avatar_config,
         "updated_at": datetime.utcnow().isoformat()
     }).eq("id", user_id).execute()
+    invalidate_profile(user_id)
+    profile_cache.invalidate(user_id)
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Profile not found")
@@ -222,6 +244,8 @@ async def add_language(user_id: str, lang: LanguageInput, current_user: str = De
         "is_primary": lang.is_primary,
         "show_original": lang.show_original
     }).execute()
+    invalidate_languages(user_id)
+    profile_cache.invalidate(user_id)
     
     return {"language": result.data[0] if result.data else None}
 
@@ -239,6 +263,8 @@ async def remove_language(user_id: str, language_code: str, current_user: str =
         .eq("user_id", user_id) \
         .eq("language_code", language_code) \
         .execute()
+    invalidate_languages(user_id)
+    profile_cache.invalidate(user_id)
     
     return {"status": "removed"}
 
@@ -270,6 +296,8 @@ async def update_status(
         update_data["status_return_date"] = return_date
     
     result = db.table("profiles").update(update_data).eq("id", user_id).execute()
+    invalidate_profile(user_id)
+    profile_cache.invalidate(user_id)
     
     return {"status": status, "message": status_message}
 
@@ -284,16 +312,17 @@ async def get_relationships(user_id: str, current_user: str = Depends(get_option
         .or_(f"user_a_id.eq.{user_id},user_b_id.eq.{user_id}") \
         .order("last_interaction_at", desc=True) \
         .execute()
+    prime_relationships(rels.data or [])
+    
+    partner_ids = [
+        rel["user_b_id"] if rel["user_a_id"] == user_id else rel["user_a_id"]
+        for rel in (rels.data or [])
+    ]
+    partners = await load_profiles(partner_ids, "id, display_name, country, avatar_config, is_verified, status, care_score")
     
     enriched = []
-    for rel in (rels.data or []):
-        partner_id = rel["user_b_id"] if rel["user_a_id"] == user_id else rel["user_a_id"]
-        partner = db.table("profiles") \
-            .select("id, display_name, country, avatar_config, is_verified, status, care_score") \
-            .eq("id", partner_id) \
-            .execute()
-        
-        partner_data = partner.data[0] if partner.data else None
+    for rel, partner_id in zip(rels.data or [], partner_ids):
+        partner_data = partners.get(partner_id)
         
         my_role = rel["user_a_role"] if rel["user_a_id"] == user_id else rel["user_b_role"]
         partner_role = rel["user_b_role"] if rel["user_a_id"] == user_id else rel["user_a_role"]
@@ -327,6 +356,15 @@ async def get_notifications(user_id: str, unread_only: bool = False, current_use
     return {"notifications": result.data or []}
 
 
+@router.get("/{user_id}/counts")
+async def get_counts(user_id: str, current_user: str = Depends(get_current_user_id)):
+    """Get unread notification and message counts (for badges)."""
+    if current_user != user_id:
+        raise HTTPException(status_code=403, detail="Cannot view another user's counts")
+    
+    return get_unread_counts(user_id)
+
+
 @router.put("/{user_id}/notifications/{notification_id}/read")
 async def mark_notification_read(user_id: str, notification_id: str, current_user: str = Depends(get_current_user_id)):
     """Mark a notification as read."""
@@ -349,6 +387,10 @@ async def mark_all_notifications_read(user_id: str, current_user: str = Depends(
     if current_user != user_id:
         raise HTTPException(status_code=403, detail="Cannot modify another user's notifications")
     
+    # Skip the broad UPDATE when the counter says there is nothing to mark
+    if get_unread_notification_count(user_id) == 0:
+        return {"status": "all_read"}
+    
     db = get_supabase()
     
     db.table("notifications").update({
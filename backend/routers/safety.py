@@ -3,6 +3,10 @@ from fastapi import APIRouter, HTTPException
 from datetime import datetime
 from models.schemas import ReportRequest, SeverBondRequest
 from services.supabase_client import get_supabase
+from config import get_settings
+from services.moderation_worker import moderation_pool
+from services.loader import load_profile, load_relationship, invalidate_relationship
+from services.profile_cache import profile_cache
 
 router = APIRouter(prefix="/safety", tags=["Safety"])
 
@@ -39,6 +43,10 @@ async def report_user(req: ReportRequest, user_id: str = ""):
             .eq("user_id", req.reported_user_id) \
             .eq("status", "searching") \
             .execute()
+        
+        # The moderation worker runs the automated checks; wake it instead
+        # of waiting for a poll
+        moderation_pool.notify()
     
     return {
         "status": "reported",
@@ -47,17 +55,21 @@ async def report_user(req: ReportRequest, user_id: str = ""):
     }
 
 
+@router.get("/moderation/metrics")
+async def get_moderation_metrics():
+    """Throughput and decision counters for this instance's moderation workers."""
+    return moderation_pool.metrics_snapshot()
+
+
 @router.post("/sever")
 async def sever_bond(req: SeverBondRequest, user_id: str = ""):
     """One-tap sever a relationship bond."""
     db = get_supabase()
     
-    rel = db.table("relationships").select("*").eq("id", req.relationship_id).execute()
-    if not rel.data or len(rel.data) == 0:
+    rel_data = await load_relationship(req.relationship_id)
+    if not rel_data:
         raise HTTPException(status_code=404, detail="Relationship not found")
     
-    rel_data = rel.data[0]
-    
     # Determine partner
     partner_id = rel_data["user_b_id"] if rel_data["user_a_id"] == user_id else rel_data["user_a_id"]
     
@@ -71,6 +83,8 @@ async def sever_bond(req: SeverBondRequest, user_id: str = ""):
         farewell_field: req.farewell_message or "It was nice knowing you. Best wishes!",
         "ended_at": datetime.utcnow().isoformat()
     }).eq("id", req.relationship_id).execute()
+    invalidate_relationship(req.relationship_id)
+    profile_cache.invalidate(rel_data["user_a_id"], rel_data["user_b_id"])
     
     # Notify partner
     db.table("notifications").insert({
@@ -117,16 +131,10 @@ async def get_reliability_info(user_id: str):
     """Get user's reliability information and ghosting protection status."""
     db = get_supabase()
     
-    profile = db.table("profiles") \
-        .select("reliability_score, status, status_message, last_active_at, status_return_date") \
-        .eq("id", user_id) \
-        .execute()
-    
-    if not profile.data or len(profile.data) == 0:
+    profile_data = await load_profile(user_id, "reliability_score, status, status_message, last_active_at, status_return_date")
+    if not profile_data:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    profile_data = profile.data[0]
-    
     return {
         "reliability_score": profile_data["reliability_score"],
         "current_status": profile_data["status"],
@@ -134,14 +142,14 @@ async def get_reliability_info(user_id: str):
         "last_active": profile_data["last_active_at"],
         "return_date": profile_data["status_return_date"],
         "ghosting_protection": {
-            "grace_period_days": 7,
+            "grace_period_days": get_settings().INACTIVITY_PAUSE_DAYS,
             "available_statuses": [
                 {"value": "active", "label": "Active", "emoji": "🟢"},
                 {"value": "busy", "label": "Busy (will reply slower)", "emoji": "🟡"},
                 {"value": "away", "label": "Away (back in X days)", "emoji": "🟠"},
                 {"value": "break", "label": "Taking a break", "emoji": "🔴"}
             ],
-            "policy": "No response + No status update for 7 days → Relationship auto-paused, partner notified"
+            "policy": f"No response + No status update for {get_settings().INACTIVITY_PAUSE_DAYS} days → Relationship auto-paused, partner notified"
         }
     }
 
@@ -151,16 +159,10 @@ async def get_minor_protection_settings(user_id: str):
     """Get minor protection settings."""
     db = get_supabase()
     
-    profile = db.table("profiles") \
-        .select("is_minor, parent_email, parent_approved, date_of_birth") \
-        .eq("id", user_id) \
-        .execute()
-    
-    if not profile.data or len(profile.data) == 0:
+    profile_data = await load_profile(user_id, "is_minor, parent_email, parent_approved, date_of_birth")
+    if not profile_data:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    profile_data = profile.data[0]
-    
     if not profile_data["is_minor"]:
         return {"is_minor": False, "protections": None}
     
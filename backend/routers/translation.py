@@ -1,17 +1,24 @@
 """Translation-specific router for direct translation API access."""
-from fastapi import APIRouter
-from services.translation_service import translate_text, detect_language
+from fastapi import APIRouter, Request
+from services.translation_service import translate_text, detect_language, get_translation_metrics
+from services.catalog import LANGUAGES, cached_response
+from services.vendor_client import bulk_priority
 
 router = APIRouter(prefix="/translate", tags=["Translation"])
 
 
 @router.post("/")
 async def translate(text: str, source_lang: str = None, target_lang: str = "en"):
-    """Translate text between languages with nuance detection."""
-    if not source_lang:
-        source_lang = await detect_language(text)
-    
-    result = await translate_text(text, source_lang, target_lang)
+    """Translate text between languages with nuance detection.
+
+    Direct API traffic runs as bulk work, so a spike here can't starve
+    chat translations of Google request slots.
+    """
+    with bulk_priority():
+        if not source_lang:
+            source_lang = await detect_language(text)
+
+        result = await translate_text(text, source_lang, target_lang)
     
     return {
         "original": text,
@@ -24,7 +31,8 @@ async def translate(text: str, source_lang: str = None, target_lang: str = "en")
 @router.post("/detect")
 async def detect(text: str):
     """Detect the language of text."""
-    lang = await detect_language(text)
+    with bulk_priority():
+        lang = await detect_language(text)
     
     lang_names = {
         "en": "English", "hi": "Hindi", "pt": "Portuguese",
@@ -43,29 +51,12 @@ async def detect(text: str):
 
 
 @router.get("/languages")
-async def supported_languages():
+async def supported_languages(request: Request):
     """Get list of supported languages."""
-    return {
-        "languages": [
-            {"code": "en", "name": "English", "flag": "🇺🇸"},
-            {"code": "hi", "name": "Hindi", "flag": "🇮🇳"},
-            {"code": "pt", "name": "Portuguese", "flag": "🇧🇷"},
-            {"code": "ja", "name": "Japanese", "flag": "🇯🇵"},
-            {"code": "es", "name": "Spanish", "flag": "🇪🇸"},
-            {"code": "ko", "name": "Korean", "flag": "🇰🇷"},
-            {"code": "fr", "name": "French", "flag": "🇫🇷"},
-            {"code": "de", "name": "German", "flag": "🇩🇪"},
-            {"code": "zh", "name": "Chinese", "flag": "🇨🇳"},
-            {"code": "ar", "name": "Arabic", "flag": "🇸🇦"},
-            {"code": "ru", "name": "Russian", "flag": "🇷🇺"},
-            {"code": "it", "name": "Italian", "flag": "🇮🇹"},
-            {"code": "nl", "name": "Dutch", "flag": "🇳🇱"},
-            {"code": "pl", "name": "Polish", "flag": "🇵🇱"},
-            {"code": "tr", "name": "Turkish", "flag": "🇹🇷"},
-            {"code": "vi", "name": "Vietnamese", "flag": "🇻🇳"},
-            {"code": "th", "name": "Thai", "flag": "🇹🇭"},
-            {"code": "sv", "name": "Swedish", "flag": "🇸🇪"},
-            {"code": "sw", "name": "Swahili", "flag": "🇰🇪"},
-            {"code": "bn", "name": "Bengali", "flag": "🇧🇩"}
-        ]
-    }
+    return cached_response(request, "languages", {"languages": LANGUAGES})
+
+
+@router.get("/metrics")
+async def translation_metrics():
+    """How well concurrent translations are being batched and coalesced."""
+    return get_translation_metrics()
@@ -1,17 +1,36 @@
 """Voice router — Speech-to-Text (Deepgram) & Text-to-Speech (Cartesia).
 
 POST /voice/transcribe   → upload audio, get text back
-POST /voice/speak        → send text, get audio back
+POST /voice/transcribe/stream → raw audio request body, relayed as it arrives
+GET  /voice/transcribe/metrics → bytes saved by audio normalization
+POST /voice/speak        → send text, get audio back (optionally streamed)
+GET  /voice/audio/{key}  → cached audio from an earlier /speak (Range/ETag)
+GET  /voice/messages/{relationship_id}/{name} → stored voice message audio
 GET  /voice/voices       → list available TTS voices
+WS   /voice/ws/transcribe → stream audio, get interim + final transcripts
 """
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
+import contextlib
+import json
 
-from services.deepgram_stt import transcribe_audio, transcribe_audio_auto_detect
-from services.cartesia_tts import synthesize_speech, get_available_voices
+from services.deepgram_stt import (
+    transcribe_audio, transcribe_audio_auto_detect, limit_audio_stream, read_in_chunks, AudioTooLarge, UploadError,
+)
+from services.cartesia_tts import (
+    synthesize_speech, stream_speech, get_available_voices, resolve_voice, TTSError,
+)
+from services.tts_cache import tts_cache, cache_key, EXTENSIONS
+from services.streaming_stt import open_stt_stream, STTError
+from services.audio_processing import normalize_for_stt, get_audio_stats
+from services.auth_service import authenticate_websocket, get_current_user_id
+from services.loader import load_relationship
+from services import voice_storage
+from config import get_settings
 
 router = APIRouter(prefix="/voice", tags=["Voice"])
 
@@ -23,10 +42,38 @@ class SpeakRequest(BaseModel):
     language: str = "en"
     voice_id: Optional[str] = None
     output_format: str = "mp3"
+    # Relay audio as Cartesia produces it instead of after synthesis finishes
+    stream: bool = False
 
 
 # ─── Endpoints ──────────────────────────────────────────────────────────────────
 
+async def _transcribe_stream(chunks, language: Optional[str], mime: str) -> dict:
+    """Relay audio chunks to Deepgram under STT_MAX_UPLOAD_BYTES, downmixed
+    and resampled on the way (services/audio_processing.py)."""
+    audio = limit_audio_stream(chunks, get_settings().STT_MAX_UPLOAD_BYTES)
+    try:
+        audio, mime = await normalize_for_stt(audio, mime)
+        if language:
+            result = await transcribe_audio(audio, language=language, mime_type=mime)
+        else:
+            result = await transcribe_audio_auto_detect(audio, mime_type=mime)
+    except AudioTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    except UploadError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    if result.get("error"):
+        raise HTTPException(status_code=502, detail=result["error"])
+
+    return {
+        "transcript": result["transcript"],
+        "confidence": result["confidence"],
+        "detected_language": result["language"],
+        "words": result.get("words", []),
+    }
+
+
 @router.post("/transcribe")
 async def transcribe(
     audio: UploadFile = File(...),
@@ -36,58 +83,308 @@ async def transcribe(
 
     - If `language` is provided, Deepgram uses that language model.
     - If omitted, Deepgram auto-detects the spoken language.
+
+    The upload (spooled to disk by the multipart parser past 1 MB) is read
+    in chunks and relayed to Deepgram without being loaded into memory.
     """
-    audio_bytes = await audio.read()
+    if audio.size == 0:
+        raise HTTPException(status_code=400, detail="Empty audio file")
+    if audio.size and audio.size > get_settings().STT_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Audio file too large")
+
+    return await _transcribe_stream(read_in_chunks(audio), language, audio.content_type or "audio/webm")
+
 
-    if not audio_bytes:
+@router.post("/transcribe/stream")
+async def transcribe_body(request: Request, language: Optional[str] = None):
+    """Transcribe audio sent as the raw request body (Content-Type: audio/*).
+
+    The body is relayed to Deepgram as it arrives, so nothing is buffered
+    and transcription overlaps the upload.
+    """
+    length = request.headers.get("content-length")
+    if length == "0":
         raise HTTPException(status_code=400, detail="Empty audio file")
+    if length and length.isdigit() and int(length) > get_settings().STT_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Audio file too large")
 
-    mime = audio.content_type or "audio/webm"
+    mime = request.headers.get("content-type") or "audio/webm"
+    return await _transcribe_stream(request.stream(), language, mime)
 
-    if language:
-        result = await transcribe_audio(audio_bytes, language=language, mime_type=mime)
-    else:
-        result = await transcribe_audio_auto_detect(audio_bytes, mime_type=mime)
 
-    if result.get("error"):
-        raise HTTPException(status_code=502, detail=result["error"])
+# Bytes per chunk when serving a clip from the disk tier
+AUDIO_CHUNK_BYTES = 64 * 1024
 
-    return {
-        "transcript": result["transcript"],
-        "confidence": result["confidence"],
-        "detected_language": result["language"],
-        "words": result.get("words", []),
+
+def _parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """(start, end) inclusive for a single `bytes=` range; None to send it all.
+
+    Raises HTTPException(416) for a range outside the clip.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_s, _, end_s = header[6:].strip().partition("-")
+    try:
+        if start_s:
+            start = int(start_s)
+            end = min(int(end_s), size - 1) if end_s else size - 1
+        else:
+            start, end = max(size - int(end_s), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _audio_response(request: Request, key: str, audio, content_type: str, filename: str):
+    """Serve cached audio with ETag, If-None-Match and single-range support.
+
+    `audio` is bytes or an mmap from the disk tier (closed once sent).
+    """
+    etag = f'"{key}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=86400",
+        "Content-Disposition": f'inline; filename="{filename}"',
     }
+    is_mmap = not isinstance(audio, bytes)
+    streaming = False
+
+    try:
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+        size = len(audio)
+        byte_range = _parse_range(request.headers.get("range"), size)
+        status = 200
+        start, end = 0, size - 1
+        if byte_range:
+            start, end = byte_range
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+
+        if not is_mmap:
+            return Response(content=audio[start:end + 1], status_code=status, media_type=content_type, headers=headers)
+        streaming = True
+    finally:
+        # The streaming body closes the mmap once sent; every other exit closes it here
+        if is_mmap and not streaming:
+            audio.close()
+
+    def chunks():
+        try:
+            for offset in range(start, end + 1, AUDIO_CHUNK_BYTES):
+                yield audio[offset:min(offset + AUDIO_CHUNK_BYTES, end + 1)]
+        finally:
+            audio.close()
+
+    return StreamingResponse(chunks(), status_code=status, media_type=content_type, headers=headers)
+
+
+async def _cache_as_streamed(key: str, content_type: str, chunks):
+    """Pass chunks through, storing the clip once it has streamed completely."""
+    parts, size, complete = [], 0, False
+    try:
+        async for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size <= get_settings().TTS_CACHE_MAX_ITEM_BYTES:
+                    parts.append(chunk)
+                else:
+                    parts = None
+            yield chunk
+        complete = True
+    finally:
+        if complete and parts:
+            await tts_cache.put(key, b"".join(parts), content_type)
 
 
 @router.post("/speak")
-async def speak(req: SpeakRequest):
+async def speak(req: SpeakRequest, request: Request):
     """Convert text to speech and return audio bytes.
 
     Returns raw audio (audio/mpeg or audio/wav) — 
     the frontend can play it directly via an <audio> element or Web Audio API.
+    With `stream: true` the audio is sent chunk by chunk as it is synthesized,
+    so playback can start before the whole clip exists.
+
+    Clips are cached by content: repeated phrases are served from the TTS
+    cache with an ETag, and the same audio is available (with range
+    requests) from GET /voice/audio/{X-Audio-Key}.
     """
     if not req.text.strip():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
 
+    settings = get_settings()
+    voice_id, output_format = resolve_voice(req.language, req.voice_id, req.output_format)
+    key = cache_key(req.text, req.language, voice_id, output_format)
+    filename = f"speech.{output_format}"
+
+    if settings.TTS_CACHE_ENABLED:
+        cached = await tts_cache.get(key)
+        if cached:
+            response = _audio_response(request, key, cached[0], cached[1], filename)
+            response.headers["X-Audio-Key"] = key
+            return response
+
+    if req.stream:
+        try:
+            content_type, chunks = await stream_speech(
+                text=req.text,
+                language=req.language,
+                voice_id=voice_id,
+                output_format=output_format,
+            )
+        except TTSError as exc:
+            raise HTTPException(status_code=502, detail=str(exc))
+        if settings.TTS_CACHE_ENABLED:
+            chunks = _cache_as_streamed(key, content_type, chunks)
+        return StreamingResponse(
+            chunks,
+            media_type=content_type,
+            headers={"Content-Disposition": f'inline; filename="{filename}"', "X-Audio-Key": key},
+        )
+
     result = await synthesize_speech(
         text=req.text,
         language=req.language,
-        voice_id=req.voice_id,
-        output_format=req.output_format,
+        voice_id=voice_id,
+        output_format=output_format,
     )
 
     if not result["success"]:
         raise HTTPException(status_code=502, detail=result.get("error", "TTS failed"))
 
-    return Response(
-        content=result["audio_bytes"],
-        media_type=result["content_type"],
-        headers={"Content-Disposition": f'inline; filename="speech.{req.output_format}"'},
-    )
+    if settings.TTS_CACHE_ENABLED:
+        await tts_cache.put(key, result["audio_bytes"], result["content_type"])
+    response = _audio_response(request, key, result["audio_bytes"], result["content_type"], filename)
+    response.headers["X-Audio-Key"] = key
+    return response
+
+
+@router.get("/audio/{key}")
+async def get_cached_audio(key: str, request: Request):
+    """Fetch previously synthesized audio by its key (supports Range requests)."""
+    cached = await tts_cache.get(key) if len(key) == 64 and key.isalnum() else None
+    if not cached:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    audio, content_type = cached
+    return _audio_response(request, key, audio, content_type, f"speech.{EXTENSIONS.get(content_type, 'bin')}")
+
+
+@router.get("/messages/{relationship_id}/{name}")
+async def get_message_audio(relationship_id: str, name: str, request: Request, current_user: str = Depends(get_current_user_id)):
+    """Audio of a voice message (the recording or its translation)."""
+    rel_data = await load_relationship(relationship_id)
+    if not rel_data:
+        raise HTTPException(status_code=404, detail="Relationship not found")
+    if current_user not in [rel_data["user_a_id"], rel_data["user_b_id"]]:
+        raise HTTPException(status_code=403, detail="You are not part of this relationship")
+    if "/" in name or name.startswith("."):
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    audio = await voice_storage.load(relationship_id, name)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    response = _audio_response(request, name.rsplit(".", 1)[0], audio, voice_storage.content_type_for(name), name)
+    # Stored audio never changes under the same name
+    response.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    return response
+
+
+@router.get("/cache/metrics")
+async def get_tts_cache_metrics():
+    """Hit rate and size of this instance's TTS cache."""
+    return tts_cache.metrics()
+
+
+@router.get("/transcribe/metrics")
+async def get_audio_metrics():
+    """Bytes received vs. sent to speech-to-text after normalization."""
+    return get_audio_stats()
 
 
 @router.get("/voices")
 async def list_voices():
     """List available TTS voices by language."""
     return {"voices": get_available_voices()}
+
+
+# Close codes
+WS_UNAUTHORIZED = 4401
+WS_UPSTREAM_FAILED = 4502
+
+
+@router.websocket("/ws/transcribe")
+async def transcribe_stream(websocket: WebSocket):
+    """Real-time transcription.
+
+    Authenticate like the chat socket (`?token=` or a first auth frame).
+    Optional query params: `language` (omit to auto-detect), and for raw
+    PCM `encoding` (e.g. linear16) plus `sample_rate`.
+
+    Then send audio as binary frames and {"type": "stop"} when done. The
+    server sends {"type": "ready"}, transcript events
+    ({"type": "transcript", "is_final": ..., "text": ...}) as they arrive,
+    and {"type": "done"} after the final result.
+    """
+    await websocket.accept()
+    user_id = await authenticate_websocket(websocket)
+    if not user_id:
+        await websocket.close(code=WS_UNAUTHORIZED, reason="Authentication required")
+        return
+
+    params = websocket.query_params
+    sample_rate = params.get("sample_rate")
+    try:
+        stt = await open_stt_stream(
+            language=params.get("language"),
+            encoding=params.get("encoding"),
+            sample_rate=int(sample_rate) if sample_rate and sample_rate.isdigit() else None,
+        )
+    except STTError as exc:
+        await websocket.close(code=WS_UPSTREAM_FAILED, reason=str(exc))
+        return
+
+    async def relay_audio():
+        idle = get_settings().STT_STREAM_IDLE_SECONDS
+        try:
+            while True:
+                frame = await asyncio.wait_for(websocket.receive(), idle)
+                if frame["type"] == "websocket.disconnect":
+                    break
+                if frame.get("bytes"):
+                    await stt.send(frame["bytes"])
+                elif frame.get("text"):
+                    with contextlib.suppress(ValueError, AttributeError):
+                        if json.loads(frame["text"]).get("type") == "stop":
+                            break
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            await stt.finish()
+
+    await websocket.send_json({"type": "ready"})
+    sender = asyncio.create_task(relay_audio())
+    try:
+        async for event in stt.events():
+            await websocket.send_json(event)
+        await websocket.send_json({"type": "done"})
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    except STTError as exc:
+        with contextlib.suppress(Exception):
+            await websocket.close(code=WS_UPSTREAM_FAILED, reason=str(exc))
+    finally:
+        sender.cancel()
+        with contextlib.suppress(BaseException):
+            await sender
+        await stt.close()
@@ -0,0 +1,193 @@
+"""Incremental achievement engine.
+
+Subscribes to domain events (services/events.py) and keeps one running
+counter per user and achievement `criteria_type` in
+`user_achievement_counters` (supabase/add_achievement_counters.sql).
+Each event is a single `bump_achievement_counter` RPC that returns the old
+and new value; achievements whose threshold lies between the two are
+unlocked. No history is scanned at event time.
+
+`backfill_achievements()` seeds the counters from existing data and
+unlocks everything already earned, in batches.
+"""
+
+from bisect import bisect_right
+from services.supabase_client import get_supabase
+from services.catalog import get_achievements, get_catalog_version
+from services.events import subscribe
+from services.profile_cache import profile_cache
+
+# criteria_type -> achievements sorted by criteria_value (rebuilt if the catalog changes)
+_thresholds: dict[str, list[dict]] = {}
+_threshold_values: dict[str, list[int]] = {}
+_indexed_version: int | None = None
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def _index() -> tuple[dict[str, list[dict]], dict[str, list[int]]]:
+    global _thresholds, _threshold_values, _indexed_version
+    version = get_catalog_version()
+    if version != _indexed_version:
+        grouped: dict[str, list[dict]] = {}
+        for a in sorted(get_achievements(), key=lambda a: a["criteria_value"]):
+            grouped.setdefault(a["criteria_type"], []).append(a)
+        _thresholds = grouped
+        _threshold_values = {k: [a["criteria_value"] for a in v] for k, v in grouped.items()}
+        _indexed_version = version
+    return _thresholds, _threshold_values
+
+
+def crossed(criteria_type: str, old_value: int, new_value: int) -> list[dict]:
+    """Achievements of `criteria_type` unlocked by moving from old_value to new_value."""
+    thresholds, values = _index()
+    levels = values.get(criteria_type)
+    if not levels or new_value <= old_value:
+        return []
+    return thresholds[criteria_type][bisect_right(levels, old_value):bisect_right(levels, new_value)]
+
+
+def earned(criteria_type: str, value: int) -> list[dict]:
+    """All achievements of `criteria_type` earned at `value`."""
+    return crossed(criteria_type, -1, value)
+
+
+def unlock(user_id: str, achievements: list[dict], notify: bool = True):
+    """Record unlocked achievements (duplicates are ignored) and notify the user."""
+    if not achievements:
+        return
+    db = get_supabase()
+
+    db.table("user_achievements").upsert(
+        [{"user_id": user_id, "achievement_id": a["id"]} for a in achievements],
+        on_conflict="user_id,achievement_id",
+        ignore_duplicates=True
+    ).execute()
+    profile_cache.invalidate(user_id)
+
+    if notify:
+        db.table("notifications").insert([
+            {
+                "user_id": user_id,
+                "type": "achievement_unlocked",
+                "title": f"{a.get('icon_emoji') or '🏅'} Achievement unlocked: {a['name']}",
+                "body": a.get("description"),
+                "data": {"achievement_id": a["id"]}
+            }
+            for a in achievements
+        ]).execute()
+
+
+def bump(user_id: str, criteria_type: str, delta: int = 1, set_max: int | None = None) -> list[dict]:
+    """Advance one user's counter and unlock whatever it crossed.
+
+    Returns the newly unlocked achievements.
+    """
+    if criteria_type not in _index()[0]:
+        return []
+    db = get_supabase()
+
+    result = db.rpc("bump_achievement_counter", {
+        "p_user_id": user_id,
+        "p_criteria_type": criteria_type,
+        "p_delta": delta,
+        "p_set_max": set_max,
+    }).execute()
+    if not result.data:
+        return []
+
+    row = result.data[0]
+    unlocked = crossed(criteria_type, row["old_value"] or 0, row["new_value"] or 0)
+    unlock(user_id, unlocked)
+    return unlocked
+
+
+# ─── Event handlers ──────────────────────────────────────────────────────────
+
+def _on_message_sent(event: dict):
+    bump(event["user_id"], "messages_sent")
+
+
+def _on_contest_completed(event: dict):
+    if event.get("won"):
+        for uid in event.get("user_ids", []):
+            bump(uid, "contests_won")
+
+
+def _on_level_reached(event: dict):
+    for uid in event.get("user_ids", []):
+        bump(uid, "level_reached", set_max=event["level"])
+
+
+def _on_streak_updated(event: dict):
+    for uid in event.get("user_ids", []):
+        bump(uid, "streak_days", set_max=event["streak_days"])
+
+
+def _on_game_completed(event: dict):
+    for uid in event.get("user_ids", []):
+        bump(uid, "games_played")
+
+
+def _on_room_joined(event: dict):
+    bump(event["user_id"], "family_rooms_joined")
+
+
+def _on_potluck_hosted(event: dict):
+    bump(event["user_id"], "potlucks_hosted")
+
+
+def register_achievement_handlers():
+    subscribe("message_sent", _on_message_sent)
+    subscribe("contest_completed", _on_contest_completed)
+    subscribe("level_reached", _on_level_reached)
+    subscribe("streak_updated", _on_streak_updated)
+    subscribe("game_completed", _on_game_completed)
+    subscribe("room_joined", _on_room_joined)
+    subscribe("potluck_hosted", _on_potluck_hosted)
+
+
+# ─── Backfill ────────────────────────────────────────────────────────────────
+
+def backfill_achievements(batch_size: int = BACKFILL_BATCH_SIZE) -> dict:
+    """Seed counters from history and unlock everything already earned.
+
+    Safe to re-run: counters only move up and unlocks are idempotent.
+    No notifications are sent for backfilled achievements.
+    """
+    db = get_supabase()
+    db.rpc("backfill_achievement_counters", {}).execute()
+
+    scanned = 0
+    offset = 0
+    pending: list[dict] = []
+
+    while True:
+        page = db.table("user_achievement_counters") \
+            .select("user_id, criteria_type, value") \
+            .gt("value", 0) \
+            .order("user_id") \
+            .order("criteria_type") \
+            .range(offset, offset + batch_size - 1) \
+            .execute()
+        rows = page.data or []
+        scanned += len(rows)
+
+        for row in rows:
+            pending.extend(
+                {"user_id": row["user_id"], "achievement_id": a["id"]}
+                for a in earned(row["criteria_type"], row["value"])
+            )
+
+        if pending:
+            db.table("user_achievements").upsert(
+                pending, on_conflict="user_id,achievement_id", ignore_duplicates=True
+            ).execute()
+
+        if len(rows) < batch_size:
+            break
+        offset += batch_size
+        pending = []
+
+    print(f"[Achievements] Backfill scanned {scanned} counters")
+    return {"counters_scanned": scanned}
@@ -0,0 +1,165 @@
+"""Streak and inactivity tracker.
+
+Message activity is recorded per relationship per UTC day in
+`relationship_activity_days` by a trigger on message insert
+(supabase/add_activity_index.sql), which also advances
+`relationships.streak_days`. This module runs the periodic sweep:
+
+  - resets streaks that were broken (no two-way day since yesterday),
+  - auto-pauses relationships with no message for INACTIVITY_PAUSE_DAYS
+    (unless a partner has set an away/break status) and notifies both
+    partners,
+  - publishes `streak_updated` once for each relationship that reaches a
+    streak achievement threshold (claimed through
+    `relationships.streak_milestone_day`, so repeated sweeps and other
+    instances don't publish it again).
+
+The sweep interval must be shorter than a day so every threshold day is seen.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from config import get_settings
+from services.supabase_client import get_supabase
+from services.catalog import get_achievements
+from services.events import publish
+
+_sweeper_task: asyncio.Task | None = None
+
+
+def pause_inactive(days: int, batch_size: int) -> list[dict]:
+    """Pause every relationship idle for `days`, one bulk RPC per batch."""
+    db = get_supabase()
+    cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
+
+    paused = []
+    while True:
+        result = db.rpc("pause_inactive_relationships", {
+            "p_cutoff": cutoff,
+            "p_limit": batch_size,
+        }).execute()
+        batch = result.data or []
+        paused.extend(batch)
+        if len(batch) < batch_size:
+            return paused
+
+
+def _notify_paused(rels: list[dict], days: int):
+    db = get_supabase()
+    rows = [
+        {
+            "user_id": uid,
+            "type": "relationship_paused",
+            "title": "⏸️ Your bond has been paused",
+            "body": f"No messages for {days} days, so we paused this relationship. Tap Resume to pick it back up!",
+            "data": {"relationship_id": rel["id"], "action": "resume"}
+        }
+        for rel in rels
+        for uid in (rel["user_a_id"], rel["user_b_id"])
+    ]
+    for i in range(0, len(rows), 500):
+        db.table("notifications").insert(rows[i:i + 500]).execute()
+
+
+def find_streak_milestones() -> list[dict]:
+    """Relationships that reached a streak achievement threshold and haven't
+    had it announced yet; each returned milestone is marked as announced."""
+    thresholds = sorted({
+        a["criteria_value"] for a in get_achievements() if a["criteria_type"] == "streak_days"
+    })
+    if not thresholds:
+        return []
+
+    db = get_supabase()
+    yesterday = (datetime.utcnow().date() - timedelta(days=1)).isoformat()
+    rels = db.table("relationships") \
+        .select("id, user_a_id, user_b_id, streak_days, last_streak_day, streak_milestone_day") \
+        .gte("last_streak_day", yesterday) \
+        .in_("streak_days", thresholds) \
+        .execute()
+
+    milestones = []
+    for rel in rels.data or []:
+        day = rel["last_streak_day"]
+        if rel.get("streak_milestone_day") == day:
+            continue
+        # Conditional claim: only one sweep (on any instance) wins it
+        claimed = db.table("relationships") \
+            .update({"streak_milestone_day": day}) \
+            .eq("id", rel["id"]) \
+            .or_(f"streak_milestone_day.is.null,streak_milestone_day.lt.{day}") \
+            .execute()
+        if claimed.data:
+            milestones.append(rel)
+    return milestones
+
+
+def resume_relationship(relationship_id: str) -> dict | None:
+    """Reactivate a paused relationship. Returns the updated row, if any."""
+    db = get_supabase()
+    result = db.table("relationships") \
+        .update({"status": "active", "last_interaction_at": datetime.utcnow().isoformat()}) \
+        .eq("id", relationship_id) \
+        .eq("status", "paused") \
+        .execute()
+    return result.data[0] if result.data else None
+
+
+async def run_sweep_once() -> dict:
+    settings = get_settings()
+    days = settings.INACTIVITY_PAUSE_DAYS
+
+    db = get_supabase()
+    reset = await asyncio.to_thread(lambda: db.rpc("reset_broken_streaks", {}).execute().data)
+
+    paused = await asyncio.to_thread(pause_inactive, days, settings.ACTIVITY_SWEEP_BATCH_SIZE)
+    if paused:
+        try:
+            await asyncio.to_thread(_notify_paused, paused, days)
+        except Exception as exc:
+            print(f"[ActivityTracker] Notify failed: {exc}")
+        print(f"[ActivityTracker] Paused {len(paused)} inactive relationships")
+
+    milestones = await asyncio.to_thread(find_streak_milestones)
+    for rel in milestones:
+        publish(
+            "streak_updated",
+            relationship_id=rel["id"],
+            user_ids=[rel["user_a_id"], rel["user_b_id"]],
+            streak_days=rel["streak_days"]
+        )
+
+    return {"streaks_reset": reset or 0, "paused": len(paused), "streak_milestones": len(milestones)}
+
+
+async def _sweeper_loop():
+    interval = max(1, get_settings().ACTIVITY_SWEEP_INTERVAL_MINUTES) * 60
+    while True:
+        try:
+            await run_sweep_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            print(f"[ActivityTracker] Sweep failed: {exc}")
+        await asyncio.sleep(interval)
+
+
+def start_activity_sweeper():
+    """Start the sweeper loop on the running event loop (idempotent)."""
+    global _sweeper_task
+    if not get_settings().ACTIVITY_SWEEP_ENABLED:
+        return
+    if _sweeper_task is None or _sweeper_task.done():
+        _sweeper_task = asyncio.create_task(_sweeper_loop())
+
+
+async def stop_activity_sweeper():
+    """Cancel the sweeper loop and wait for it to exit."""
+    global _sweeper_task
+    if _sweeper_task is not None:
+        _sweeper_task.cancel()
+        try:
+            await _sweeper_task
+        except asyncio.CancelledError:
+            pass
+        _sweeper_task = None
@@ -0,0 +1,195 @@
+"""Contest answer scoring.
+
+Answers are normalized once — Unicode folding, accent stripping, simple
+transliteration of special Latin letters, punctuation and removal of the
+answer language's stopwords — and then compared word by word, forgiving
+typos and plural "s". Partial credit needs one answer's words all to be
+in the other ("potter" for "harry potter"); a different word on both sides
+("harry styles") is a different answer.
+Correct answers are normalized when the question is created and stored in
+`contest_questions.correct_answer_normalized`, so scoring a submission only
+has to normalize the user's answer.
+"""
+
+import re
+import unicodedata
+
+# Points are awarded in full above FULL_MATCH and halved above PARTIAL_MATCH
+FULL_MATCH = 0.85
+PARTIAL_MATCH = 0.5
+
+# Whole-answer edit similarity below this is coincidence, not a typo
+TYPO_MATCH = 0.8
+
+# Longer strings are truncated before edit-distance comparison
+MAX_COMPARE_CHARS = 120
+
+# ─── Stopwords (articles, fillers) per answer language ─────────────────────────
+# Only the answer's own language is applied: "los" is an article in Spanish
+# but part of "Los Angeles" in English, as is "die" in "Die Hard".
+STOPWORDS = {
+    "en": {
+        "a", "an", "the", "my", "his", "her", "their", "its", "is", "are", "was",
+        "of", "to", "and", "or", "in", "on", "at", "for", "with", "i", "think",
+        "probably", "maybe", "really", "like", "likes", "love", "loves", "favorite",
+    },
+    "es": {
+        "el", "la", "los", "las", "un", "una", "unos", "unas", "de", "del", "y",
+        "o", "mi", "su", "es", "creo", "que",
+    },
+    "pt": {
+        "o", "a", "os", "as", "um", "uma", "de", "do", "da", "dos", "das", "e",
+        "meu", "minha", "seu", "sua", "acho", "que",
+    },
+    "fr": {
+        "le", "la", "les", "l", "un", "une", "des", "de", "du", "d", "et", "mon",
+        "ma", "son", "sa", "je", "pense", "que",
+    },
+    "de": {
+        "der", "die", "das", "den", "dem", "ein", "eine", "einen", "und", "mein",
+        "meine", "sein", "seine", "ihr", "ihre", "ich", "glaube",
+    },
+    "it": {
+        "il", "lo", "la", "i", "gli", "le", "l", "un", "uno", "una", "di", "del",
+        "della", "e", "mio", "mia", "suo", "sua", "penso",
+    },
+}
+
+# Letters that NFKD does not decompose into ASCII
+TRANSLITERATIONS = str.maketrans({
+    "ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "ł": "l", "đ": "d",
+    "ð": "d", "þ": "th", "ı": "i", "ŀ": "l",
+})
+
+_TOKEN_SPLIT = re.compile(r"\s+")
+
+
+def normalize_answer(text: str | None, language: str = "en") -> str:
+    """Normalize an answer written in `language` for comparison.
+
+    "  The Feijoada!! " → "feijoada", "Crème brûlée" → "creme brulee".
+    Non-Latin scripts are kept as-is (after NFKC folding and casefolding).
+    """
+    if not text:
+        return ""
+
+    text = unicodedata.normalize("NFKC", text).casefold().translate(TRANSLITERATIONS)
+
+    chars = []
+    latin_base = False
+    for ch in unicodedata.normalize("NFKD", text):
+        cat = unicodedata.category(ch)
+        if cat == "Mn":
+            # Drop accents on Latin letters only; in scripts like Devanagari
+            # combining marks are part of the spelling
+            if not latin_base:
+                chars.append(ch)
+            continue
+        if cat[0] in ("P", "S", "Z", "C"):
+            chars.append(" ")
+            latin_base = False
+        else:
+            chars.append(ch)
+            latin_base = ord(ch) < 0x0250 or 0x1E00 <= ord(ch) <= 0x1EFF
+    # Re-compose scripts such as Devanagari/Hangul that rely on combining marks
+    text = unicodedata.normalize("NFC", "".join(chars))
+
+    tokens = [t for t in _TOKEN_SPLIT.split(text) if t]
+    stopwords = STOPWORDS.get(language, ())
+    content = [t for t in tokens if t not in stopwords]
+    return " ".join(content or tokens)
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance with a two-row table."""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def _edit_ratio(a: str, b: str, floor: float = 0.0) -> float:
+    """1 - normalized edit distance; returns 0.0 early if it cannot beat `floor`."""
+    a, b = a[:MAX_COMPARE_CHARS], b[:MAX_COMPARE_CHARS]
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    # The length difference alone bounds the best possible ratio
+    if min(len(a), len(b)) / longest <= floor:
+        return 0.0
+    return 1.0 - _edit_distance(a, b) / longest
+
+
+def _stem(token: str) -> str:
+    """Drop a plural "s" ("cats" → "cat"), but not from "glass" or "bus"."""
+    if len(token) > 3 and token.endswith("s") and token[-2] not in "siu":
+        return token[:-1]
+    return token
+
+
+def _token_match(token: str, others: list[str]) -> bool:
+    # Allow one typo per ~5 characters on individual words
+    stem = _stem(token)
+    return any(
+        token == other or stem == _stem(other) or (len(token) > 3 and _edit_ratio(token, other, 0.79) >= 0.8)
+        for other in others
+    )
+
+
+def answer_similarity(expected: str, given: str) -> float:
+    """Similarity in [0, 1] between two *normalized* answers."""
+    if not expected or not given:
+        return 0.0
+    if expected == given:
+        return 1.0
+
+    expected_tokens = expected.split()
+    given_tokens = given.split()
+
+    matched = sum(1 for t in expected_tokens if _token_match(t, given_tokens))
+    matched_back = sum(1 for t in given_tokens if _token_match(t, expected_tokens))
+    if matched == len(expected_tokens) or matched_back == len(given_tokens):
+        # Dice coefficient over fuzzily-matched tokens; one answer contains
+        # the other, so it's worth at least partial credit
+        token_score = max(PARTIAL_MATCH, (matched + matched_back) / (len(expected_tokens) + len(given_tokens)))
+    else:
+        # Words differ on both sides: a different answer that shares a word
+        token_score = 0.0
+
+    if token_score >= FULL_MATCH:
+        return token_score
+    # Typos across word boundaries ("icecream" for "ice cream")
+    edit = _edit_ratio(expected, given, max(token_score, TYPO_MATCH))
+    return max(token_score, edit if edit >= TYPO_MATCH else 0.0)
+
+
+def score_answer(expected_normalized: str, answer: str, points: int, language: str | None = None) -> int:
+    """Points earned for `answer` against a pre-normalized correct answer.
+
+    The answer is normalized both as English (the language facts are
+    extracted in) and as the answering user's `language`; the better match
+    counts.
+    """
+    similarity = max(
+        answer_similarity(expected_normalized, normalize_answer(answer, lang))
+        for lang in {"en", language or "en"}
+    )
+    if similarity >= FULL_MATCH:
+        return points
+    if similarity >= PARTIAL_MATCH:
+        return points // 2
+    return 0
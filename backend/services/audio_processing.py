@@ -0,0 +1,273 @@
+"""Audio normalization before speech-to-text.
+
+Browsers and apps often upload WAV at 44.1/48 kHz stereo, several times
+more data than speech recognition needs. `normalize_for_stt()` shrinks
+uploads on the way to Deepgram, as a stream:
+
+- 16-bit PCM WAV is downmixed to mono and resampled to
+  AUDIO_TARGET_SAMPLE_RATE (16 kHz) in pure Python. Samples are box-filtered
+  over the resampling step and picked with exact integer positions, so the
+  output length (and its WAV header) is known from the input header and
+  chunks can be converted as they arrive. Slicing and `map` keep the per-
+  sample work in C.
+- With AUDIO_FFMPEG_ENABLED and an `ffmpeg` binary on PATH, any other
+  container (webm, m4a, mp3...) is transcoded to 16 kHz mono Opus in Ogg.
+- Anything else is passed through unchanged.
+"""
+
+import asyncio
+import contextlib
+import operator
+import shutil
+import struct
+from array import array
+from functools import reduce
+from itertools import repeat
+from typing import AsyncIterator
+from config import get_settings
+
+# Mime types that are already compact speech codecs
+COMPACT_TYPES = ("audio/ogg", "audio/opus", "audio/webm;codecs=opus")
+
+# Silence appended when a WAV upload ends before its declared length, at
+# most this much and in chunks of PAD_CHUNK_BYTES; a larger shortfall means
+# the header's size was a placeholder, and the stream just ends short
+MAX_PAD_SECONDS = 1
+PAD_CHUNK_BYTES = 64 * 1024
+
+_stats = {"bytes_in": 0, "bytes_out": 0, "wav_resampled": 0, "ffmpeg": 0, "passthrough": 0}
+
+
+class WavFormat:
+    def __init__(self, channels: int, sample_rate: int, bits: int, data_size: int, header_size: int):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.bits = bits
+        self.data_size = data_size
+        self.header_size = header_size
+
+    @property
+    def frames(self) -> int:
+        return self.data_size // (self.channels * self.bits // 8)
+
+
+def parse_wav_header(data: bytes) -> WavFormat | None:
+    """Format of a RIFF/WAVE file from its first bytes (None if not PCM WAV
+    or the header isn't complete yet)."""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    offset, fmt = 12, None
+    while offset + 8 <= len(data):
+        chunk_id, size = data[offset:offset + 4], struct.unpack_from("<I", data, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            if body + 16 > len(data):
+                return None
+            tag, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            # 0xFFFE (extensible) carries PCM for multichannel files
+            if tag not in (1, 0xFFFE):
+                return None
+            fmt = (channels, rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None or size in (0, 0xFFFFFFFF):
+                return None
+            return WavFormat(*fmt, data_size=size, header_size=body)
+        offset = body + size + (size & 1)
+    return None
+
+
+def wav_header(channels: int, sample_rate: int, bits: int, frames: int) -> bytes:
+    block = channels * bits // 8
+    data_size = frames * block
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * block, block, bits,
+        b"data", data_size,
+    )
+
+
+class PCMResampler:
+    """Streaming int16 downmix + resample with exact output positions.
+
+    Output sample k averages input frames [k*in/out, k*in/out + width) over
+    all channels, where width is the (integer) resampling step — a box
+    filter that suppresses most aliasing for speech.
+    """
+
+    def __init__(self, channels: int, in_rate: int, out_rate: int):
+        self.channels = channels
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.width = max(1, in_rate // out_rate)
+        self._mono = array("i")   # channel sums, not yet divided
+        self._base = 0            # input frame index of self._mono[0]
+        self._next = 0            # next output sample index
+        self._pending = b""       # bytes of an incomplete frame
+
+    def output_frames(self, input_frames: int) -> int:
+        if input_frames < self.width:
+            return 0
+        return ((input_frames - self.width + 1) * self.out_rate - 1) // self.in_rate + 1
+
+    def _downmix(self, samples: array) -> array:
+        if self.channels == 1:
+            return array("i", samples)
+        if self.channels == 2:
+            return array("i", map(operator.add, samples[0::2], samples[1::2]))
+        return array("i", map(sum, zip(*(samples[c::self.channels] for c in range(self.channels)))))
+
+    def feed(self, data: bytes) -> bytes:
+        data = self._pending + data
+        usable = len(data) - len(data) % (2 * self.channels)
+        self._pending = data[usable:]
+        samples = array("h")
+        samples.frombytes(data[:usable])
+        self._mono.extend(self._downmix(samples))
+        return self._emit()
+
+    def _emit(self) -> bytes:
+        buf, base, width = self._mono, self._base, self.width
+        end = base + len(buf)
+        last = self.output_frames(end) if end >= width else 0
+        if last <= self._next:
+            return b""
+
+        # Box filter: sums over `width` consecutive frames
+        n = len(buf) - width + 1
+        filtered = buf[:n] if width == 1 else reduce(
+            lambda acc, i: array("i", map(operator.add, acc, buf[i:i + n])),
+            range(1, width), buf[:n],
+        )
+        divisor = width * self.channels
+        positions = (k * self.in_rate // self.out_rate - base for k in range(self._next, last))
+        out = array("h", map(operator.floordiv, map(filtered.__getitem__, positions), repeat(divisor)))
+
+        self._next = last
+        # The next output may start past the frames received so far
+        consumed = min(self._next * self.in_rate // self.out_rate - base, len(buf))
+        del self._mono[:consumed]
+        self._base += consumed
+        return out.tobytes()
+
+
+async def _wav_stream(fmt: WavFormat, head: bytes, chunks: AsyncIterator[bytes], out_rate: int) -> AsyncIterator[bytes]:
+    resampler = PCMResampler(fmt.channels, fmt.sample_rate, out_rate)
+    total = resampler.output_frames(fmt.frames)
+    remaining = fmt.data_size
+    sent = 0
+
+    header = wav_header(1, out_rate, 16, total)
+    _stats["bytes_out"] += len(header)
+    yield header
+
+    async def body():
+        yield head[fmt.header_size:]
+        async for chunk in chunks:
+            yield chunk
+
+    async for chunk in body():
+        # Ignore trailing chunks after the data chunk (LIST, id3...)
+        chunk = chunk[:remaining]
+        remaining -= len(chunk)
+        if chunk:
+            out = resampler.feed(chunk)
+            sent += len(out)
+            _stats["bytes_out"] += len(out)
+            if out:
+                yield out
+        if remaining <= 0:
+            break
+    # Keep the header honest if the upload ended a little early
+    shortfall = total * 2 - sent
+    if 0 < shortfall <= MAX_PAD_SECONDS * out_rate * 2:
+        _stats["bytes_out"] += shortfall
+        for offset in range(0, shortfall, PAD_CHUNK_BYTES):
+            yield bytes(min(PAD_CHUNK_BYTES, shortfall - offset))
+
+
+async def _ffmpeg_stream(head: bytes, chunks: AsyncIterator[bytes], out_rate: int) -> AsyncIterator[bytes]:
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+        "-ac", "1", "-ar", str(out_rate), "-c:a", "libopus", "-b:a", "24k",
+        "-application", "voip", "-f", "ogg", "pipe:1",
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+    )
+
+    async def feed():
+        try:
+            proc.stdin.write(head)
+            await proc.stdin.drain()
+            async for chunk in chunks:
+                proc.stdin.write(chunk)
+                await proc.stdin.drain()
+        finally:
+            with contextlib.suppress(Exception):
+                proc.stdin.close()
+
+    writer = asyncio.create_task(feed())
+    try:
+        while out := await proc.stdout.read(64 * 1024):
+            _stats["bytes_out"] += len(out)
+            yield out
+        await writer
+    finally:
+        writer.cancel()
+        if proc.returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                proc.kill()
+        await proc.wait()
+
+
+async def _counted(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        _stats["bytes_in"] += len(chunk)
+        yield chunk
+
+
+def ffmpeg_available() -> bool:
+    return get_settings().AUDIO_FFMPEG_ENABLED and shutil.which("ffmpeg") is not None
+
+
+async def normalize_for_stt(chunks: AsyncIterator[bytes], mime: str) -> tuple[AsyncIterator[bytes], str]:
+    """(chunks, mime) to send to speech-to-text in place of the upload."""
+    settings = get_settings()
+    chunks = _counted(chunks)
+    if not settings.AUDIO_NORMALIZE_ENABLED:
+        return chunks, mime
+
+    # Read enough of the upload to see the WAV header (it can be preceded
+    # by LIST/bext chunks)
+    head = b""
+    async for chunk in chunks:
+        head += chunk
+        if len(head) >= 4096 or parse_wav_header(head):
+            break
+
+    async def passthrough():
+        _stats["bytes_out"] += len(head)
+        yield head
+        async for chunk in chunks:
+            _stats["bytes_out"] += len(chunk)
+            yield chunk
+
+    out_rate = settings.AUDIO_TARGET_SAMPLE_RATE
+    fmt = parse_wav_header(head)
+    # A declared size past the upload limit is a placeholder (streaming
+    # recorders write 0x7FFFFFFF); the output header can't be sized from it,
+    # so the upload goes to ffmpeg (which reads to the end) or through as is
+    if fmt and fmt.data_size > settings.STT_MAX_UPLOAD_BYTES:
+        fmt = None
+    elif fmt and fmt.bits == 16 and (fmt.channels > 1 or fmt.sample_rate > out_rate):
+        _stats["wav_resampled"] += 1
+        return _wav_stream(fmt, head, chunks, out_rate), "audio/wav"
+    if not fmt and head and mime.split(";")[0] not in COMPACT_TYPES and ffmpeg_available():
+        _stats["ffmpeg"] += 1
+        return _ffmpeg_stream(head, chunks, out_rate), "audio/ogg"
+    _stats["passthrough"] += 1
+    return passthrough(), mime
+
+
+def get_audio_stats() -> dict:
+    saved = _stats["bytes_in"] - _stats["bytes_out"]
+    return {**_stats, "bytes_saved": saved}
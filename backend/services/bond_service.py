@@ -0,0 +1,148 @@
+"""Bond point awards.
+
+All changes to `relationships.bond_points` / `care_score` go through the
+`award_bond_points` RPC (supabase/add_award_bond_points.sql), which applies
+the deltas atomically in the database, lets the `check_level_up` trigger
+run and records a row in `bond_point_ledger`. An award that raises the
+relationship's level publishes a `level_reached` event with the new level;
+the RPC returns the level from before the award as `previous_level`.
+
+An award with a `reference_id` is applied once per (reason, reference_id),
+enforced by a unique index on the ledger: repeating it (a retried contest
+completion or game finish) changes nothing and returns the row with
+`already_awarded` set.
+
+Where the RPC isn't installed yet, awards fall back to a compare-and-set
+update from Python (retried when a concurrent award wins), claiming the
+ledger row first; any other failure is raised to the caller rather than
+dropping the points.
+"""
+
+from services.supabase_client import get_supabase, rpc_missing, unique_violation
+from services.events import publish
+
+# Compare-and-set attempts before a contended fallback award gives up
+MAX_DIRECT_ATTEMPTS = 8
+
+COUNTER_FIELDS = ("bond_points", "care_score", "contests_completed", "contests_won")
+
+
+class BondAwardError(Exception):
+    """Points could not be applied to the relationship."""
+
+
+def _award_directly(
+    relationship_id: str,
+    delta: int,
+    care_delta: int,
+    reason: str | None,
+    reference_id: str | None,
+    contests_completed: int,
+    contests_won: int,
+) -> dict | None:
+    """The RPC's update without the RPC: claim the ledger row, read the
+    counters, then write them back only if nobody else changed them in
+    between."""
+    db = get_supabase()
+
+    ledger_id = None
+    try:
+        entry = db.table("bond_point_ledger").insert({
+            "relationship_id": relationship_id,
+            "bond_delta": delta,
+            "care_delta": care_delta,
+            "reason": reason,
+            "reference_id": reference_id,
+        }).execute()
+        ledger_id = entry.data[0]["id"] if entry.data else None
+    except Exception as exc:
+        if reference_id and unique_violation(exc):
+            current = db.table("relationships").select("*").eq("id", relationship_id).execute()
+            if not current.data:
+                return None
+            row = current.data[0]
+            return {**row, "previous_level": row.get("level") or 1, "already_awarded": True}
+        print(f"[Bond] Ledger entry failed for {relationship_id}: {exc}")
+
+    for _ in range(MAX_DIRECT_ATTEMPTS):
+        current = db.table("relationships") \
+            .select(", ".join(COUNTER_FIELDS + ("level",))) \
+            .eq("id", relationship_id) \
+            .execute()
+        if not current.data:
+            return None
+        seen = {field: current.data[0].get(field) or 0 for field in COUNTER_FIELDS}
+
+        updated = db.table("relationships").update({
+            "bond_points": seen["bond_points"] + delta,
+            "care_score": min(100, max(0, seen["care_score"] + care_delta)),
+            "contests_completed": seen["contests_completed"] + contests_completed,
+            "contests_won": seen["contests_won"] + contests_won,
+        }).match({"id": relationship_id, **seen}).execute()
+        if not updated.data:
+            continue
+
+        # The match on the counters pins the level we read as the one replaced
+        row = {**updated.data[0], "previous_level": current.data[0].get("level") or 1, "already_awarded": False}
+        if ledger_id:
+            try:
+                db.table("bond_point_ledger").update({
+                    "bond_points_after": row.get("bond_points"),
+                    "level_before": row["previous_level"],
+                    "level_after": row.get("level"),
+                }).eq("id", ledger_id).execute()
+            except Exception as exc:
+                print(f"[Bond] Ledger entry failed for {relationship_id}: {exc}")
+        return row
+
+    # Release the claim so a retry can apply the award
+    if ledger_id:
+        db.table("bond_point_ledger").delete().eq("id", ledger_id).execute()
+    raise BondAwardError(f"Too many concurrent awards for {relationship_id}")
+
+
+async def award_bond_points(
+    relationship_id: str,
+    delta: int,
+    care_delta: int = 0,
+    reason: str | None = None,
+    reference_id: str | None = None,
+    contests_completed: int = 0,
+    contests_won: int = 0,
+) -> dict | None:
+    """Atomically add bond/care points to a relationship.
+
+    Returns the updated relationship row (including any new `level`,
+    `previous_level` from before the award and `already_awarded`), or None
+    if the relationship does not exist. Raises if the award failed.
+    """
+    db = get_supabase()
+
+    try:
+        result = db.rpc("award_bond_points", {
+            "p_relationship_id": relationship_id,
+            "p_delta": delta,
+            "p_care_delta": care_delta,
+            "p_reason": reason,
+            "p_reference_id": reference_id,
+            "p_contests_completed": contests_completed,
+            "p_contests_won": contests_won,
+        }).execute()
+        row = result.data or None
+    except Exception as exc:
+        if not rpc_missing(exc):
+            print(f"[Bond] award_bond_points failed for {relationship_id}: {exc}")
+            raise
+        print(f"[Bond] award_bond_points RPC missing, updating directly: {exc}")
+        row = _award_directly(
+            relationship_id, delta, care_delta, reason, reference_id, contests_completed, contests_won,
+        )
+
+    if row and (row.get("level") or 1) > (row.get("previous_level") or 1):
+        publish(
+            "level_reached",
+            relationship_id=relationship_id,
+            user_ids=[row["user_a_id"], row["user_b_id"]],
+            level=row["level"]
+        )
+    return row
@@ -3,11 +3,20 @@
 Uses Cartesia's Sonic model for natural, expressive speech synthesis.
 Supports multiple languages and voices — ideal for reading translated
 messages aloud in Familia chat.
+`stream_speech` relays audio chunk by chunk as Cartesia produces it.
+Requests go through the cartesia vendor (services/vendor_client.py) for
+its circuit breaker and limits. Whole-clip synthesis takes longer for
+longer text, so it keeps a static timeout and isn't hedged; streaming only
+waits for the response headers, under the adaptive timeout.
 Docs: https://docs.cartesia.ai
 """
 
+import asyncio
+import contextlib
+from typing import AsyncIterator
 import httpx
 from config import get_settings
+from services.vendor_client import cartesia, VendorError, VendorUnavailable
 
 CARTESIA_TTS_URL = "https://api.cartesia.ai/tts/bytes"
 
@@ -26,6 +35,51 @@ DEFAULT_VOICES = {
 }
 
 
+# Map output format to Cartesia's encoding parameter
+ENCODINGS = {
+    "mp3": {"container": "mp3", "encoding": "mp3", "content_type": "audio/mpeg"},
+    "wav": {"container": "wav", "encoding": "pcm_s16le", "content_type": "audio/wav"},
+}
+
+
+class TTSError(Exception):
+    """Cartesia rejected or failed a synthesis request."""
+
+
+def resolve_voice(language: str, voice_id: str | None, output_format: str) -> tuple[str, str]:
+    """The (voice_id, output_format) a request will actually be synthesized with."""
+    voice = voice_id or DEFAULT_VOICES.get(language, DEFAULT_VOICES["en"])
+    return voice, output_format if output_format in ENCODINGS else "mp3"
+
+
+def _build_request(text: str, language: str, voice_id: str | None, output_format: str, api_key: str) -> tuple[dict, dict, dict]:
+    """Headers, JSON body and format info for a /tts/bytes call."""
+    selected_voice, output_format = resolve_voice(language, voice_id, output_format)
+    fmt = ENCODINGS[output_format]
+    headers = {
+        "X-API-Key": api_key,
+        "Cartesia-Version": "2024-06-10",
+        "Content-Type": "application/json",
+    }
+    body = {
+        "model_id": "sonic-2",
+        "transcript": text,
+        "voice": {
+            "mode": "id",
+            "id": selected_voice,
+        },
+        "language": language,
+        "output_format": {
+            "container": fmt["container"],
+            "encoding": fmt["encoding"],
+            "sample_rate": get_settings().TTS_SAMPLE_RATE,
+        },
+    }
+    if fmt["container"] == "mp3":
+        body["output_format"]["bit_rate"] = get_settings().TTS_MP3_BIT_RATE
+    return headers, body, fmt
+
+
 async def synthesize_speech(
     text: str,
     language: str = "en",
@@ -58,51 +112,38 @@ async def synthesize_speech(
             "error": "Cartesia API key not configured",
         }
 
-    selected_voice = voice_id or DEFAULT_VOICES.get(language, DEFAULT_VOICES["en"])
+    headers, body, fmt = _build_request(text, language, voice_id, output_format, api_key)
 
-    # Map output format to Cartesia's encoding parameter
-    encoding_map = {
-        "mp3": {"container": "mp3", "encoding": "mp3", "content_type": "audio/mpeg"},
-        "wav": {"container": "wav", "encoding": "pcm_s16le", "content_type": "audio/wav"},
-    }
-    fmt = encoding_map.get(output_format, encoding_map["mp3"])
-
-    try:
+    async def attempt(timeout: float) -> bytes | None:
         async with httpx.AsyncClient() as client:
             resp = await client.post(
                 CARTESIA_TTS_URL,
-                headers={
-                    "X-API-Key": api_key,
-                    "Cartesia-Version": "2024-06-10",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model_id": "sonic-2",
-                    "transcript": text,
-                    "voice": {
-                        "mode": "id",
-                        "id": selected_voice,
-                    },
-                    "language": language,
-                    "output_format": {
-                        "container": fmt["container"],
-                        "encoding": fmt["encoding"],
-                        "sample_rate": 24000,
-                    },
-                },
-                timeout=30,
+                headers=headers,
+                json=body,
+                timeout=timeout,
             )
 
             if resp.status_code == 200:
-                return {
-                    "audio_bytes": resp.content,
-                    "content_type": fmt["content_type"],
-                    "language": language,
-                    "success": True,
-                }
+                return resp.content
 
             print(f"[Cartesia TTS] {resp.status_code}: {resp.text[:200]}")
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise VendorError(f"HTTP {resp.status_code}")
+            return None
 
+    try:
+        # Synthesis time grows with the text and a duplicate request is
+        # billed again, so keep the static timeout and don't hedge
+        audio = await cartesia.call(attempt, timeout=30, adaptive=False)
+        if audio is not None:
+            return {
+                "audio_bytes": audio,
+                "content_type": fmt["content_type"],
+                "language": language,
+                "success": True,
+            }
+    except VendorUnavailable:
+        pass
     except Exception as exc:
         print(f"[Cartesia TTS] Exception: {exc}")
 
@@ -115,6 +156,100 @@ async def synthesize_speech(
     }
 
 
+async def _buffered(source: AsyncIterator[bytes], max_chunks: int) -> AsyncIterator[bytes]:
+    """Read `source` ahead of the consumer, holding at most `max_chunks` chunks.
+
+    Smooths vendor jitter without letting a slow client make us buffer the
+    whole clip: once the queue is full the reader waits, so Cartesia is only
+    read as fast as the client drains it.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_chunks)
+    done = object()
+
+    async def pump():
+        try:
+            async for chunk in source:
+                await queue.put(chunk)
+            await queue.put(done)
+        except Exception as exc:
+            await queue.put(exc)
+
+    reader = asyncio.create_task(pump())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        reader.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await reader
+
+
+async def stream_speech(
+    text: str,
+    language: str = "en",
+    voice_id: str | None = None,
+    output_format: str = "mp3",
+) -> tuple[str, AsyncIterator[bytes]]:
+    """Start synthesis and return (content_type, audio chunks) as they arrive.
+
+    Returns once Cartesia has accepted the request, so callers can still
+    report errors before sending anything; raises TTSError otherwise. The
+    iterator closes the upstream connection when it finishes or is closed.
+    """
+    settings = get_settings()
+    if not settings.CARTESIA_API_KEY:
+        raise TTSError("Cartesia API key not configured")
+
+    headers, body, fmt = _build_request(text, language, voice_id, output_format, settings.CARTESIA_API_KEY)
+    client = httpx.AsyncClient(timeout=httpx.Timeout(30, read=settings.TTS_STREAM_READ_TIMEOUT_SECONDS))
+
+    async def attempt(timeout: float) -> httpx.Response:
+        # Only the wait for response headers counts against the vendor
+        resp = await client.send(
+            client.build_request("POST", CARTESIA_TTS_URL, headers=headers, json=body),
+            stream=True,
+        )
+        if resp.status_code != 200:
+            detail = (await resp.aread())[:200]
+            await resp.aclose()
+            print(f"[Cartesia TTS] {resp.status_code}: {detail!r}")
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise VendorError(f"HTTP {resp.status_code}")
+        return resp
+
+    try:
+        resp = await cartesia.call(attempt, timeout=30)
+    except VendorUnavailable as exc:
+        await client.aclose()
+        raise TTSError(str(exc))
+    except Exception as exc:
+        await client.aclose()
+        print(f"[Cartesia TTS] Stream exception: {exc}")
+        raise TTSError("Speech synthesis failed")
+
+    if resp.status_code != 200:
+        await client.aclose()
+        raise TTSError("Speech synthesis failed")
+
+    async def chunks():
+        try:
+            async for chunk in _buffered(
+                resp.aiter_bytes(settings.TTS_STREAM_CHUNK_BYTES),
+                settings.TTS_STREAM_BUFFER_CHUNKS,
+            ):
+                yield chunk
+        finally:
+            await resp.aclose()
+            await client.aclose()
+
+    return fmt["content_type"], chunks()
+
+
 def get_available_voices() -> list[dict]:
     """Return the list of curated Familia voices by language."""
     return [
@@ -0,0 +1,169 @@
+"""Static catalog cache — games, achievements, roles and languages.
+
+The games and achievements tables are seed data (supabase/schema.sql) that
+almost never change, so they are loaded once at startup and served from
+memory. `refresh_catalog()` reloads them on demand. Catalog endpoints send
+an ETag and Cache-Control header and answer matching If-None-Match
+requests with 304.
+"""
+
+import hashlib
+import json
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from services.supabase_client import get_supabase
+
+CATALOG_MAX_AGE_SECONDS = 300
+# Unknown game ids remembered (until the next load) so repeats skip the database
+MAX_MISSING_GAME_IDS = 1000
+
+# ─── Roles ─────────────────────────────────────────────────────────────────────
+VALID_ROLES = ["mother", "father", "son", "daughter", "mentor", "student",
+               "brother", "sister", "friend", "grandparent", "grandchild",
+               "sibling", "penpal"]
+
+# Browsing for a role also matches these related roles
+ROLE_ALIASES = {
+    "sibling": ["brother", "sister", "sibling"],
+    "brother": ["brother", "sibling"],
+    "sister": ["sister", "sibling"],
+    "penpal": ["penpal", "friend"],
+}
+
+# ─── Languages ─────────────────────────────────────────────────────────────────
+LANGUAGES = [
+    {"code": "en", "name": "English", "flag": "🇺🇸"},
+    {"code": "hi", "name": "Hindi", "flag": "🇮🇳"},
+    {"code": "pt", "name": "Portuguese", "flag": "🇧🇷"},
+    {"code": "ja", "name": "Japanese", "flag": "🇯🇵"},
+    {"code": "es", "name": "Spanish", "flag": "🇪🇸"},
+    {"code": "ko", "name": "Korean", "flag": "🇰🇷"},
+    {"code": "fr", "name": "French", "flag": "🇫🇷"},
+    {"code": "de", "name": "German", "flag": "🇩🇪"},
+    {"code": "zh", "name": "Chinese", "flag": "🇨🇳"},
+    {"code": "ar", "name": "Arabic", "flag": "🇸🇦"},
+    {"code": "ru", "name": "Russian", "flag": "🇷🇺"},
+    {"code": "it", "name": "Italian", "flag": "🇮🇹"},
+    {"code": "nl", "name": "Dutch", "flag": "🇳🇱"},
+    {"code": "pl", "name": "Polish", "flag": "🇵🇱"},
+    {"code": "tr", "name": "Turkish", "flag": "🇹🇷"},
+    {"code": "vi", "name": "Vietnamese", "flag": "🇻🇳"},
+    {"code": "th", "name": "Thai", "flag": "🇹🇭"},
+    {"code": "sv", "name": "Swedish", "flag": "🇸🇪"},
+    {"code": "sw", "name": "Swahili", "flag": "🇰🇪"},
+    {"code": "bn", "name": "Bengali", "flag": "🇧🇩"}
+]
+
+# ─── Database-backed catalog (filled by load_catalog) ─────────────────────────
+_games: list[dict] = []
+_games_by_id: dict[str, dict] = {}
+_missing_game_ids: set[str] = set()
+_achievements: list[dict] = []
+_etags: dict[str, str] = {}
+_loaded = False
+_version = 0
+
+
+def _etag(payload) -> str:
+    body = json.dumps(payload, sort_keys=True, default=str).encode()
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def load_catalog():
+    """Load games and achievements from the database into memory."""
+    global _games, _games_by_id, _achievements, _loaded, _version
+    db = get_supabase()
+
+    games = db.table("games").select("*").order("category").execute()
+    achievements = db.table("achievements").select("*").order("criteria_type").execute()
+
+    _games = games.data or []
+    _games_by_id = {g["id"]: g for g in _games}
+    _missing_game_ids.clear()
+    _achievements = achievements.data or []
+    _loaded = True
+    _version += 1
+
+    _etags["games"] = _etag(get_games_payload())
+    _etags["languages"] = _etag(LANGUAGES)
+    _etags["catalog"] = _etag(get_catalog_payload())
+
+    print(f"[Catalog] Loaded {len(_games)} games, {len(_achievements)} achievements")
+
+
+def refresh_catalog():
+    """Reload the catalog (call after editing games/achievements)."""
+    load_catalog()
+
+
+def _ensure_loaded():
+    if not _loaded:
+        load_catalog()
+
+
+def get_catalog_version() -> int:
+    """Incremented on every (re)load, so derived indexes know to rebuild."""
+    _ensure_loaded()
+    return _version
+
+
+def get_games(active_only: bool = True) -> list[dict]:
+    _ensure_loaded()
+    return [g for g in _games if g.get("is_active", True)] if active_only else list(_games)
+
+
+def get_game(game_id: str) -> dict | None:
+    """Look up a game by id (falls back to the database for unknown ids;
+    ids it doesn't have either are cached as misses until the next load)."""
+    _ensure_loaded()
+    game = _games_by_id.get(game_id)
+    if game is None and game_id not in _missing_game_ids:
+        db = get_supabase()
+        row = db.table("games").select("*").eq("id", game_id).execute()
+        if row.data:
+            game = row.data[0]
+            _games_by_id[game_id] = game
+        else:
+            if len(_missing_game_ids) >= MAX_MISSING_GAME_IDS:
+                _missing_game_ids.clear()
+            _missing_game_ids.add(game_id)
+    return game
+
+
+def get_achievements() -> list[dict]:
+    _ensure_loaded()
+    return list(_achievements)
+
+
+def get_games_payload() -> dict:
+    games = get_games()
+    categories = {}
+    for game in games:
+        categories.setdefault(game.get("category", "other"), []).append(game)
+    return {"games": games, "categories": categories}
+
+
+def get_catalog_payload() -> dict:
+    return {
+        **get_games_payload(),
+        "achievements": get_achievements(),
+        "roles": VALID_ROLES,
+        "role_aliases": ROLE_ALIASES,
+        "languages": LANGUAGES,
+    }
+
+
+def get_etag(name: str) -> str:
+    _ensure_loaded()
+    return _etags[name]
+
+
+def cached_response(request: Request, name: str, payload) -> Response:
+    """JSON response with ETag/Cache-Control; 304 if the client is current."""
+    etag = get_etag(name)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CATALOG_MAX_AGE_SECONDS}"}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(content=payload, headers=headers)
@@ -0,0 +1,313 @@
+"""Screening of message content for risky phrases.
+
+Terms in every supported language are precompiled into one lookup table:
+multi-word terms are matched as token sequences through a dict keyed by
+their first token (one hash lookup per word of the message, however many
+terms there are), and terms in scripts written without spaces (CJK, kana,
+Hangul, Thai) are matched as substrings, only when the text contains such
+characters. Accent-less spellings of Latin terms are added automatically.
+
+TERMS are phrases that carry their own context ("i want to kill myself");
+fragments such as "hurt you" or "想死" (as in 想死你了, "miss you so much")
+are too common in friendly chat to stand alone. Bare topic words
+("suicide", "naked") and phrases that are often hyperbole also turn up in
+ordinary chat about films, news or art, so they live in MENTIONS and are reported as
+`<category>_mention` at medium severity: queued for review, never
+escalated on their own.
+
+`screen_message()` runs inline in the chat send pipeline on both the
+original and the translated text. Text is scanned in chunks of
+CHUNK_TOKENS words and the scan stops once SCREEN_BUDGET_MS is spent, in
+which case the message is still queued so the moderation worker can scan
+it in full.
+Hits are buffered by `screening_batcher` (services/moderation_worker.py)
+and written to `moderation_queue` in batches.
+"""
+
+import re
+import time
+import unicodedata
+
+# Category -> severity. "high" findings are escalated to a human immediately.
+SEVERITY = {
+    "threat": "high",
+    "self_harm": "high",
+    "grooming": "high",
+    "sexual": "high",
+    "harassment": "medium",
+    "scam": "medium",
+    "self_harm_mention": "medium",
+    "sexual_mention": "medium",
+}
+
+# moderation_queue.priority for a screening hit of each severity
+QUEUE_PRIORITY = {"high": "high", "medium": "normal"}
+
+# Per-message latency budget
+SCREEN_BUDGET_MS = 1.0
+
+TERMS = {
+    "threat": [
+        # en
+        "i will kill you", "i'll kill you", "kill yourself", "i know where you live",
+        "i will hurt you", "i'll hurt you", "i'm going to hurt you", "i want to hurt you",
+        "beat you up",
+        # es / pt / fr / de / it
+        "te voy a matar", "sé dónde vives", "mátate",
+        "vou te matar", "sei onde você mora",
+        "je vais te tuer", "je sais où tu habites", "tue-toi",
+        "ich bringe dich um", "ich weiß wo du wohnst",
+        "ti ammazzo", "so dove abiti",
+        # ru / tr / ar / hi
+        "я тебя убью", "убей себя", "я знаю где ты живёшь",
+        "seni öldüreceğim",
+        "سأقتلك",
+        "मैं तुम्हें मार दूंगा", "जान से मार",
+        # ja / ko / zh
+        "殺してやる", "死ね",
+        "죽여버릴", "죽어버려",
+        "我要杀了你", "去死",
+        # nl / pl / sv
+        "ik maak je af", "ik vermoord je", "ik weet waar je woont",
+        "zabiję cię", "wiem gdzie mieszkasz", "zabij się",
+        "jag ska döda dig", "jag vet var du bor", "ta livet av dig",
+        # vi / th / sw / bn
+        "tao sẽ giết mày", "tao giết mày", "tao biết mày ở đâu", "đi chết đi",
+        "ฉันจะฆ่าแก", "กูจะฆ่ามึง", "ไปตายซะ",
+        "nitakuua", "najua unapoishi", "jiue",
+        "তোকে মেরে ফেলব", "তোমাকে মেরে ফেলব", "আমি জানি তুমি কোথায় থাকো",
+    ],
+    "self_harm": [
+        "kill myself", "want to die", "end my life", "cutting myself",
+        "commit suicide", "i feel suicidal", "thinking about suicide",
+        "quiero morir", "suicidarme",
+        "quero morrer", "quero me matar",
+        "je veux mourir", "me suicider",
+        "ich will sterben", "mich umbringen",
+        "voglio morire",
+        "хочу умереть", "покончить с собой",
+        "ölmek istiyorum", "intihar edeceğim",
+        "أريد أن أموت", "سأنتحر",
+        "मरना चाहता", "मरना चाहती", "आत्महत्या कर लूंगा", "आत्महत्या कर लूंगी",
+        "死にたい", "自殺したい",
+        "죽고 싶", "자살하고 싶",
+        "我想死了", "我不想活了", "我想自杀",
+        "ik wil dood", "zelfmoord plegen",
+        "chcę umrzeć", "zabiję się",
+        "jag vill dö", "ta livet av mig",
+        "tôi muốn chết", "muốn tự tử",
+        "อยากตาย",
+        "nataka kufa", "nitajiua",
+        "আমি মরতে চাই", "আত্মহত্যা করব",
+    ],
+    "grooming": [
+        "don't tell your parents", "dont tell your parents", "our little secret",
+        "keep this secret", "delete this chat", "how old are you really",
+        "are you home alone", "send me a picture of you", "send a photo of yourself",
+        "meet me alone", "add me on snapchat", "add me on telegram", "whatsapp me",
+        "no le digas a tus padres", "nuestro secreto", "estás sola en casa",
+        "não conta para seus pais", "nosso segredo",
+        "ne dis rien à tes parents", "notre secret",
+        "sag es nicht deinen eltern", "unser geheimnis",
+        "non dirlo ai tuoi genitori",
+        "не говори родителям", "наш секрет",
+        "لا تخبر والديك",
+        "माता-पिता को मत बताना", "हमारा राज़",
+        "親には内緒", "二人だけの秘密",
+        "부모님한테 말하지 마", "우리만의 비밀",
+        "别告诉你爸妈", "我们的秘密",
+        "zeg het niet tegen je ouders", "ons geheimpje", "ben je alleen thuis",
+        "nie mów rodzicom", "nasz sekret", "jesteś sama w domu",
+        "säg inget till dina föräldrar", "vår lilla hemlighet", "är du ensam hemma",
+        "đừng nói với bố mẹ", "bí mật của chúng ta", "em ở nhà một mình",
+        "อย่าบอกพ่อแม่", "ความลับของเรา",
+        "usiwaambie wazazi wako", "siri yetu",
+        "বাবা-মাকে বলো না", "আমাদের গোপন কথা",
+    ],
+    "sexual": [
+        "send nudes", "send me nudes", "sexy pic", "take off your clothes", "take your clothes off",
+        "desnúdate", "fotos desnuda",
+        "manda nudes",
+        "photos nues",
+        "schick nacktbilder",
+        "голые фото",
+        "नंगी फोटो",
+        "裸の写真",
+        "알몸 사진",
+        "裸照",
+        "stuur naaktfoto's",
+        "wyślij nagie zdjęcia", "rozbierz się",
+        "skicka nakenbilder", "klä av dig",
+        "gửi ảnh khỏa thân", "cởi đồ ra",
+        "ส่งรูปโป๊",
+        "nitumie picha za uchi", "vua nguo",
+        "নগ্ন ছবি পাঠাও",
+    ],
+    "harassment": [
+        "stupid", "idiot", "ugly", "shut up", "loser", "worthless",
+        "you will regret this", "you'll regret this",
+        "estúpido", "idiota", "cállate",
+        "cala a boca",
+        "connard", "ta gueule",
+        "dummkopf", "halt die klappe",
+        "идиот", "заткнись",
+        "idioot", "hou je mond", "sukkel",
+        "głupek", "zamknij się",
+        "håll käften", "dumskalle",
+        "đồ ngu", "câm mồm",
+        "ไอ้โง่", "หุบปาก",
+        "mjinga", "mpumbavu",
+        "বোকা", "চুপ কর",
+    ],
+    "scam": [
+        "send me money", "gift card", "wire transfer", "western union",
+        "bank details", "crypto wallet", "investment opportunity",
+        "envíame dinero", "tarjeta de regalo",
+        "me manda dinheiro",
+        "envoie-moi de l'argent",
+        "schick mir geld",
+        "переведи деньги",
+        "stuur me geld", "cadeaukaart",
+        "wyślij mi pieniądze", "karta podarunkowa",
+        "skicka pengar", "presentkort",
+        "gửi tiền cho tôi", "thẻ quà tặng",
+        "โอนเงินให้", "บัตรของขวัญ",
+        "nitumie pesa", "kadi ya zawadi",
+        "টাকা পাঠাও", "গিফট কার্ড",
+    ],
+}
+
+# Topic words that need context before they mean anything (see module docs)
+MENTIONS = {
+    "self_harm": [
+        # Also everyday hyperbole: "i cut myself shaving", "vou me matar de rir"
+        "cut myself", "vou me matar",
+        "suicide", "suicidal", "suicidio", "suicídio", "selbstmord",
+        "самоубийство", "intihar", "انتحار", "आत्महत्या", "自殺", "자살", "自杀",
+        "zelfmoord", "samobójstwo", "självmord", "tự tử", "ฆ่าตัวตาย", "kujiua", "আত্মহত্যা",
+    ],
+    "sexual": [
+        "nudes", "naked", "nacktbilder", "naaktfoto's", "nakenbilder", "nagie zdjęcia",
+    ],
+}
+
+
+def _strip_accents(text: str) -> str:
+    return "".join(
+        ch for ch in unicodedata.normalize("NFKD", text)
+        if unicodedata.category(ch) != "Mn" or ord(ch) > 0x036F
+    )
+
+
+# Scripts written without spaces between words (Thai, kana, CJK, Hangul)
+_UNSPACED = re.compile(r"[\u0E00-\u0E7F\u3040-\u30FF\u3400-\u9FFF\uAC00-\uD7AF]")
+_TOKEN = re.compile(r"\w+")
+
+
+def _compile(terms: dict[str, list[str]]):
+    """Build the lookup tables.
+
+    Terms in spaced scripts become token tuples indexed by their first
+    token; terms in unspaced scripts are matched as substrings.
+    """
+    by_first_token: dict[str, list[tuple[tuple[str, ...], str, str]]] = {}
+    substrings: list[tuple[str, str]] = []
+    longest = 1
+
+    for category, words in terms.items():
+        for word in words:
+            word = word.casefold()
+            if _UNSPACED.search(word):
+                substrings.append((word, category))
+                continue
+            variants = {word}
+            if not word.isascii() and _strip_accents(word).isascii():
+                variants.add(_strip_accents(word))
+            for variant in variants:
+                tokens = tuple(_TOKEN.findall(variant))
+                by_first_token.setdefault(tokens[0], []).append((tokens, category, word))
+                longest = max(longest, len(tokens))
+
+    # Longest first so overlapping terms prefer the most specific match
+    for candidates in by_first_token.values():
+        candidates.sort(key=lambda c: len(c[0]), reverse=True)
+    return by_first_token, substrings, longest
+
+
+_BY_FIRST_TOKEN, _SUBSTRINGS, _LONGEST_TERM = _compile(
+    {**TERMS, **{f"{category}_mention": words for category, words in MENTIONS.items()}}
+)
+
+# Tokens scanned between deadline checks
+CHUNK_TOKENS = 256
+
+
+def scan_chunked(text: str | None, deadline: float | None = None) -> tuple[list[tuple[str, str]], bool]:
+    """Scan `text` chunk by chunk until done or `deadline` (perf_counter).
+
+    Returns ((category, term) hits, complete).
+    """
+    if not text:
+        return [], True
+
+    folded = text.casefold()
+    hits = []
+
+    if _UNSPACED.search(folded):
+        hits.extend((category, term) for term, category in _SUBSTRINGS if term in folded)
+
+    tokens = _TOKEN.findall(folded)
+    index = _BY_FIRST_TOKEN
+    for start in range(0, len(tokens), CHUNK_TOKENS):
+        if deadline is not None and start and time.perf_counter() > deadline:
+            return hits, False
+        for i in range(start, min(start + CHUNK_TOKENS, len(tokens))):
+            candidates = index.get(tokens[i])
+            if candidates is None:
+                continue
+            for term_tokens, category, term in candidates:
+                if tuple(tokens[i:i + len(term_tokens)]) == term_tokens:
+                    hits.append((category, term))
+                    break
+    return hits, True
+
+
+def scan_text(text: str | None) -> list[tuple[str, str]]:
+    """Return (category, term) pairs for every risky term in `text`."""
+    return scan_chunked(text)[0]
+
+
+def screen_message(original_text: str | None, translated_text: str | None) -> dict | None:
+    """Screen a message's original and translated text within SCREEN_BUDGET_MS.
+
+    Returns None when nothing was found, else
+    {"categories": [...], "terms": [...], "severity": ..., "complete": bool}.
+    """
+    deadline = time.perf_counter() + SCREEN_BUDGET_MS / 1000
+    hits, complete = scan_chunked(original_text, deadline)
+    if translated_text and translated_text != original_text:
+        if complete:
+            more, complete = scan_chunked(translated_text, deadline)
+            hits += more
+
+    if not hits and complete:
+        return None
+
+    categories = sorted({c for c, _ in hits})
+    return {
+        "categories": categories,
+        "terms": sorted({t for _, t in hits}),
+        # An unfinished scan is queued at normal priority for the full scan
+        "severity": max_severity(categories) or "medium",
+        "complete": complete,
+    }
+
+
+def max_severity(categories) -> str | None:
+    """Highest severity among the given categories ('high' > 'medium')."""
+    levels = {SEVERITY.get(c) for c in categories}
+    if "high" in levels:
+        return "high"
+    if "medium" in levels:
+        return "medium"
+    return None
@@ -0,0 +1,170 @@
+"""Background contest scheduler.
+
+Finds relationships that have been chatting for at least 7 days without a
+recent contest and pre-generates their weekly contest during off-peak
+hours, so `POST /contests/create` only has to flip a ready contest to
+'active'.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from config import get_settings
+from services.supabase_client import get_supabase, rpc_missing
+from services.contest_service import generate_contest
+
+CONTEST_INTERVAL_DAYS = 7
+
+_scheduler_task: asyncio.Task | None = None
+
+
+def _is_off_peak(now: datetime) -> bool:
+    """Whether `now` (UTC) falls inside the configured off-peak window."""
+    settings = get_settings()
+    start, end = settings.CONTEST_OFFPEAK_START_HOUR, settings.CONTEST_OFFPEAK_END_HOUR
+    if start <= end:
+        return start <= now.hour < end
+    # Window wraps past midnight (e.g. 22 → 4)
+    return now.hour >= start or now.hour < end
+
+
+def find_eligible_relationships(limit: int) -> list[dict]:
+    """Return active relationships (id + both user ids) due a weekly contest.
+
+    Eligible = matched at least 7 days ago, with no contest created in the
+    last 7 days and no pre-generated contest still waiting to be played.
+    The `find_contest_eligible_relationships` RPC does this in one query;
+    without it, relationships are read a page at a time (at most
+    CONTEST_SCHEDULER_MAX_PAGES pages per run) and checked page by page.
+    """
+    db = get_supabase()
+    cutoff = (datetime.utcnow() - timedelta(days=CONTEST_INTERVAL_DAYS)).isoformat()
+
+    try:
+        result = db.rpc("find_contest_eligible_relationships", {
+            "p_cutoff": cutoff,
+            "p_limit": limit,
+        }).execute()
+        return result.data or []
+    except Exception as e:
+        if not rpc_missing(e):
+            raise
+        print(f"[ContestScheduler] find_contest_eligible_relationships RPC missing, paging relationships: {e}")
+
+    settings = get_settings()
+    page_size = settings.CONTEST_SCHEDULER_BATCH_SIZE
+    eligible = []
+    for page in range(settings.CONTEST_SCHEDULER_MAX_PAGES):
+        rels = db.table("relationships") \
+            .select("id, user_a_id, user_b_id") \
+            .eq("status", "active") \
+            .lte("matched_at", cutoff) \
+            .order("last_interaction_at", desc=True) \
+            .order("id") \
+            .range(page * page_size, (page + 1) * page_size - 1) \
+            .execute()
+        chunk = rels.data or []
+        if not chunk:
+            break
+        recent = db.table("contests") \
+            .select("relationship_id") \
+            .in_("relationship_id", [r["id"] for r in chunk]) \
+            .or_(f"created_at.gte.{cutoff},status.eq.scheduled") \
+            .execute()
+        covered = {c["relationship_id"] for c in (recent.data or [])}
+        eligible.extend(r for r in chunk if r["id"] not in covered)
+        if len(eligible) >= limit or len(chunk) < page_size:
+            break
+
+    return eligible[:limit]
+
+
+def _generate_blocking(relationship_id: str) -> dict:
+    # generate_contest only makes blocking Supabase calls, so give each
+    # worker thread its own event loop instead of stalling the app's loop.
+    return asyncio.run(generate_contest(relationship_id, "weekly", scheduled=True))
+
+
+def _notify_contest_ready(rel: dict, contest: dict):
+    db = get_supabase()
+
+    db.table("notifications").insert([
+        {
+            "user_id": uid,
+            "type": "contest_ready",
+            "title": "💫 Your weekly Bond Challenge is ready!",
+            "body": contest.get("description") or "How well do you know each other?",
+            "data": {"relationship_id": contest["relationship_id"], "contest_id": contest["id"]}
+        }
+        for uid in (rel["user_a_id"], rel["user_b_id"])
+    ]).execute()
+
+
+async def run_scheduler_once(force: bool = False) -> dict:
+    """Pre-generate contests for one batch of eligible relationships.
+
+    Outside the off-peak window this is a no-op unless `force` is set.
+    """
+    settings = get_settings()
+    if not force and not _is_off_peak(datetime.utcnow()):
+        return {"skipped": "peak_hours", "generated": 0, "failed": 0}
+
+    rels = await asyncio.to_thread(find_eligible_relationships, settings.CONTEST_SCHEDULER_BATCH_SIZE)
+    semaphore = asyncio.Semaphore(max(1, settings.CONTEST_SCHEDULER_CONCURRENCY))
+
+    async def _one(rel: dict) -> bool:
+        relationship_id = rel["id"]
+        async with semaphore:
+            try:
+                result = await asyncio.to_thread(_generate_blocking, relationship_id)
+                if "error" in result:
+                    print(f"[ContestScheduler] {relationship_id}: {result['error']}")
+                    return False
+                try:
+                    await asyncio.to_thread(_notify_contest_ready, rel, result["contest"])
+                except Exception as exc:
+                    print(f"[ContestScheduler] Notify failed for {relationship_id}: {exc}")
+                return True
+            except Exception as exc:
+                print(f"[ContestScheduler] {relationship_id}: {exc}")
+                return False
+
+    results = await asyncio.gather(*(_one(rel) for rel in rels))
+    generated = sum(1 for ok in results if ok)
+
+    if rels:
+        print(f"[ContestScheduler] Pre-generated {generated}/{len(rels)} contests")
+
+    return {"generated": generated, "failed": len(rels) - generated}
+
+
+async def _scheduler_loop():
+    interval = max(1, get_settings().CONTEST_SCHEDULER_INTERVAL_MINUTES) * 60
+    while True:
+        try:
+            await run_scheduler_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            print(f"[ContestScheduler] Run failed: {exc}")
+        await asyncio.sleep(interval)
+
+
+def start_contest_scheduler():
+    """Start the scheduler loop on the running event loop (idempotent)."""
+    global _scheduler_task
+    if not get_settings().CONTEST_SCHEDULER_ENABLED:
+        return
+    if _scheduler_task is None or _scheduler_task.done():
+        _scheduler_task = asyncio.create_task(_scheduler_loop())
+
+
+async def stop_contest_scheduler():
+    """Cancel the scheduler loop and wait for it to exit."""
+    global _scheduler_task
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        try:
+            await _scheduler_task
+        except asyncio.CancelledError:
+            pass
+        _scheduler_task = None
@@ -1,6 +1,10 @@
 import random
 from datetime import datetime, timedelta
-from services.supabase_client import get_supabase
+from services.supabase_client import get_supabase, rpc_missing
+from services.answer_scoring import normalize_answer, score_answer
+from services.bond_service import award_bond_points
+from services.events import publish
+from services.loader import load_profiles, load_relationship, load_primary_language
 
 
 QUESTION_TEMPLATES = [
@@ -19,63 +23,57 @@ QUESTION_TEMPLATES = [
 ]
 
 
-async def generate_contest(relationship_id: str, contest_type: str = "weekly") -> dict:
-    """Generate a bonding contest for a relationship."""
+async def generate_contest(relationship_id: str, contest_type: str = "weekly", scheduled: bool = False) -> dict:
+    """Generate a bonding contest for a relationship.
+
+    With `scheduled=True` the contest is stored as 'scheduled' (ready to
+    start, no clock running) instead of starting immediately.
+    """
     db = get_supabase()
     
     # Get relationship info
-    rel = db.table("relationships").select("*").eq("id", relationship_id).execute()
-    if not rel.data or len(rel.data) == 0:
+    rel_data = await load_relationship(relationship_id)
+    if not rel_data:
         return {"error": "Relationship not found"}
     
-    rel_data = rel.data[0]
-    user_a = db.table("profiles").select("display_name").eq("id", rel_data["user_a_id"]).execute()
-    user_b = db.table("profiles").select("display_name").eq("id", rel_data["user_b_id"]).execute()
+    user_ids = [rel_data["user_a_id"], rel_data["user_b_id"]]
     
-    name_a = user_a.data[0]["display_name"] if user_a.data else "Partner A"
-    name_b = user_b.data[0]["display_name"] if user_b.data else "Partner B"
+    # One profiles fetch for both names
+    users = await load_profiles(user_ids, "id, display_name")
+    names = {uid: u["display_name"] for uid, u in users.items()}
+    name_a = names.get(rel_data["user_a_id"], "Partner A")
+    name_b = names.get(rel_data["user_b_id"], "Partner B")
     
-    # Get facts from chat history
-    facts_a = db.table("chat_facts") \
+    # Get unused facts from chat history (user A's facts first, then user B's)
+    facts = db.table("chat_facts") \
         .select("*") \
-        .eq("user_id", rel_data["user_a_id"]) \
         .eq("relationship_id", relationship_id) \
+        .in_("user_id", user_ids) \
         .eq("used_in_contest", False) \
         .execute()
+    all_facts = sorted(facts.data or [], key=lambda f: f["user_id"] != rel_data["user_a_id"])
     
-    facts_b = db.table("chat_facts") \
-        .select("*") \
-        .eq("user_id", rel_data["user_b_id"]) \
-        .eq("relationship_id", relationship_id) \
-        .eq("used_in_contest", False) \
-        .execute()
-    
-    # Create the contest
     num_questions = 5 if contest_type == "weekly" else 3
     time_limit = 10 if contest_type == "weekly" else 5
     
-    contest = db.table("contests").insert({
+    now = datetime.utcnow()
+    contest_row = {
         "relationship_id": relationship_id,
         "contest_type": contest_type,
         "title": f"{'Weekly' if contest_type == 'weekly' else 'Daily'} Bond Challenge 💫",
         "description": f"How well do you know each other? Answer {num_questions} questions!",
-        "scheduled_at": datetime.utcnow().isoformat(),
-        "starts_at": datetime.utcnow().isoformat(),
-        "ends_at": (datetime.utcnow() + timedelta(minutes=time_limit)).isoformat(),
+        "scheduled_at": now.isoformat(),
+        "starts_at": None if scheduled else now.isoformat(),
+        "ends_at": None if scheduled else (now + timedelta(minutes=time_limit)).isoformat(),
         "time_limit_minutes": time_limit,
-        "status": "active",
+        "status": "scheduled" if scheduled else "active",
         "max_points": num_questions * 10
-    }).execute()
-    
-    if not contest.data:
-        return {"error": "Failed to create contest"}
-    
-    contest_data = contest.data[0]
+    }
     
-    # Generate questions
-    questions = []
+    # Build all question rows up front
+    question_rows = []
     used_categories = set()
-    all_facts = (facts_a.data or []) + (facts_b.data or [])
+    used_fact_ids = []
     
     # First, create questions from actual chat facts
     for fact in all_facts[:num_questions]:
@@ -87,47 +85,148 @@ async def generate_contest(relationship_id: str, contest_type: str = "weekly") -
             {"template": f"What did {about_name} mention about their {fact['fact_category']}?", "category": fact["fact_category"]}
         )
         
-        question_text = template["template"].format(name=about_name)
-        
-        q = db.table("contest_questions").insert({
-            "contest_id": contest_data["id"],
-            "question_text": question_text,
+        question_rows.append({
+            "question_text": template["template"].format(name=about_name),
             "question_type": "open",
             "question_about_user": about_user,
             "correct_answer": fact["fact_value"],
+            "correct_answer_normalized": normalize_answer(fact["fact_value"]),
             "confidence_score": fact.get("confidence", 0.8),
             "points": 10,
-            "question_order": len(questions)
-        }).execute()
-        
-        if q.data:
-            questions.append(q.data[0])
-            used_categories.add(fact["fact_category"])
-        
-        # Mark fact as used
-        db.table("chat_facts").update({"used_in_contest": True}).eq("id", fact["id"]).execute()
+            "question_order": len(question_rows)
+        })
+        used_categories.add(fact["fact_category"])
+        used_fact_ids.append(fact["id"])
     
     # Fill remaining questions with templates (if not enough chat facts)
-    remaining = num_questions - len(questions)
+    remaining = num_questions - len(question_rows)
     if remaining > 0:
         available_templates = [t for t in QUESTION_TEMPLATES if t["category"] not in used_categories]
         random.shuffle(available_templates)
         
         for template in available_templates[:remaining]:
-            about_user = random.choice([rel_data["user_a_id"], rel_data["user_b_id"]])
+            about_user = random.choice(user_ids)
             about_name = name_a if about_user == rel_data["user_a_id"] else name_b
             
-            q = db.table("contest_questions").insert({
-                "contest_id": contest_data["id"],
+            question_rows.append({
                 "question_text": template["template"].format(name=about_name),
                 "question_type": "open",
                 "question_about_user": about_user,
                 "points": 10,
-                "question_order": len(questions)
-            }).execute()
-            
-            if q.data:
-                questions.append(q.data[0])
+                "question_order": len(question_rows)
+            })
+    
+    created = _save_contest(contest_row, question_rows, used_fact_ids)
+    if not created:
+        return {"error": "Failed to create contest"}
+    
+    return {
+        "contest": created["contest"],
+        "questions": created["questions"],
+        "time_limit_minutes": time_limit
+    }
+
+
+def _save_contest(contest_row: dict, question_rows: list, fact_ids: list) -> dict | None:
+    """Persist a contest, its questions and consumed facts.
+
+    Uses the `create_contest_with_questions` RPC so everything lands in one
+    transaction. Only if the RPC is not installed does it fall back to one
+    insert for the contest, one batched insert for the questions and an
+    update per distinct `times_used` for the facts. That fallback skips
+    `correct_answer_normalized`, which the column's migration adds along
+    with the RPC; answers are normalized at scoring time instead. Any other
+    RPC failure returns None rather than writing outside the transaction.
+    """
+    db = get_supabase()
+    
+    try:
+        result = db.rpc("create_contest_with_questions", {
+            "p_contest": contest_row,
+            "p_questions": question_rows,
+            "p_fact_ids": fact_ids
+        }).execute()
+        return result.data if result.data and result.data.get("contest") else None
+    except Exception as e:
+        if not rpc_missing(e):
+            print(f"[Contest] create_contest_with_questions failed: {e}")
+            return None
+        print(f"[Contest] create_contest_with_questions RPC missing, using batched writes: {e}")
+    
+    contest = db.table("contests").insert(contest_row).execute()
+    if not contest.data:
+        return None
+    
+    contest_data = contest.data[0]
+    
+    questions = []
+    if question_rows:
+        inserted = db.table("contest_questions") \
+            .insert([
+                {**{k: v for k, v in q.items() if k != "correct_answer_normalized"}, "contest_id": contest_data["id"]}
+                for q in question_rows
+            ]) \
+            .execute()
+        questions = sorted(inserted.data or [], key=lambda q: q.get("question_order", 0))
+    
+    if fact_ids:
+        # PostgREST can't increment in place; facts sharing a count share an update
+        facts = db.table("chat_facts").select("id, times_used").in_("id", fact_ids).execute().data or []
+        by_count: dict[int, list] = {}
+        for fact in facts:
+            by_count.setdefault(fact.get("times_used") or 0, []).append(fact["id"])
+        now = datetime.utcnow().isoformat()
+        for count, ids in by_count.items():
+            db.table("chat_facts") \
+                .update({"used_in_contest": True, "times_used": count + 1, "updated_at": now}) \
+                .in_("id", ids) \
+                .execute()
+    
+    return {"contest": contest_data, "questions": questions}
+
+
+async def start_scheduled_contest(relationship_id: str, contest_type: str = "weekly") -> dict | None:
+    """Start a pre-generated contest for a relationship, if one is ready.
+
+    The contest and its questions come back in a single read; the only
+    other call is the status flip to 'active'. If another request flips it
+    first (both partners pressing start), the contest it activated is
+    returned, so the caller doesn't generate a second one. Returns None
+    when nothing has been pre-generated.
+    """
+    db = get_supabase()
+    
+    ready = db.table("contests") \
+        .select("*, contest_questions(id, question_text, question_type, options, points, question_order, question_about_user)") \
+        .eq("relationship_id", relationship_id) \
+        .eq("contest_type", contest_type) \
+        .eq("status", "scheduled") \
+        .order("scheduled_at") \
+        .limit(1) \
+        .execute()
+    
+    if not ready.data:
+        return None
+    
+    contest_data = ready.data[0]
+    questions = sorted(contest_data.pop("contest_questions", None) or [], key=lambda q: q.get("question_order", 0))
+    time_limit = contest_data.get("time_limit_minutes") or 10
+    
+    now = datetime.utcnow()
+    started = db.table("contests").update({
+        "status": "active",
+        "starts_at": now.isoformat(),
+        "ends_at": (now + timedelta(minutes=time_limit)).isoformat()
+    }).eq("id", contest_data["id"]).eq("status", "scheduled").execute()
+    
+    if started.data:
+        contest_data = started.data[0]
+    else:
+        # Someone else started it first; join the contest they started
+        current = db.table("contests").select("*").eq("id", contest_data["id"]).execute()
+        if not current.data or current.data[0].get("status") != "active":
+            return None
+        contest_data = current.data[0]
     
     return {
         "contest": contest_data,
@@ -140,38 +239,34 @@ async def submit_answer(question_id: str, user_id: str, answer: str) -> dict:
     """Submit an answer for a contest question."""
     db = get_supabase()
     
-    question = db.table("contest_questions").select("*").eq("id", question_id).execute()
+    # Question, its contest and the relationship in one joined read
+    question = db.table("contest_questions") \
+        .select("*, contests(id, relationship_id, relationships(user_a_id, user_b_id))") \
+        .eq("id", question_id) \
+        .execute()
     if not question.data or len(question.data) == 0:
         return {"error": "Question not found"}
     
     q_data = question.data[0]
-    contest = db.table("contests").select("*").eq("id", q_data["contest_id"]).execute()
-    if not contest.data or len(contest.data) == 0:
+    contest_data = q_data.pop("contests", None)
+    if not contest_data:
         return {"error": "Contest not found"}
     
-    contest_data = contest.data[0]
-    rel = db.table("relationships").select("*").eq("id", contest_data["relationship_id"]).execute()
-    if not rel.data or len(rel.data) == 0:
+    rel_data = contest_data.get("relationships")
+    if not rel_data:
         return {"error": "Relationship not found"}
     
-    rel_data = rel.data[0]
-    
     # Determine which user field to update
     is_user_a = user_id == rel_data["user_a_id"]
     answer_field = "user_a_answer" if is_user_a else "user_b_answer"
     time_field = "user_a_answered_at" if is_user_a else "user_b_answered_at"
     points_field = "user_a_points" if is_user_a else "user_b_points"
     
-    # Score the answer
-    points = 0
-    correct = q_data.get("correct_answer", "").lower().strip()
-    user_answer = answer.lower().strip()
-    
-    if correct and user_answer:
-        if user_answer == correct:
-            points = q_data["points"]  # Exact match
-        elif correct in user_answer or user_answer in correct:
-            points = q_data["points"] // 2  # Partial match
+    # Score the answer (older questions may not have a stored normalized answer)
+    correct = (q_data.get("correct_answer") or "").strip()
+    expected = q_data.get("correct_answer_normalized") or normalize_answer(correct)
+    language = await load_primary_language(user_id) if expected else None
+    points = score_answer(expected, answer, q_data["points"], language) if expected else 0
     
     # Update question
     db.table("contest_questions").update({
@@ -188,7 +283,13 @@ async def submit_answer(question_id: str, user_id: str, answer: str) -> dict:
 
 
 async def complete_contest(contest_id: str) -> dict:
-    """Complete a contest and award bond points."""
+    """Complete a contest and award bond points.
+
+    The points are awarded before the contest is marked completed, and the
+    award is keyed on the contest id, so a request retried after a failure
+    (or a second request racing the first) never awards twice. An already
+    completed contest just returns its stored result.
+    """
     db = get_supabase()
     
     contest = db.table("contests").select("*").eq("id", contest_id).execute()
@@ -196,6 +297,8 @@ async def complete_contest(contest_id: str) -> dict:
         return {"error": "Contest not found"}
     
     contest_data = contest.data[0]
+    if contest_data.get("status") == "completed":
+        return _contest_result(contest_data)
     
     questions = db.table("contest_questions") \
         .select("*") \
@@ -215,8 +318,20 @@ async def complete_contest(contest_id: str) -> dict:
     if is_synchronized:
         bond_points = int(bond_points * 1.5)
     
-    # Update contest
-    db.table("contests").update({
+    won = total >= contest_data["max_points"] * 0.7
+
+    # Award first: if this raises, the contest stays open and can be retried
+    relationship = await award_bond_points(
+        contest_data["relationship_id"],
+        bond_points,
+        care_delta=bond_points // 5,
+        reason="contest_completed",
+        reference_id=contest_id,
+        contests_completed=1,
+        contests_won=1 if won else 0
+    )
+
+    completed = {
         "status": "completed",
         "user_a_score": total_a,
         "user_b_score": total_b,
@@ -224,30 +339,27 @@ async def complete_contest(contest_id: str) -> dict:
         "is_synchronized": is_synchronized,
         "bond_points_awarded": bond_points,
         "completed_at": datetime.utcnow().isoformat()
-    }).eq("id", contest_id).execute()
-    
-    # Update relationship bond points
-    rel_id = contest_data["relationship_id"]
-    rel = db.table("relationships").select("bond_points, care_score, contests_completed, contests_won") \
-        .eq("id", rel_id).execute()
-    
-    if rel.data and len(rel.data) > 0:
-        rel_data = rel.data[0]
-        new_bond = rel_data["bond_points"] + bond_points
-        new_care = min(100, rel_data["care_score"] + (bond_points // 5))
-        
-        db.table("relationships").update({
-            "bond_points": new_bond,
-            "care_score": new_care,
-            "contests_completed": rel_data["contests_completed"] + 1,
-            "contests_won": rel_data["contests_won"] + (1 if total >= contest_data["max_points"] * 0.7 else 0)
-        }).eq("id", rel_id).execute()
+    }
+    db.table("contests").update(completed).eq("id", contest_id).neq("status", "completed").execute()
+
+    if relationship and not relationship.get("already_awarded"):
+        publish(
+            "contest_completed",
+            relationship_id=contest_data["relationship_id"],
+            user_ids=[relationship["user_a_id"], relationship["user_b_id"]],
+            won=won
+        )
     
+    return _contest_result({**contest_data, **completed})
+
+
+def _contest_result(contest_data: dict) -> dict:
+    total = contest_data.get("total_score") or 0
     return {
         "total_score": total,
-        "user_a_score": total_a,
-        "user_b_score": total_b,
-        "is_synchronized": is_synchronized,
-        "bond_points_awarded": bond_points,
+        "user_a_score": contest_data.get("user_a_score") or 0,
+        "user_b_score": contest_data.get("user_b_score") or 0,
+        "is_synchronized": bool(contest_data.get("is_synchronized")),
+        "bond_points_awarded": contest_data.get("bond_points_awarded") or 0,
         "passed": total >= contest_data["max_points"] * 0.5
     }
@@ -0,0 +1,69 @@
+"""Unread counters for notifications and messages.
+
+Counts are maintained in the database by triggers (see
+supabase/add_unread_counters.sql), so every lookup here is a primary-key
+read on `notification_counters` / `message_counters`.
+"""
+
+from typing import Optional
+from services.supabase_client import get_supabase
+
+
+def get_unread_notification_count(user_id: str) -> Optional[int]:
+    """Return the number of unread notifications for a user.
+
+    Returns None if the counter could not be read, so callers can tell
+    "nothing unread" apart from "unknown".
+    """
+    db = get_supabase()
+
+    try:
+        row = db.table("notification_counters") \
+            .select("unread_count") \
+            .eq("user_id", user_id) \
+            .execute()
+        if row.data:
+            return row.data[0].get("unread_count", 0) or 0
+        return 0
+    except Exception as exc:
+        print(f"[Counters] Notification lookup failed: {exc}")
+
+    return None
+
+
+def get_unread_message_counts(user_id: str, relationship_id: Optional[str] = None) -> Optional[dict]:
+    """Return unread message counts for a user, keyed by relationship id.
+
+    Relationships with nothing unread are omitted. Returns None if the
+    counters could not be read.
+    """
+    db = get_supabase()
+
+    try:
+        query = db.table("message_counters") \
+            .select("relationship_id, unread_count") \
+            .eq("user_id", user_id)
+        if relationship_id:
+            query = query.eq("relationship_id", relationship_id)
+
+        rows = query.execute()
+        return {
+            r["relationship_id"]: r.get("unread_count", 0) or 0
+            for r in (rows.data or [])
+            if r.get("unread_count")
+        }
+    except Exception as exc:
+        print(f"[Counters] Message lookup failed: {exc}")
+
+    return None
+
+
+def get_unread_counts(user_id: str) -> dict:
+    """Return all badge counts for a user in one payload."""
+    messages = get_unread_message_counts(user_id) or {}
+
+    return {
+        "notifications": get_unread_notification_count(user_id) or 0,
+        "messages": sum(messages.values()),
+        "messages_by_relationship": messages,
+    }
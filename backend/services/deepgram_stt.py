@@ -3,23 +3,95 @@
 Uses Deepgram's Nova-2 model for high-accuracy, real-time transcription.
 Supports 30+ languages — perfect for Familia's cross-cultural chat.
 Docs: https://developers.deepgram.com/docs
+
+Audio can be passed as bytes or as an async iterator of chunks; iterators
+are sent with chunked transfer encoding, so an upload is relayed to
+Deepgram as it is read instead of being held in memory first.
+
+Requests go through the deepgram vendor (services/vendor_client.py), so a
+Deepgram outage fails fast once its circuit breaker opens. Transcription
+time grows with the length of the audio, so these calls keep their static
+timeout rather than an adaptive one, and a streamed upload can't be sent
+twice, so they are not hedged. Only Deepgram's part of a streamed request
+counts against it: the timeout starts once the upload has been read from
+our client, and errors or stalls reading it raise UploadError instead.
 """
 
+import asyncio
+from typing import AsyncIterator
 import httpx
 from config import get_settings
+from services.vendor_client import deepgram, VendorError, VendorUnavailable
 
 DEEPGRAM_STT_URL = "https://api.deepgram.com/v1/listen"
 
 
+class UploadError(Exception):
+    """Reading the audio from our own client failed or stalled."""
+
+
+class AudioTooLarge(UploadError):
+    """The audio passed the configured size limit while being streamed."""
+
+
+class _Upload:
+    """Audio chunks streamed from our client; `sent` is set once all are read."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self.chunks = chunks
+        self.sent = asyncio.Event()
+
+    async def __aiter__(self):
+        stall = get_settings().STT_UPLOAD_STALL_SECONDS
+        iterator = aiter(self.chunks)
+        while True:
+            try:
+                chunk = await asyncio.wait_for(anext(iterator), stall)
+            except StopAsyncIteration:
+                break
+            except UploadError:
+                raise
+            except asyncio.TimeoutError:
+                raise UploadError(f"No audio received for {stall}s")
+            except Exception as exc:
+                raise UploadError(f"Reading audio failed: {exc}") from exc
+            yield chunk
+        self.sent.set()
+
+
+def _prepare(audio: bytes | AsyncIterator[bytes]) -> tuple[bytes | _Upload, asyncio.Event | None]:
+    if isinstance(audio, bytes):
+        return audio, None
+    upload = _Upload(audio)
+    return upload, upload.sent
+
+
+async def read_in_chunks(upload, chunk_bytes: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """Chunks of an UploadFile (anything with `async read(n)`)."""
+    while chunk := await upload.read(chunk_bytes):
+        yield chunk
+
+
+async def limit_audio_stream(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    """Pass chunks through, raising AudioTooLarge once `max_bytes` is exceeded."""
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+            raise AudioTooLarge(f"Audio exceeds {max_bytes} bytes")
+        yield chunk
+
+
 async def transcribe_audio(
-    audio_bytes: bytes,
+    audio_bytes: bytes | AsyncIterator[bytes],
     language: str = "en",
     mime_type: str = "audio/webm",
 ) -> dict:
     """Transcribe audio bytes to text using Deepgram Nova-2.
 
     Args:
-        audio_bytes: Raw audio file bytes (webm, wav, mp3, ogg, etc.)
+        audio_bytes: Raw audio (webm, wav, mp3, ogg, etc.), as bytes or an
+            async iterator of chunks
         language: BCP-47 language code (e.g. 'en', 'hi', 'pt', 'ja')
         mime_type: MIME type of the audio (default: audio/webm)
 
@@ -41,7 +113,9 @@ async def transcribe_audio(
             "error": "Deepgram API key not configured",
         }
 
-    try:
+    content, body_sent = _prepare(audio_bytes)
+
+    async def attempt(timeout: float) -> dict | None:
         async with httpx.AsyncClient() as client:
             resp = await client.post(
                 DEEPGRAM_STT_URL,
@@ -55,8 +129,8 @@ async def transcribe_audio(
                     "punctuate": "true",
                     "smart_format": "true",
                 },
-                content=audio_bytes,
-                timeout=30,
+                content=content,
+                timeout=timeout,
             )
 
             if resp.status_code == 200:
@@ -75,7 +149,20 @@ async def transcribe_audio(
                     }
 
             print(f"[Deepgram STT] {resp.status_code}: {resp.text[:200]}")
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise VendorError(f"HTTP {resp.status_code}")
+            return None
 
+    try:
+        result = await deepgram.call(
+            attempt, timeout=30, adaptive=False, passthrough=(UploadError,), body_sent=body_sent,
+        )
+        if result is not None:
+            return result
+    except UploadError:
+        raise
+    except VendorUnavailable:
+        pass
     except Exception as exc:
         print(f"[Deepgram STT] Exception: {exc}")
 
@@ -89,7 +176,7 @@ async def transcribe_audio(
 
 
 async def transcribe_audio_auto_detect(
-    audio_bytes: bytes,
+    audio_bytes: bytes | AsyncIterator[bytes],
     mime_type: str = "audio/webm",
 ) -> dict:
     """Transcribe audio with automatic language detection.
@@ -101,7 +188,9 @@ async def transcribe_audio_auto_detect(
     if not api_key:
         return {"transcript": "", "confidence": 0, "language": "en", "words": []}
 
-    try:
+    content, body_sent = _prepare(audio_bytes)
+
+    async def attempt(timeout: float) -> dict | None:
         async with httpx.AsyncClient() as client:
             resp = await client.post(
                 DEEPGRAM_STT_URL,
@@ -115,8 +204,8 @@ async def transcribe_audio_auto_detect(
                     "punctuate": "true",
                     "smart_format": "true",
                 },
-                content=audio_bytes,
-                timeout=30,
+                content=content,
+                timeout=timeout,
             )
 
             if resp.status_code == 200:
@@ -135,7 +224,20 @@ async def transcribe_audio_auto_detect(
                     }
 
             print(f"[Deepgram STT auto] {resp.status_code}: {resp.text[:200]}")
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise VendorError(f"HTTP {resp.status_code}")
+            return None
 
+    try:
+        result = await deepgram.call(
+            attempt, timeout=30, adaptive=False, passthrough=(UploadError,), body_sent=body_sent,
+        )
+        if result is not None:
+            return result
+    except UploadError:
+        raise
+    except VendorUnavailable:
+        pass
     except Exception as exc:
         print(f"[Deepgram STT auto] Exception: {exc}")
 
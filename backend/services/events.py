@@ -0,0 +1,51 @@
+"""In-process domain events.
+
+A minimal publish/subscribe bus so features can react to things that
+happen elsewhere (a message was sent, a contest finished, a relationship
+levelled up, ...) without the originating request waiting for them.
+
+Handlers run in the background: coroutine handlers as tasks on the event
+loop, plain functions (which typically make blocking Supabase calls) in a
+worker thread. A failing handler is logged and never affects the publisher.
+
+Event names and payloads:
+    message_sent        {"user_id", "relationship_id"}
+    contest_completed   {"relationship_id", "user_ids", "won"}
+    level_reached       {"relationship_id", "user_ids", "level"}  (only when the level rose)
+    streak_updated      {"relationship_id", "user_ids", "streak_days"}
+    game_completed      {"session_id", "user_ids"}
+    room_joined         {"user_id", "room_id"}
+    potluck_hosted      {"user_id", "room_id"}
+"""
+
+import asyncio
+import inspect
+from typing import Callable, Dict, List
+
+_handlers: Dict[str, List[Callable]] = {}
+_pending: set = set()
+
+
+def subscribe(event: str, handler: Callable):
+    """Register `handler(payload: dict)` for an event name."""
+    handlers = _handlers.setdefault(event, [])
+    if handler not in handlers:
+        handlers.append(handler)
+
+
+async def _run(event: str, handler: Callable, payload: dict):
+    try:
+        if inspect.iscoroutinefunction(handler):
+            await handler(payload)
+        else:
+            await asyncio.to_thread(handler, payload)
+    except Exception as exc:
+        print(f"[Events] {event} handler {handler.__name__} failed: {exc}")
+
+
+def publish(event: str, **payload):
+    """Dispatch an event to its subscribers without waiting for them."""
+    for handler in _handlers.get(event, ()):
+        task = asyncio.create_task(_run(event, handler, payload))
+        _pending.add(task)
+        task.add_done_callback(_pending.discard)
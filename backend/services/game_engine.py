@@ -0,0 +1,304 @@
+"""In-memory game session engine.
+
+Active game sessions live in memory while they are being played:
+
+  - a session is loaded once (its game type comes from the catalog cache),
+  - actions on the same session are serialized with a per-session lock,
+  - each action broadcasts a small state diff to the players' WebSockets,
+  - dirty sessions are checkpointed to `game_sessions` on an interval and
+    immediately on completion, and idle sessions are evicted.
+
+Finishing a session (completion write, then the bond point award, then
+`bond_points_awarded`) is retried by the checkpoint loop from the step
+that failed. The award is keyed on the session id, so a retry after an
+award that did go through is a no-op. After GAME_FINISH_MAX_ATTEMPTS the
+session is dead-lettered: logged and evicted, its row left completed with
+no `bond_points_awarded`.
+
+State is per process, so players of one session must reach the same
+instance (single instance or sticky sessions).
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Set
+from fastapi import WebSocket
+from config import get_settings
+from services.supabase_client import get_supabase
+from services.bond_service import award_bond_points
+from services.catalog import get_game
+from services.events import publish
+
+ACTIONS = ("submit", "guess", "reveal", "next_round", "complete")
+
+
+class GameSession:
+    """Resident state for one game session."""
+
+    def __init__(self, row: dict, game: dict):
+        self.id = row["id"]
+        self.relationship_id = row.get("relationship_id")
+        self.game_type = game.get("game_type", "")
+        self.bond_points_reward = game.get("bond_points_reward", 5)
+        self.status = row.get("status", "active")
+        self.current_round = row.get("current_round", 0)
+        self.game_data = row.get("game_data") or {}
+        self.players = row.get("players") or []
+        self.version = 0
+        self.dirty = False
+        self.last_access = time.monotonic()
+        self.lock = asyncio.Lock()
+        # Progress through _finish, so a retry resumes where it failed
+        self.finish_attempts = 0
+        self.persisted = False
+        self.awarded = False
+
+    def is_player(self, user_id: str) -> bool:
+        return any(p.get("user_id") == user_id for p in self.players)
+
+    def snapshot(self) -> dict:
+        return {
+            "session_id": self.id,
+            "status": self.status,
+            "current_round": self.current_round,
+            "game_data": self.game_data,
+            "players": self.players,
+            "version": self.version,
+        }
+
+
+class GameSessionEngine:
+    def __init__(self):
+        self.sessions: Dict[str, GameSession] = {}
+        self.connections: Dict[str, Set[WebSocket]] = {}
+        self._load_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    # ─── Loading ───────────────────────────────────────────────────────────────
+
+    def peek(self, session_id: str) -> GameSession | None:
+        """Return the resident session without loading it."""
+        return self.sessions.get(session_id)
+
+    async def get(self, session_id: str) -> GameSession | None:
+        """Return the resident session, loading it from the database once."""
+        session = self.sessions.get(session_id)
+        if session:
+            session.last_access = time.monotonic()
+            return session
+
+        async with self._load_lock:
+            session = self.sessions.get(session_id)
+            if session:
+                return session
+
+            db = get_supabase()
+            row = db.table("game_sessions").select("*").eq("id", session_id).execute()
+            if not row.data:
+                return None
+
+            session = GameSession(row.data[0], get_game(row.data[0]["game_id"]) or {})
+            self.sessions[session_id] = session
+            return session
+
+    # ─── Actions ───────────────────────────────────────────────────────────────
+
+    async def apply_action(self, session_id: str, user_id: str, action: str, data: dict | None) -> dict:
+        """Apply one player action and broadcast the resulting diff.
+
+        Returns {"error": ..., "status_code": ...} if the session does not
+        exist or is over, the user isn't playing it, or the action is unknown.
+        """
+        session = await self.get(session_id)
+        if not session:
+            return {"error": "Game session not found", "status_code": 404}
+        if not session.is_player(user_id):
+            return {"error": "You are not a player in this game", "status_code": 403}
+        if action not in ACTIONS:
+            return {"error": f"Unknown action: {action}", "status_code": 400}
+
+        async with session.lock:
+            if session.status == "completed":
+                return {"error": "Game session already completed", "status_code": 409}
+
+            result = {"success": True}
+            changes = {}
+
+            if action == "submit":
+                key = f"answer_{user_id}"
+                session.game_data[key] = data
+                changes["set"] = {key: data}
+                result["submitted"] = True
+            elif action == "guess":
+                guess = {
+                    "user_id": user_id,
+                    "guess": data,
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+                session.game_data.setdefault("guesses", []).append(guess)
+                changes["append"] = {"guesses": guess}
+                result["guess_recorded"] = True
+            elif action == "reveal":
+                session.game_data.setdefault("reveals", []).append(data)
+                changes["append"] = {"reveals": data}
+                result["revealed"] = True
+            elif action == "next_round":
+                session.current_round += 1
+                changes["current_round"] = session.current_round
+            elif action == "complete":
+                session.status = "completed"
+                changes["status"] = "completed"
+                result["completed"] = True
+                result["bond_points_awarded"] = session.bond_points_reward
+
+            session.version += 1
+            session.dirty = True
+            session.last_access = time.monotonic()
+
+            if session.status == "completed":
+                try:
+                    await self._finish(session)
+                except Exception as exc:
+                    # Still resident: the checkpoint loop retries
+                    self._finish_failed(session, exc)
+
+        await self.broadcast(session_id, {
+            "type": "game_update",
+            "session_id": session_id,
+            "version": session.version,
+            "user_id": user_id,
+            "action": action,
+            "changes": changes,
+        })
+
+        return result
+
+    async def _finish(self, session: GameSession):
+        """Persist a completed session, award its points and evict it."""
+        db = get_supabase()
+        session.finish_attempts += 1
+
+        if not session.persisted:
+            db.table("game_sessions").update({
+                "status": "completed",
+                "completed_at": datetime.utcnow().isoformat(),
+                "game_data": session.game_data,
+                "current_round": session.current_round
+            }).eq("id", session.id).execute()
+            session.persisted = True
+            session.dirty = False
+
+        if not session.awarded:
+            relationship = None
+            if session.relationship_id:
+                relationship = await award_bond_points(
+                    session.relationship_id,
+                    session.bond_points_reward,
+                    reason="game_completed",
+                    reference_id=session.id
+                )
+            session.awarded = True
+            if not (relationship and relationship.get("already_awarded")):
+                publish(
+                    "game_completed",
+                    session_id=session.id,
+                    user_ids=[p["user_id"] for p in session.players if p.get("user_id")]
+                )
+
+        db.table("game_sessions").update({
+            "bond_points_awarded": session.bond_points_reward,
+        }).eq("id", session.id).execute()
+
+        self.sessions.pop(session.id, None)
+
+    def _finish_failed(self, session: GameSession, exc: Exception):
+        """Log a failed _finish; past the attempt limit, give the session up."""
+        limit = get_settings().GAME_FINISH_MAX_ATTEMPTS
+        if session.finish_attempts < limit:
+            print(f"[GameEngine] Finishing {session.id} failed (attempt {session.finish_attempts}), will retry: {exc}")
+            return
+        print(f"[GameEngine] Finishing {session.id} failed {limit} times, dead-lettering "
+              f"(persisted={session.persisted}, awarded={session.awarded}): {exc}")
+        self.sessions.pop(session.id, None)
+
+    # ─── Persistence ──────────────────────────────────────────────────────────
+
+    def _checkpoint(self, session: GameSession):
+        db = get_supabase()
+        db.table("game_sessions").update({
+            "status": session.status,
+            "game_data": session.game_data,
+            "current_round": session.current_round
+        }).eq("id", session.id).execute()
+        session.dirty = False
+
+    async def checkpoint_all(self):
+        """Write every dirty session back and evict idle ones."""
+        idle_after = get_settings().GAME_SESSION_IDLE_MINUTES * 60
+        now = time.monotonic()
+
+        for session_id, session in list(self.sessions.items()):
+            async with session.lock:
+                if session.status == "completed":
+                    # Completed but _finish failed: persist and award now
+                    try:
+                        await self._finish(session)
+                    except Exception as exc:
+                        self._finish_failed(session, exc)
+                    continue
+                if session.dirty:
+                    try:
+                        self._checkpoint(session)
+                    except Exception as exc:
+                        print(f"[GameEngine] Checkpoint failed for {session_id}: {exc}")
+                        continue
+
+                if not self.connections.get(session_id) and now - session.last_access > idle_after:
+                    self.sessions.pop(session_id, None)
+
+    async def _checkpoint_loop(self):
+        interval = max(1, get_settings().GAME_CHECKPOINT_INTERVAL_SECONDS)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.checkpoint_all()
+            except Exception as exc:
+                print(f"[GameEngine] Checkpoint loop error: {exc}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._checkpoint_loop())
+
+    async def stop(self):
+        """Stop the checkpoint loop and flush everything still dirty."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.checkpoint_all()
+
+    # ─── WebSockets ───────────────────────────────────────────────────────────
+
+    def connect(self, websocket: WebSocket, session_id: str):
+        """Register an accepted, authenticated socket for broadcasts."""
+        self.connections.setdefault(session_id, set()).add(websocket)
+
+    def disconnect(self, websocket: WebSocket, session_id: str):
+        if session_id in self.connections:
+            self.connections[session_id].discard(websocket)
+            if not self.connections[session_id]:
+                del self.connections[session_id]
+
+    async def broadcast(self, session_id: str, message: dict):
+        for connection in list(self.connections.get(session_id, ())):
+            try:
+                await connection.send_json(message)
+            except Exception:
+                pass
+
+
+game_engine = GameSessionEngine()
@@ -0,0 +1,189 @@
+"""Request-scoped loaders for profiles, languages and relationships.
+
+A small DataLoader: lookups by key made in the same event-loop tick are
+collected and fetched with one `in_()` query, and every result is
+memoized for the rest of the request, so a handler (and the helpers it
+calls) can ask for the same profile or relationship as often as it likes.
+
+`LoaderMiddleware` gives each HTTP request its own set of loaders. Outside
+a request (WebSockets, background workers) every `get_loaders()` call
+returns a fresh set, so nothing is memoized across frames or jobs.
+
+Loaders hold full rows; `fields` arguments project them to the columns a
+caller would otherwise have selected. Handlers that write a row should
+call the matching `invalidate_*` helper so later reads in the same
+request see the change.
+"""
+
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Callable, Iterable
+from services.supabase_client import get_supabase
+
+
+class DataLoader:
+    """Batches and memoizes key lookups.
+
+    `batch_fn(keys) -> {key: value}` is a blocking function; it runs in a
+    worker thread once per batch. Missing keys resolve to None.
+    """
+
+    def __init__(self, batch_fn: Callable[[list[str]], dict[str, Any]]):
+        self.batch_fn = batch_fn
+        self._cache: dict[str, asyncio.Future] = {}
+        self._queue: list[str] = []
+
+    def _dispatch_soon(self):
+        asyncio.get_running_loop().call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+
+    async def _dispatch(self):
+        keys, self._queue = self._queue, []
+        if not keys:
+            return
+        try:
+            values = await asyncio.to_thread(self.batch_fn, keys)
+        except Exception as exc:
+            for key in keys:
+                future = self._cache.pop(key, None)
+                if future and not future.done():
+                    future.set_exception(exc)
+            return
+        for key in keys:
+            future = self._cache.get(key)
+            if future and not future.done():
+                future.set_result(values.get(key))
+
+    async def load(self, key: str) -> Any:
+        future = self._cache.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._cache[key] = future
+            if not self._queue:
+                self._dispatch_soon()
+            self._queue.append(key)
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[str]) -> list[Any]:
+        return list(await asyncio.gather(*(self.load(k) for k in keys)))
+
+    def prime(self, key: str, value: Any):
+        """Seed the cache with a row the caller already fetched."""
+        if key in self._cache and not self._cache[key].done():
+            return
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._cache[key] = future
+
+    def clear(self, key: str):
+        self._cache.pop(key, None)
+
+
+# ─── Batch functions ──────────────────────────────────────────────────────────
+
+def _fetch_profiles(ids: list[str]) -> dict[str, dict]:
+    rows = get_supabase().table("profiles").select("*").in_("id", ids).execute()
+    return {r["id"]: r for r in (rows.data or [])}
+
+
+def _fetch_languages(user_ids: list[str]) -> dict[str, list[dict]]:
+    rows = get_supabase().table("user_languages").select("*").in_("user_id", user_ids).execute()
+    grouped: dict[str, list[dict]] = {uid: [] for uid in user_ids}
+    for r in (rows.data or []):
+        grouped.setdefault(r["user_id"], []).append(r)
+    return grouped
+
+
+def _fetch_relationships(ids: list[str]) -> dict[str, dict]:
+    rows = get_supabase().table("relationships").select("*").in_("id", ids).execute()
+    return {r["id"]: r for r in (rows.data or [])}
+
+
+class Loaders:
+    def __init__(self):
+        self.profiles = DataLoader(_fetch_profiles)
+        self.languages = DataLoader(_fetch_languages)
+        self.relationships = DataLoader(_fetch_relationships)
+
+
+_loaders: ContextVar[Loaders | None] = ContextVar("loaders", default=None)
+
+
+def get_loaders() -> Loaders:
+    return _loaders.get() or Loaders()
+
+
+class LoaderMiddleware:
+    """ASGI middleware that scopes a fresh Loaders to each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _loaders.set(Loaders())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _loaders.reset(token)
+
+
+# ─── Helpers ─────────────────────────────────────────────────────────────────
+
+def _project(row: dict | None, fields: str | None) -> dict | None:
+    if row is None or not fields:
+        return row
+    return {f: row.get(f) for f in (f.strip() for f in fields.split(","))}
+
+
+async def load_profile(user_id: str, fields: str | None = None) -> dict | None:
+    """A profile row (optionally projected to `fields`, e.g. "id, display_name")."""
+    return _project(await get_loaders().profiles.load(user_id), fields)
+
+
+async def load_profiles(user_ids: Iterable[str], fields: str | None = None) -> dict[str, dict]:
+    """Profiles by id for several users in one query; unknown ids are omitted."""
+    ids = list(dict.fromkeys(user_ids))
+    rows = await get_loaders().profiles.load_many(ids)
+    return {uid: _project(row, fields) for uid, row in zip(ids, rows) if row is not None}
+
+
+async def load_languages(user_id: str) -> list[dict]:
+    return await get_loaders().languages.load(user_id) or []
+
+
+async def load_many_languages(user_ids: Iterable[str]) -> dict[str, list[dict]]:
+    ids = list(dict.fromkeys(user_ids))
+    rows = await get_loaders().languages.load_many(ids)
+    return {uid: langs or [] for uid, langs in zip(ids, rows)}
+
+
+async def load_primary_language(user_id: str, default: str | None = None) -> str | None:
+    for lang in await load_languages(user_id):
+        if lang.get("is_primary"):
+            return lang["language_code"]
+    return default
+
+
+async def load_relationship(relationship_id: str, fields: str | None = None) -> dict | None:
+    return _project(await get_loaders().relationships.load(relationship_id), fields)
+
+
+def prime_relationships(rows: Iterable[dict]):
+    loader = get_loaders().relationships
+    for row in rows:
+        if "id" in row and "user_a_id" in row:
+            loader.prime(row["id"], row)
+
+
+def invalidate_profile(user_id: str):
+    get_loaders().profiles.clear(user_id)
+
+
+def invalidate_languages(user_id: str):
+    get_loaders().languages.clear(user_id)
+
+
+def invalidate_relationship(relationship_id: str):
+    get_loaders().relationships.clear(relationship_id)
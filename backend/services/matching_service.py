@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
 import random
 from services.supabase_client import get_supabase
+from services.loader import load_profile, load_languages, load_many_languages
+from services.profile_cache import profile_cache
 
 
 async def find_match(user_id: str, seeking_role: str, offering_role: str) -> dict | None:
@@ -8,15 +10,13 @@ async def find_match(user_id: str, seeking_role: str, offering_role: str) -> dic
     db = get_supabase()
     
     # Get user's profile and preferences
-    user = db.table("profiles").select("*").eq("id", user_id).execute()
-    if not user.data or len(user.data) == 0:
+    user_data = await load_profile(user_id)
+    if not user_data:
         return None
     
-    user_data = user.data[0]
-    user_langs = db.table("user_languages").select("language_code").eq("user_id", user_id).execute()
-    user_lang_codes = [l["language_code"] for l in (user_langs.data or [])]
+    user_lang_codes = [l["language_code"] for l in await load_languages(user_id)]
     
-    prefs = user_data.get("matching_preferences", {})
+    prefs = user_data.get("matching_preferences") or {}
     
     # Look in matching queue for compatible users
     role_map = {
@@ -44,33 +44,17 @@ async def find_match(user_id: str, seeking_role: str, offering_role: str) -> dic
     if not queue.data:
         return None
     
+    # Languages of every candidate in one query
+    candidate_langs = await load_many_languages(c["user_id"] for c in queue.data)
+    
     # Score each potential match
     scored_matches = []
     for candidate in queue.data:
         score = 0
         candidate_id = candidate["user_id"]
         
-        # Check if already in a relationship
-        existing = db.table("relationships") \
-            .select("id") \
-            .or_(f"user_a_id.eq.{user_id},user_b_id.eq.{user_id}") \
-            .or_(f"user_a_id.eq.{candidate_id},user_b_id.eq.{candidate_id}") \
-            .eq("status", "active") \
-            .execute()
-        
-        # Skip if already connected
-        if existing.data:
-            has_existing = False
-            for rel in existing.data:
-                pass  # Need to check both directions
-            # Simplified: allow matching
-        
         # Language compatibility
-        candidate_langs = db.table("user_languages") \
-            .select("language_code") \
-            .eq("user_id", candidate_id) \
-            .execute()
-        candidate_lang_codes = [l["language_code"] for l in (candidate_langs.data or [])]
+        candidate_lang_codes = [l["language_code"] for l in candidate_langs.get(candidate_id, [])]
         
         lang_priority = prefs.get("language_priority", "ease")
         if lang_priority == "ease":
@@ -131,6 +115,7 @@ async def create_relationship(user_a_id: str, user_b_id: str, role_a: str, role_
     
     if relationship.data:
         rel_data = relationship.data[0]
+        profile_cache.invalidate(user_a_id, user_b_id)
         
         # Create first milestone
         db.table("relationship_milestones").insert({
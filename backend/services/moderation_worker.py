@@ -0,0 +1,411 @@
+"""Moderation worker pool.
+
+Consumes `moderation_queue`: items are claimed most-urgent-first through
+the `claim_moderation_items` RPC (FOR UPDATE SKIP LOCKED, see
+supabase/add_moderation_worker.sql), so any number of workers and
+instances can run side by side. Each item gets the automated checks —
+a keyword scan (services/content_screening.py) of the reported user's
+message history, read in keyset-paginated pages so memory stays flat —
+and the outcome is recorded in `moderation_decisions`:
+
+  escalate  high-severity findings: priority raised to 'urgent', the
+            relationship is paused, left for a human moderator
+  flag      medium-severity findings: left for a human moderator
+  clear     nothing found: content reviews are closed, reports still go
+            to a human moderator (reports are never dismissed automatically)
+
+Items left for a human go back to status 'pending' with `auto_decision`
+set, which is what moderators work from; the claim RPC only hands out
+pending items without an `auto_decision`. Items with no automated check
+(verification reviews) get 'manual'. An item whose check fails is retried
+until it has been claimed MODERATION_MAX_ATTEMPTS times, then handed to a
+human as 'failed'.
+
+At most MODERATION_WORKER_CONCURRENCY items are processed at once.
+`screening_batcher` feeds the queue with hits from chat screening.
+"""
+
+import asyncio
+import os
+import socket
+import time
+from collections import Counter, deque
+from datetime import datetime
+from config import get_settings
+from services.supabase_client import get_supabase
+from services.content_screening import scan_text, max_severity, QUEUE_PRIORITY
+
+PRIORITY_ORDER = ["low", "normal", "high", "urgent"]
+MAX_SAMPLES = 10
+
+
+class ModerationMetrics:
+    """In-process throughput counters for the worker pool."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.claimed = 0
+        self.processed = 0
+        self.failed = 0
+        self.messages_scanned = 0
+        self.decisions = Counter()
+        self.total_processing_ms = 0.0
+        self.max_queue_lag_seconds = 0.0
+        self._recent = deque(maxlen=1000)  # completion times for the rolling rate
+
+    def record(self, decision: str, duration_ms: float, scanned: int, lag_seconds: float | None):
+        self.processed += 1
+        self.decisions[decision] += 1
+        self.total_processing_ms += duration_ms
+        self.messages_scanned += scanned
+        if lag_seconds is not None:
+            self.max_queue_lag_seconds = max(self.max_queue_lag_seconds, lag_seconds)
+        self._recent.append(time.monotonic())
+
+    def snapshot(self, in_flight: int, concurrency: int) -> dict:
+        now = time.monotonic()
+        uptime = max(now - self.started_at, 1e-9)
+        last_minute = sum(1 for t in self._recent if now - t <= 60)
+        return {
+            "uptime_seconds": round(uptime, 1),
+            "concurrency": concurrency,
+            "in_flight": in_flight,
+            "claimed": self.claimed,
+            "processed": self.processed,
+            "failed": self.failed,
+            "decisions": dict(self.decisions),
+            "messages_scanned": self.messages_scanned,
+            "items_per_minute": round(self.processed / uptime * 60, 2),
+            "items_last_minute": last_minute,
+            "avg_processing_ms": round(self.total_processing_ms / self.processed, 1) if self.processed else 0.0,
+            "max_queue_lag_seconds": round(self.max_queue_lag_seconds, 1),
+        }
+
+
+def _parse_ts(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class ModerationWorkerPool:
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.metrics = ModerationMetrics()
+        self.in_flight = 0
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._workers: set[asyncio.Task] = set()
+
+    # ─── Automated checks ─────────────────────────────────────────────────────
+
+    def scan_history(self, user_id: str, relationship_id: str | None) -> tuple[Counter, list[dict], int]:
+        """Keyword-scan a user's messages page by page.
+
+        Returns (hits per category, a few sample hits, messages scanned).
+        """
+        settings = get_settings()
+        page_size = settings.MODERATION_SCAN_PAGE_SIZE
+        db = get_supabase()
+
+        categories = Counter()
+        samples = []
+        scanned = 0
+        cursor = None
+
+        while scanned < settings.MODERATION_SCAN_MAX_MESSAGES:
+            query = db.table("messages") \
+                .select("id, created_at, original_text, translated_text") \
+                .eq("sender_id", user_id)
+            if relationship_id:
+                query = query.eq("relationship_id", relationship_id)
+            if cursor:
+                ts, last_id = cursor
+                query = query.or_(f'created_at.gt."{ts}",and(created_at.eq."{ts}",id.gt.{last_id})')
+            page = query.order("created_at").order("id").limit(page_size).execute()
+            rows = page.data or []
+
+            for msg in rows:
+                hits = scan_text(msg.get("original_text")) + scan_text(msg.get("translated_text"))
+                for category, term in hits:
+                    categories[category] += 1
+                    if len(samples) < MAX_SAMPLES:
+                        samples.append({"message_id": msg["id"], "category": category, "term": term})
+
+            scanned += len(rows)
+            if len(rows) < page_size:
+                break
+            cursor = (rows[-1]["created_at"], rows[-1]["id"])
+
+        return categories, samples, scanned
+
+    def _check_report(self, item: dict) -> tuple[Counter, list[dict], int, dict | None]:
+        db = get_supabase()
+        report = db.table("reports").select("*").eq("id", item["reference_id"]).execute()
+        report_data = report.data[0] if report.data else None
+
+        relationship_id = report_data.get("relationship_id") if report_data else None
+        categories, samples, scanned = self.scan_history(item["user_id"], relationship_id)
+        return categories, samples, scanned, report_data
+
+    def _check_message(self, item: dict) -> tuple[Counter, list[dict], int]:
+        db = get_supabase()
+        msg = db.table("messages") \
+            .select("id, original_text, translated_text") \
+            .eq("id", item["reference_id"]) \
+            .execute()
+        categories = Counter()
+        samples = []
+        for row in (msg.data or []):
+            for category, term in scan_text(row.get("original_text")) + scan_text(row.get("translated_text")):
+                categories[category] += 1
+                samples.append({"message_id": row["id"], "category": category, "term": term})
+        return categories, samples[:MAX_SAMPLES], len(msg.data or [])
+
+    def process(self, item: dict) -> str:
+        """Run the automated checks for one claimed item and record the decision."""
+        started = time.perf_counter()
+        db = get_supabase()
+        report_data = None
+
+        if item["queue_type"] == "report_review" and item.get("reference_id"):
+            categories, samples, scanned, report_data = self._check_report(item)
+        elif item.get("reference_type") == "message" and item.get("reference_id"):
+            categories, samples, scanned = self._check_message(item)
+        else:
+            # Verification reviews etc. have no automated check
+            db.table("moderation_queue").update({
+                "status": "pending",
+                "claimed_by": None,
+                "claimed_at": None,
+                "auto_decision": "manual",
+            }).eq("id", item["id"]).execute()
+            self.metrics.record("manual", (time.perf_counter() - started) * 1000, 0, None)
+            return "manual"
+
+        severity = max_severity(categories)
+        decision = {"high": "escalate", "medium": "flag"}.get(severity, "clear")
+        summary = ", ".join(f"{c}×{n}" for c, n in categories.most_common()) or "no keyword hits"
+
+        update = {
+            "status": "pending",
+            "auto_decision": decision,
+            "claimed_by": None,
+            "claimed_at": None,
+            "notes": f"Automated check ({scanned} messages): {summary}",
+        }
+        if decision == "escalate":
+            update["priority"] = "urgent"
+        elif decision == "flag" and PRIORITY_ORDER.index(item.get("priority") or "normal") < PRIORITY_ORDER.index("high"):
+            update["priority"] = "high"
+        if decision == "clear" and item["queue_type"] != "report_review":
+            update["status"] = "completed"
+            update["completed_at"] = datetime.utcnow().isoformat()
+
+        db.table("moderation_queue").update(update).eq("id", item["id"]).execute()
+
+        if report_data:
+            db.table("reports").update({
+                "status": "reviewing",
+                "action_taken": "monitoring" if decision != "clear" else None,
+            }).eq("id", report_data["id"]).execute()
+            if decision == "escalate" and report_data.get("relationship_id"):
+                db.table("relationships") \
+                    .update({"status": "paused"}) \
+                    .eq("id", report_data["relationship_id"]) \
+                    .eq("status", "active") \
+                    .execute()
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        db.table("moderation_decisions").insert({
+            "queue_item_id": item["id"],
+            "user_id": item["user_id"],
+            "decision": decision,
+            "findings": {"categories": dict(categories), "samples": samples},
+            "messages_scanned": scanned,
+            "duration_ms": int(duration_ms),
+            "worker": self.worker_id,
+        }).execute()
+
+        created = _parse_ts(item.get("created_at"))
+        lag = (datetime.now(created.tzinfo) - created).total_seconds() if created else None
+        self.metrics.record(decision, duration_ms, scanned, lag)
+        return decision
+
+    def _release(self, item: dict, error: Exception):
+        """Return an item to the queue after a failed check, or hand it to a
+        human once it has used up its attempts."""
+        update = {"status": "pending", "claimed_by": None, "claimed_at": None}
+        attempts = item.get("attempts") or 1
+        if attempts >= get_settings().MODERATION_MAX_ATTEMPTS:
+            update["auto_decision"] = "failed"
+            update["notes"] = f"Automated check failed after {attempts} attempts: {error}"[:500]
+            print(f"[Moderation] Item {item['id']} failed {attempts} times, left for a moderator")
+        get_supabase().table("moderation_queue").update(update).eq("id", item["id"]).execute()
+
+    # ─── Pool ─────────────────────────────────────────────────────────────────
+
+    def _claim(self, limit: int) -> list[dict]:
+        result = get_supabase().rpc("claim_moderation_items", {
+            "p_worker": self.worker_id,
+            "p_limit": limit,
+            "p_lease_seconds": get_settings().MODERATION_LEASE_SECONDS,
+            "p_max_attempts": get_settings().MODERATION_MAX_ATTEMPTS,
+        }).execute()
+        return result.data or []
+
+    async def _handle(self, item: dict, semaphore: asyncio.Semaphore):
+        try:
+            await asyncio.to_thread(self.process, item)
+        except Exception as exc:
+            self.metrics.failed += 1
+            print(f"[Moderation] Item {item['id']} failed: {exc}")
+            try:
+                await asyncio.to_thread(self._release, item, exc)
+            except Exception:
+                pass
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+            self._wake.set()
+
+    async def _run(self):
+        settings = get_settings()
+        concurrency = max(1, settings.MODERATION_WORKER_CONCURRENCY)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        while True:
+            # Wait for a free slot, then claim as many items as there are free slots
+            await semaphore.acquire()
+            free = 1
+            while free < concurrency and not semaphore.locked():
+                await semaphore.acquire()
+                free += 1
+
+            try:
+                items = await asyncio.to_thread(self._claim, free)
+            except Exception as exc:
+                print(f"[Moderation] Claim failed: {exc}")
+                items = []
+
+            for _ in range(free - len(items)):
+                semaphore.release()
+
+            self.metrics.claimed += len(items)
+            for item in items:
+                self.in_flight += 1
+                task = asyncio.create_task(self._handle(item, semaphore))
+                self._workers.add(task)
+                task.add_done_callback(self._workers.discard)
+
+            if not items:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), settings.MODERATION_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    def notify(self):
+        """Wake the pool now instead of at the next poll (e.g. after a report)."""
+        self._wake.set()
+
+    def metrics_snapshot(self) -> dict:
+        return self.metrics.snapshot(self.in_flight, get_settings().MODERATION_WORKER_CONCURRENCY)
+
+    def start(self):
+        if not get_settings().MODERATION_WORKER_ENABLED:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop claiming and let in-flight items finish."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+
+
+moderation_pool = ModerationWorkerPool()
+
+
+class ScreeningBatcher:
+    """Buffers chat screening hits and writes them to moderation_queue in batches.
+
+    A batch is written every `flush_interval` seconds or as soon as
+    `batch_size` hits are waiting; the worker pool is woken after each write.
+    """
+
+    def __init__(self, batch_size: int = 50, flush_interval: float = 2.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: list[dict] = []
+        self._task: asyncio.Task | None = None
+        self._full = asyncio.Event()
+
+    def submit(self, message: dict, result: dict):
+        """Queue a screened message for review (non-blocking)."""
+        terms = ", ".join(result["terms"][:5])
+        self._buffer.append({
+            "user_id": message["sender_id"],
+            "queue_type": "content_review",
+            "priority": QUEUE_PRIORITY.get(result["severity"], "normal"),
+            "reference_id": message["id"],
+            "reference_type": "message",
+            "status": "pending",
+            "notes": f"Screening: {', '.join(result['categories']) or 'scan incomplete'}" + (f" ({terms})" if terms else ""),
+        })
+        if len(self._buffer) >= self.batch_size:
+            self._full.set()
+
+    def flush(self) -> int:
+        batch, self._buffer = self._buffer, []
+        if batch:
+            try:
+                get_supabase().table("moderation_queue").insert(batch).execute()
+            except Exception:
+                # Keep the hits for the next flush
+                self._buffer[:0] = batch
+                raise
+        return len(batch)
+
+    async def _flush_now(self):
+        try:
+            if await asyncio.to_thread(self.flush):
+                moderation_pool.notify()
+        except Exception as exc:
+            print(f"[Screening] Flush failed: {exc}")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self._flush_now()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._flush_now()
+
+
+screening_batcher = ScreeningBatcher()
@@ -0,0 +1,78 @@
+"""Read-through cache for public profile views.
+
+`GET /profiles/{user_id}` assembles a profile, its languages, achievements
+and active relationship count from four queries. Profiles are viewed (chat
+headers, partner cards, browse) far more often than they change, so the
+assembled payload is kept in an in-process LRU for PROFILE_CACHE_TTL_SECONDS.
+
+Handlers that change a profile call `profile_cache.invalidate(user_id)`.
+Invalidation is per instance; on other instances a stale entry lives at most
+one TTL, which also bounds staleness from changes made outside the routers
+(achievement unlocks, bond points, relationships starting or ending).
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any
+from config import get_settings
+
+
+class ProfileCache:
+    def __init__(self):
+        # user_id -> (payload, expires_at)
+        self._entries: "OrderedDict[str, tuple[Any, float]]" = OrderedDict()
+        # Bumped on invalidation so a rebuild that started before a write
+        # doesn't store what it read
+        self._generations: dict[str, int] = {}
+        self._epoch = 0
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "invalidations": 0, "stale_writes": 0}
+
+    def get(self, user_id: str) -> Any | None:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            payload, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return payload
+            self._entries.pop(user_id, None)
+            self.stats["expired"] += 1
+        self.stats["misses"] += 1
+        return None
+
+    def generation(self, user_id: str) -> tuple[int, int]:
+        """Token to pass to `set()` for a payload about to be built."""
+        return self._epoch, self._generations.get(user_id, 0)
+
+    def set(self, user_id: str, payload: Any, generation: tuple[int, int]):
+        if self.generation(user_id) != generation:
+            self.stats["stale_writes"] += 1
+            return
+        settings = get_settings()
+        self._entries[user_id] = (payload, time.monotonic() + settings.PROFILE_CACHE_TTL_SECONDS)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > settings.PROFILE_CACHE_SIZE:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids: str):
+        for user_id in user_ids:
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self.stats["invalidations"] += 1
+        # Generations only matter for rebuilds in flight; forget old ones
+        # (a new epoch makes every in-flight rebuild skip its write)
+        if len(self._generations) > get_settings().PROFILE_CACHE_SIZE:
+            self._generations.clear()
+            self._epoch += 1
+
+    def metrics(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+            "ttl_seconds": get_settings().PROFILE_CACHE_TTL_SECONDS,
+        }
+
+
+profile_cache = ProfileCache()
@@ -0,0 +1,196 @@
+"""Streaming speech-to-text sessions.
+
+A session takes audio chunks as they arrive and yields transcript events
+while the user is still speaking:
+
+    {"type": "transcript", "is_final": False, "text": "hello how",
+     "confidence": 0.91, "language": "en"}
+
+Backends implement `STTStream`:
+- DeepgramStream relays audio to Deepgram's live /v1/listen WebSocket;
+- FakeSTTStream transcribes nothing but produces a deterministic
+  interim/final sequence from the audio it receives, for local development
+  and tests (STT_STREAM_BACKEND="fake").
+
+`open_stt_stream()` picks the configured backend.
+"""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+from urllib.parse import urlencode
+from config import get_settings
+from services.vendor_client import deepgram
+
+DEEPGRAM_LIVE_URL = "wss://api.deepgram.com/v1/listen"
+
+
+class STTError(Exception):
+    """The streaming backend could not be reached or failed mid-stream."""
+
+
+class STTStream(ABC):
+    """One streaming transcription session."""
+
+    @abstractmethod
+    async def send(self, chunk: bytes):
+        """Forward a chunk of audio."""
+
+    @abstractmethod
+    async def finish(self):
+        """No more audio; the backend flushes its final results."""
+
+    @abstractmethod
+    def events(self) -> AsyncIterator[dict]:
+        """Transcript events until the session ends."""
+
+    @abstractmethod
+    async def close(self):
+        """Release the session (safe to call more than once)."""
+
+
+class DeepgramStream(STTStream):
+    def __init__(self, connection, language: str | None):
+        self._ws = connection
+        self._language = language
+
+    @classmethod
+    async def connect(cls, language: str | None, encoding: str | None, sample_rate: int | None) -> "DeepgramStream":
+        import websockets
+
+        api_key = get_settings().DEEPGRAM_API_KEY
+        if not api_key:
+            raise STTError("Deepgram API key not configured")
+
+        params = {
+            "model": "nova-2",
+            "punctuate": "true",
+            "smart_format": "true",
+            "interim_results": "true",
+        }
+        if language:
+            params["language"] = language
+        else:
+            params["detect_language"] = "true"
+        # Containerized audio (webm/ogg) is self-describing; raw PCM is not
+        if encoding:
+            params["encoding"] = encoding
+            params["sample_rate"] = str(sample_rate or 16000)
+
+        url = f"{DEEPGRAM_LIVE_URL}?{urlencode(params)}"
+        headers = {"Authorization": f"Token {api_key}"}
+
+        async def attempt(timeout: float):
+            try:
+                return await websockets.connect(url, additional_headers=headers, open_timeout=timeout)
+            except TypeError:
+                # websockets < 14 (legacy client)
+                return await websockets.connect(url, extra_headers=headers, open_timeout=timeout)
+
+        # Shares the REST client's breaker: a Deepgram outage fails both fast
+        try:
+            connection = await deepgram.call(attempt, timeout=10, adaptive=False)
+        except Exception as exc:
+            print(f"[Deepgram STT stream] Connect failed: {exc}")
+            raise STTError("Could not reach the transcription service")
+        return cls(connection, language)
+
+    async def send(self, chunk: bytes):
+        try:
+            await self._ws.send(chunk)
+        except Exception as exc:
+            raise STTError(f"Transcription stream closed: {exc}")
+
+    async def finish(self):
+        try:
+            await self._ws.send(json.dumps({"type": "CloseStream"}))
+        except Exception:
+            pass
+
+    async def events(self) -> AsyncIterator[dict]:
+        try:
+            async for raw in self._ws:
+                if isinstance(raw, bytes):
+                    continue
+                message = json.loads(raw)
+                if message.get("type") != "Results":
+                    continue
+                channel = message.get("channel", {})
+                alt = (channel.get("alternatives") or [{}])[0]
+                if not alt.get("transcript"):
+                    continue
+                yield {
+                    "type": "transcript",
+                    "is_final": bool(message.get("is_final")),
+                    "text": alt["transcript"],
+                    "confidence": alt.get("confidence", 0),
+                    "language": (channel.get("detected_language") or self._language or "en"),
+                }
+        except Exception as exc:
+            # A normal close just ends the iteration
+            print(f"[Deepgram STT stream] {exc}")
+            raise STTError("Transcription stream failed")
+
+    async def close(self):
+        try:
+            await self._ws.close()
+        except Exception:
+            pass
+
+
+class FakeSTTStream(STTStream):
+    """Deterministic stand-in: one word per `bytes_per_word` of audio.
+
+    Emits an interim transcript whenever a new word "arrives" and a final
+    one when the client finishes, so clients and tests can exercise the
+    whole protocol without a vendor account.
+    """
+
+    WORDS = ("this", "is", "a", "test", "transcript")
+
+    def __init__(self, language: str | None = None, bytes_per_word: int = 4000):
+        self._language = language or "en"
+        self._bytes_per_word = bytes_per_word
+        self._received = 0
+        self._words: list[str] = []
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def _text(self) -> str:
+        return " ".join(self._words)
+
+    async def send(self, chunk: bytes):
+        self._received += len(chunk)
+        while len(self._words) < self._received // self._bytes_per_word:
+            self._words.append(self.WORDS[len(self._words) % len(self.WORDS)])
+            await self._queue.put({
+                "type": "transcript", "is_final": False, "text": self._text(),
+                "confidence": 0.5, "language": self._language,
+            })
+
+    async def finish(self):
+        if self._words:
+            await self._queue.put({
+                "type": "transcript", "is_final": True, "text": self._text(),
+                "confidence": 0.99, "language": self._language,
+            })
+        await self._queue.put(None)
+
+    async def events(self) -> AsyncIterator[dict]:
+        while (event := await self._queue.get()) is not None:
+            yield event
+
+    async def close(self):
+        self._queue.put_nowait(None)
+
+
+async def open_stt_stream(
+    language: str | None = None,
+    encoding: str | None = None,
+    sample_rate: int | None = None,
+) -> STTStream:
+    """Open a session on the configured backend; raises STTError."""
+    backend = get_settings().STT_STREAM_BACKEND
+    if backend == "fake":
+        return FakeSTTStream(language)
+    return await DeepgramStream.connect(language, encoding, sample_rate)
@@ -28,3 +28,15 @@ def get_auth_client() -> Client:
             settings.SUPABASE_ANON_KEY
         )
     return _supabase_auth
+
+
+def rpc_missing(exc: Exception) -> bool:
+    """Whether a failed `rpc()` call means the function isn't installed
+    (PostgREST PGRST202, or Postgres undefined_function 42883)."""
+    code = getattr(exc, "code", None)
+    return code in ("PGRST202", "42883") or "PGRST202" in str(exc)
+
+
+def unique_violation(exc: Exception) -> bool:
+    """Whether a failed write hit a unique constraint (Postgres 23505)."""
+    return getattr(exc, "code", None) == "23505" or "23505" in str(exc)
@@ -5,11 +5,18 @@ Replaces the old OpenAI-based service. Uses:
   - Regex-based pattern matching for fact extraction (no LLM needed)
 """
 
+import asyncio
+import contextlib
 import httpx
 import json
 import re
-from typing import Optional
+from typing import Awaitable, Callable, Optional, TypeVar
 from config import get_settings
+from services.vendor_client import (
+    google_translate, VendorError, VendorUnavailable, bulk_priority, current_priority, BULK,
+)
+
+T = TypeVar("T")
 
 # ─── Idioms database for nuance detection ──────────────────────────────────────
 COMMON_IDIOMS = {
@@ -149,8 +156,14 @@ async def translate_text(
             idiom_explanation = explanation
             break
 
-    # Translate with Google
-    translated = await _translate_with_google(text, source_lang, target_lang)
+    # Translate with Google; identical concurrent calls share one request
+    if get_settings().TRANSLATE_COALESCE_ENABLED:
+        translated = await translation_flights.do(
+            (text, source_lang, target_lang, current_priority()),
+            lambda: _translate_with_google(text, source_lang, target_lang),
+        )
+    else:
+        translated = await _translate_with_google(text, source_lang, target_lang)
 
     cultural_note = None
     if idiom_found:
@@ -174,42 +187,221 @@ GOOGLE_TRANSLATE_URL = "https://translation.googleapis.com/language/translate/v2
 GOOGLE_DETECT_URL = "https://translation.googleapis.com/language/translate/v2/detect"
 
 
+class SingleFlight:
+    """Shares one in-flight call among concurrent calls with the same key.
+
+    The first caller starts the call; callers arriving before it finishes
+    await the same result instead of sending their own request. A caller
+    that is cancelled doesn't cancel the shared call for the others. Results
+    aren't kept once the call finishes — a result cache would be checked
+    before this.
+    """
+
+    def __init__(self):
+        self._calls: dict[tuple, asyncio.Task] = {}
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    async def do(self, key: tuple, fn: Callable[[], Awaitable[T]]) -> T:
+        self.stats["calls"] += 1
+        task = self._calls.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: tuple, task: asyncio.Task):
+        self._calls.pop(key, None)
+        # Mark the error retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def metrics(self) -> dict:
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "coalesced_ratio": round(self.stats["coalesced"] / calls, 4) if calls else None,
+            "in_flight": len(self._calls),
+        }
+
+
+translation_flights = SingleFlight()
+detection_flights = SingleFlight()
+
+
 async def _translate_with_google(
     text: str,
     source_lang: str,
     target_lang: str,
 ) -> str:
-    """Call Google Cloud Translation API v2 to translate text."""
-    api_key = get_settings().GOOGLE_TRANSLATE_API_KEY
-    if not api_key:
+    """Call Google Cloud Translation API v2 to translate text.
+
+    Concurrent calls for the same language pair are batched into one
+    request by `translation_batcher` (TRANSLATE_BATCH_ENABLED).
+    """
+    if not get_settings().GOOGLE_TRANSLATE_API_KEY:
         return f"[Translation unavailable] {text}"
+    if get_settings().TRANSLATE_BATCH_ENABLED:
+        return await translation_batcher.translate(text, source_lang, target_lang)
+    return (await _translate_many_with_google([text], source_lang, target_lang))[0]
 
-    try:
+
+async def _translate_many_with_google(
+    texts: list[str],
+    source_lang: str,
+    target_lang: str,
+) -> list[str]:
+    """Translate several texts in one Google v2 request (one `q` per text).
+
+    Goes through the google_translate vendor (services/vendor_client.py):
+    while Google is failing the breaker returns the fallback immediately
+    instead of every chat message waiting out the timeout.
+    """
+    api_key = get_settings().GOOGLE_TRANSLATE_API_KEY
+
+    async def attempt(timeout: float) -> list[str] | None:
         async with httpx.AsyncClient() as client:
             resp = await client.post(
                 GOOGLE_TRANSLATE_URL,
                 params={"key": api_key},
                 json={
-                    "q": text,
+                    "q": texts,
                     "source": source_lang,
                     "target": target_lang,
                     "format": "text",
                 },
-                timeout=15,
+                timeout=timeout,
             )
 
             if resp.status_code == 200:
                 data = resp.json()
                 translations = data.get("data", {}).get("translations", [])
-                if translations:
-                    return translations[0].get("translatedText", text)
+                if len(translations) == len(texts):
+                    return [t.get("translatedText", text) for t, text in zip(translations, texts)]
 
             print(f"[Google Translate] {resp.status_code}: {resp.text[:200]}")
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise VendorError(f"HTTP {resp.status_code}")
+            return None
 
+    try:
+        translated = await google_translate.call(attempt, timeout=15, hedge=True)
+        if translated is not None:
+            return translated
+    except VendorUnavailable:
+        pass
     except Exception as exc:
         print(f"[Google Translate] Exception: {exc}")
 
-    return f"[Translation pending] {text}"
+    return [f"[Translation pending] {text}" for text in texts]
+
+
+class TranslationBatcher:
+    """Coalesces concurrent translations per (source, target) language pair.
+
+    The first text for a pair starts a TRANSLATE_BATCH_WINDOW_MS timer; texts
+    arriving before it fires join the batch, which is sent early once it
+    holds TRANSLATE_BATCH_MAX_ITEMS texts or TRANSLATE_BATCH_MAX_CHARS
+    characters. Each caller awaits its own future.
+
+    With TRANSLATE_BATCH_MAX_IN_FLIGHT requests already out for a pair, the
+    window closing doesn't send: the batch keeps filling until one of them
+    finishes, so batches grow with load instead of queueing for Google's
+    request slots one small batch at a time. Batches are also kept apart by
+    vendor priority, so bulk work never delays a chat message.
+    """
+
+    def __init__(self):
+        # (source, target, priority) -> [(text, future)]
+        self._pending: dict[tuple, list[tuple[str, asyncio.Future]]] = {}
+        self._chars: dict[tuple, int] = {}
+        self._timers: dict[tuple, asyncio.TimerHandle] = {}
+        self._in_flight: dict[tuple, int] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.stats = {"requests": 0, "batches": 0, "largest_batch": 0}
+
+    async def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        settings = get_settings()
+        loop = asyncio.get_running_loop()
+        key = (source_lang, target_lang, current_priority())
+        if self._chars.get(key, 0) + len(text) > settings.TRANSLATE_BATCH_MAX_CHARS:
+            self._flush(key)
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((text, future))
+        self._chars[key] = self._chars.get(key, 0) + len(text)
+        self.stats["requests"] += 1
+
+        if len(batch) >= settings.TRANSLATE_BATCH_MAX_ITEMS or self._chars[key] >= settings.TRANSLATE_BATCH_MAX_CHARS:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(settings.TRANSLATE_BATCH_WINDOW_MS / 1000, self._window_closed, key)
+        return await future
+
+    def _window_closed(self, key: tuple):
+        self._timers.pop(key, None)
+        # Otherwise the next send to finish flushes it
+        if self._in_flight.get(key, 0) < get_settings().TRANSLATE_BATCH_MAX_IN_FLIGHT:
+            self._flush(key)
+
+    def _flush(self, key: tuple):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        self._chars.pop(key, None)
+        if not batch:
+            return
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        task = asyncio.create_task(self._send(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, key: tuple, batch: list[tuple[str, asyncio.Future]]):
+        source_lang, target_lang, priority = key
+        texts = [text for text, _ in batch]
+        try:
+            with bulk_priority() if priority == BULK else contextlib.nullcontext():
+                results = await _translate_many_with_google(texts, source_lang, target_lang)
+        except Exception as exc:
+            print(f"[Google Translate] Batch failed: {exc}")
+            results = [f"[Translation pending] {text}" for text in texts]
+        finally:
+            self._in_flight[key] -= 1
+            if not self._in_flight[key]:
+                del self._in_flight[key]
+            if key in self._pending and key not in self._timers:
+                self._flush(key)
+
+        for (_, future), result in zip(batch, results):
+            # Callers that gave up (cancelled) are skipped
+            if not future.done():
+                future.set_result(result)
+
+    def metrics(self) -> dict:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "avg_batch_size": round(self.stats["requests"] / batches, 2) if batches else None,
+            "pending": sum(map(len, self._pending.values())),
+        }
+
+
+translation_batcher = TranslationBatcher()
+
+
+def get_translation_metrics() -> dict:
+    return {
+        "batching": translation_batcher.metrics(),
+        "coalescing": {
+            "translate": translation_flights.metrics(),
+            "detect": detection_flights.metrics(),
+        },
+    }
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -217,18 +409,27 @@ async def _translate_with_google(
 # ═══════════════════════════════════════════════════════════════════════════════
 
 async def detect_language(text: str) -> str:
-    """Detect the language of *text* using Google Translate v2 /detect."""
+    """Detect the language of *text* using Google Translate v2 /detect.
+
+    Identical concurrent detections share one request.
+    """
+    if get_settings().TRANSLATE_COALESCE_ENABLED:
+        return await detection_flights.do((text, current_priority()), lambda: _detect_with_google(text))
+    return await _detect_with_google(text)
+
+
+async def _detect_with_google(text: str) -> str:
     api_key = get_settings().GOOGLE_TRANSLATE_API_KEY
     if not api_key:
         return "en"
 
-    try:
+    async def attempt(timeout: float) -> str | None:
         async with httpx.AsyncClient() as client:
             resp = await client.post(
                 GOOGLE_DETECT_URL,
                 params={"key": api_key},
                 json={"q": text},
-                timeout=10,
+                timeout=timeout,
             )
 
             if resp.status_code == 200:
@@ -236,7 +437,16 @@ async def detect_language(text: str) -> str:
                 detections = data.get("data", {}).get("detections", [])
                 if detections and detections[0]:
                     return detections[0][0].get("language", "en")
+            elif resp.status_code == 429 or resp.status_code >= 500:
+                raise VendorError(f"HTTP {resp.status_code}")
+            return None
 
+    try:
+        language = await google_translate.call(attempt, timeout=10, hedge=True)
+        if language:
+            return language
+    except VendorUnavailable:
+        pass
     except Exception as exc:
         print(f"[Google Detect] Exception: {exc}")
 
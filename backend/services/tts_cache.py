@@ -0,0 +1,189 @@
+"""Content-addressed cache for synthesized speech.
+
+Audio is keyed by the SHA-256 of (text, language, voice_id, output_format)
+plus the encoding settings (TTS_SAMPLE_RATE, TTS_MP3_BIT_RATE), so the same
+greeting, game prompt or contest question is synthesized once and then
+served from:
+
+- memory: an LRU of clips up to TTS_CACHE_MEMORY_BYTES in total;
+- disk: one file per clip under TTS_CACHE_DIR, read through mmap so range
+  requests only touch the pages they need, evicted least-recently-used
+  once the directory passes TTS_CACHE_DISK_BYTES.
+
+The key doubles as the ETag. Disk reads and writes happen in a worker thread.
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from config import get_settings
+
+EXTENSIONS = {"audio/mpeg": "mp3", "audio/wav": "wav"}
+CONTENT_TYPES = {ext: ct for ct, ext in EXTENSIONS.items()}
+
+
+def cache_key(text: str, language: str, voice_id: str, output_format: str) -> str:
+    settings = get_settings()
+    # A clip encoded at another rate is different audio under the same ETag
+    encoding = f"{settings.TTS_SAMPLE_RATE}/{settings.TTS_MP3_BIT_RATE}"
+    raw = "\x1f".join((text, language, voice_id, output_format, encoding))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class TTSCache:
+    def __init__(self):
+        self._memory: "OrderedDict[str, tuple[bytes, str]]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> (filename, size), least recently used first
+        self._disk: "OrderedDict[str, tuple[str, int]]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_loaded = False
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    # ─── Disk index ───────────────────────────────────────────────────────
+
+    def _dir(self) -> str:
+        return get_settings().TTS_CACHE_DIR
+
+    def _load_disk_index(self):
+        """Index files left by a previous process, oldest access first."""
+        if self._disk_loaded:
+            return
+        self._disk_loaded = True
+        try:
+            os.makedirs(self._dir(), exist_ok=True)
+            entries = []
+            for entry in os.scandir(self._dir()):
+                key, _, ext = entry.name.partition(".")
+                if ext in CONTENT_TYPES and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_atime, key, entry.name, stat.st_size))
+        except OSError as e:
+            print(f"[TTSCache] Disk tier unavailable: {e}")
+            return
+        for _, key, name, size in sorted(entries):
+            self._disk[key] = (name, size)
+            self._disk_bytes += size
+
+    def _evict_disk(self):
+        limit = get_settings().TTS_CACHE_DISK_BYTES
+        while self._disk_bytes > limit and self._disk:
+            _, (name, size) = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(os.path.join(self._dir(), name))
+            except OSError:
+                pass
+
+    # ─── Memory tier ──────────────────────────────────────────────────────
+
+    def _remember(self, key: str, data: bytes, content_type: str):
+        limit = get_settings().TTS_CACHE_MEMORY_BYTES
+        if len(data) > limit // 4:
+            return
+        if key in self._memory:
+            return
+        self._memory[key] = (data, content_type)
+        self._memory_bytes += len(data)
+        while self._memory_bytes > limit:
+            _, (old, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old)
+
+    def _read_disk(self, key: str) -> tuple[bytes | mmap.mmap, str] | None:
+        """Disk-tier lookup; runs in a worker thread."""
+        with self._lock:
+            self._load_disk_index()
+            disk_entry = self._disk.get(key)
+            if disk_entry is not None:
+                self._disk.move_to_end(key)
+        if disk_entry is None:
+            return None
+
+        name, size = disk_entry
+        content_type = CONTENT_TYPES.get(name.partition(".")[2], "application/octet-stream")
+        try:
+            with open(os.path.join(self._dir(), name), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            with self._lock:
+                if self._disk.pop(key, None):
+                    self._disk_bytes -= size
+            return None
+
+        # Small clips are copied out so the caller can promote them to memory
+        if size <= get_settings().TTS_CACHE_MEMORY_BYTES // 64:
+            data = mapped[:]
+            mapped.close()
+            return data, content_type
+        return mapped, content_type
+
+    # ─── Public API ───────────────────────────────────────────────────────
+
+    async def get(self, key: str) -> tuple[bytes | mmap.mmap, str] | None:
+        """(audio, content_type) for a cached clip, or None.
+
+        Disk hits return an mmap; callers slice it (and should close it).
+        """
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return entry
+
+        entry = await asyncio.to_thread(self._read_disk, key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["disk_hits"] += 1
+        audio, content_type = entry
+        if isinstance(audio, bytes):
+            self._remember(key, audio, content_type)
+        return entry
+
+    def _write(self, key: str, data: bytes, content_type: str):
+        name = f"{key}.{EXTENSIONS.get(content_type, 'bin')}"
+        path = os.path.join(self._dir(), name)
+        with self._lock:
+            self._load_disk_index()
+            if key in self._disk:
+                return
+        try:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[TTSCache] Write failed: {e}")
+            return
+        with self._lock:
+            self._disk[key] = (name, len(data))
+            self._disk_bytes += len(data)
+            self._evict_disk()
+
+    async def put(self, key: str, data: bytes, content_type: str):
+        if not data or len(data) > get_settings().TTS_CACHE_MAX_ITEM_BYTES:
+            return
+        self.stats["stores"] += 1
+        self._remember(key, data, content_type)
+        await asyncio.to_thread(self._write, key, data, content_type)
+
+    def metrics(self) -> dict:
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "memory_items": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_items": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+        }
+
+
+tts_cache = TTSCache()
@@ -0,0 +1,412 @@
+"""Resilience layer for outbound vendor calls.
+
+Google Translate, Deepgram and Cartesia each get a `Vendor`:
+
+- circuit breaker: after VENDOR_BREAKER_FAILURES consecutive failures the
+  vendor is skipped for VENDOR_BREAKER_OPEN_SECONDS (calls raise
+  VendorUnavailable at once), then a single probe call is let through and
+  closes the breaker again if it succeeds;
+- adaptive timeout: VENDOR_TIMEOUT_P95_MULTIPLIER × the p95 of recent call
+  latencies, clamped between VENDOR_TIMEOUT_MIN_SECONDS and the caller's
+  static timeout. A timeout is recorded as a sample of its own length, so a
+  vendor that has really become slower pushes the limit back up;
+- hedging: an idempotent call still running after the recent p95 gets a
+  second identical attempt, and whichever succeeds first wins;
+- limits: at most <VENDOR>_MAX_CONCURRENCY requests in flight and
+  <VENDOR>_RATE_PER_SECOND started per second (token bucket). Calls over
+  the limit queue, interactive work ahead of bulk, and give up with
+  VendorOverloaded when their queueing deadline passes. Bulk work only
+  gets VENDOR_BULK_SHARE of the slots, so chat always finds headroom.
+
+Services wrap one HTTP request in `attempt(timeout)` and call
+`vendor.call(attempt, timeout=...)`. The attempt raises VendorError for
+responses that should count against the vendor (5xx, 429); any other
+exception counts too, except types listed in `passthrough`. Callers catch
+failures and return their usual fallback result straight away. A request
+whose body is streamed from our own client passes `body_sent`: the timeout
+and latency sample only start once it is set, so a slow uploader isn't
+blamed on the vendor.
+
+Calls are interactive unless made inside `with bulk_priority():` (the
+context is inherited by tasks the call starts).
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, TypeVar
+from config import get_settings
+
+T = TypeVar("T")
+
+# Latency samples needed before timeouts adapt and hedging starts
+MIN_SAMPLES = 20
+
+INTERACTIVE, BULK = 0, 1
+_priority: ContextVar[int] = ContextVar("vendor_priority", default=INTERACTIVE)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+@contextmanager
+def bulk_priority():
+    """Vendor calls made inside yield to interactive traffic."""
+    token = _priority.set(BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class VendorError(Exception):
+    """A vendor call failed in a way that counts against its breaker."""
+
+
+class VendorUnavailable(VendorError):
+    """The vendor's breaker is open; nothing was sent."""
+
+
+class VendorTimeout(VendorError):
+    """The call passed its (adaptive) timeout."""
+
+
+class VendorOverloaded(VendorUnavailable):
+    """No request slot freed up before the call's queueing deadline."""
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < get_settings().VENDOR_BREAKER_OPEN_SECONDS:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        # Half-open: one probe at a time
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def release(self):
+        """A probe ended without a verdict (cancelled, or a passthrough error)."""
+        self._probing = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> bool:
+        """Count a failure; True if this opened the breaker."""
+        self._probing = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (
+            self.state == self.CLOSED and self.failures >= get_settings().VENDOR_BREAKER_FAILURES
+        ):
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+
+class VendorLimiter:
+    """Concurrency cap plus token bucket, with a priority queue of waiters."""
+
+    def __init__(self, max_concurrency: int, rate: float):
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.tokens = float(max(1.0, rate))
+        self.in_flight = 0
+        self._updated = time.monotonic()
+        self._queues: tuple[deque, deque] = (deque(), deque())
+        self._timer: asyncio.TimerHandle | None = None
+        self.stats = {"admitted": 0, "queued": 0, "queue_timeouts": 0, "max_queue_depth": 0, "queue_wait_ms": 0.0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _can_admit(self, priority: int) -> bool:
+        slots = self.max_concurrency
+        if priority == BULK:
+            slots = max(1, int(slots * get_settings().VENDOR_BULK_SHARE))
+        if self.in_flight >= slots:
+            return False
+        self._refill()
+        return self.tokens >= 1
+
+    def _admit(self):
+        self.in_flight += 1
+        self.tokens -= 1
+        self.stats["admitted"] += 1
+
+    def _dispatch(self):
+        for priority, queue in enumerate(self._queues):
+            while queue and (queue[0].done() or self._can_admit(priority)):
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self._admit()
+                    waiter.set_result(None)
+            if queue:
+                # Bulk never overtakes a waiting interactive call
+                break
+        # Out of tokens with callers waiting: wake up when the next one accrues
+        if any(self._queues) and self.tokens < 1 and self._timer is None:
+            delay = (1 - self.tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def try_acquire(self, priority: int) -> bool:
+        """Take a slot only if one is free and nobody of equal or higher
+        priority is waiting for it."""
+        if any(self._queues[:priority + 1]) or not self._can_admit(priority):
+            return False
+        self._admit()
+        return True
+
+    async def acquire(self, priority: int, deadline: float):
+        """Wait up to `deadline` seconds for a slot; raises VendorOverloaded."""
+        if self.try_acquire(priority):
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        queue = self._queues[priority]
+        queue.append(waiter)
+        self.stats["queued"] += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], sum(map(len, self._queues)))
+        start = time.monotonic()
+        self._dispatch()
+        try:
+            await asyncio.wait_for(waiter, deadline)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as the deadline passed
+                self.release()
+            elif waiter in queue:
+                queue.remove(waiter)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            self.stats["queue_timeouts"] += 1
+            raise VendorOverloaded(f"no capacity within {deadline:.1f}s")
+        finally:
+            self.stats["queue_wait_ms"] += (time.monotonic() - start) * 1000
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def metrics(self) -> dict:
+        self._refill()
+        queued = self.stats["queued"]
+        return {
+            **{key: value for key, value in self.stats.items() if key != "queue_wait_ms"},
+            "avg_queue_wait_ms": round(self.stats["queue_wait_ms"] / queued, 1) if queued else 0.0,
+            "in_flight": self.in_flight,
+            "tokens": round(self.tokens, 2),
+            "queue_depth": {"interactive": len(self._queues[INTERACTIVE]), "bulk": len(self._queues[BULK])},
+        }
+
+
+class Vendor:
+    def __init__(self, name: str, settings_prefix: str):
+        self.name = name
+        self._settings_prefix = settings_prefix
+        self._limiter: VendorLimiter | None = None
+        self.breaker = CircuitBreaker()
+        self._latencies: deque[float] | None = None
+        self.stats = {
+            "calls": 0, "successes": 0, "failures": 0, "timeouts": 0,
+            "rejected": 0, "hedges": 0, "hedge_wins": 0,
+        }
+
+    @property
+    def limiter(self) -> VendorLimiter:
+        if self._limiter is None:
+            settings = get_settings()
+            self._limiter = VendorLimiter(
+                getattr(settings, f"{self._settings_prefix}_MAX_CONCURRENCY"),
+                getattr(settings, f"{self._settings_prefix}_RATE_PER_SECOND"),
+            )
+        return self._limiter
+
+    # ─── Latency tracking ─────────────────────────────────────────────────
+
+    def _samples(self) -> deque:
+        if self._latencies is None:
+            self._latencies = deque(maxlen=get_settings().VENDOR_LATENCY_WINDOW)
+        return self._latencies
+
+    def p95(self) -> float | None:
+        """Recent p95 latency in seconds (None until there are enough samples)."""
+        samples = self._samples()
+        if len(samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def timeout_for(self, ceiling: float) -> float:
+        p95 = self.p95()
+        if p95 is None:
+            return ceiling
+        settings = get_settings()
+        return min(ceiling, max(settings.VENDOR_TIMEOUT_MIN_SECONDS, p95 * settings.VENDOR_TIMEOUT_P95_MULTIPLIER))
+
+    # ─── Calls ────────────────────────────────────────────────────────────
+
+    async def _hedged(self, attempt: Callable[[float], Awaitable[T]], limit: float, delay: float) -> T:
+        first = asyncio.create_task(attempt(limit))
+        second = None
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done:
+                return first.result()
+            # A hedge is an extra request: only send it with capacity to spare
+            if not self.limiter.try_acquire(_priority.get()):
+                return await first
+            self.stats["hedges"] += 1
+            second = asyncio.create_task(attempt(limit))
+            second.add_done_callback(lambda _: self.limiter.release())
+            pending, error = {first, second}, None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in (first, second):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def call(
+        self,
+        attempt: Callable[[float], Awaitable[T]],
+        timeout: float,
+        adaptive: bool = True,
+        hedge: bool = False,
+        passthrough: tuple[type[BaseException], ...] = (),
+        body_sent: asyncio.Event | None = None,
+    ) -> T:
+        """Run `attempt(timeout)` under this vendor's breaker and timeouts.
+
+        Raises VendorUnavailable while the breaker is open, VendorOverloaded
+        if no request slot frees up in time, VendorTimeout past the timeout,
+        and otherwise whatever the attempt raised.
+        """
+        if not self.breaker.allow():
+            self.stats["rejected"] += 1
+            raise VendorUnavailable(f"{self.name} is unavailable (circuit open)")
+
+        probing = self.breaker.state == CircuitBreaker.HALF_OPEN
+        settings = get_settings()
+        priority = _priority.get()
+        try:
+            await self.limiter.acquire(
+                priority,
+                settings.VENDOR_BULK_QUEUE_TIMEOUT_SECONDS if priority == BULK else settings.VENDOR_QUEUE_TIMEOUT_SECONDS,
+            )
+        except BaseException:
+            if probing:
+                self.breaker.release()
+            raise
+        try:
+            return await self._call(attempt, timeout, adaptive, hedge, passthrough, probing, body_sent)
+        finally:
+            self.limiter.release()
+
+    @staticmethod
+    async def _until_sent(attempt, limit: float, body_sent: asyncio.Event) -> asyncio.Future:
+        """Start `attempt` and wait until its body is sent (or it finishes)."""
+        task = asyncio.ensure_future(attempt(limit))
+        waiter = asyncio.ensure_future(body_sent.wait())
+        try:
+            await asyncio.wait((task, waiter), return_when=asyncio.FIRST_COMPLETED)
+        except BaseException:
+            task.cancel()
+            raise
+        finally:
+            waiter.cancel()
+        return task
+
+    async def _call(self, attempt, timeout: float, adaptive: bool, hedge: bool, passthrough, probing: bool, body_sent):
+        # A probe gets the full timeout so a slower-but-healthy vendor can recover
+        limit = self.timeout_for(timeout) if adaptive and not probing else timeout
+        delay = self.p95() if hedge and not probing and get_settings().VENDOR_HEDGE_ENABLED else None
+        self.stats["calls"] += 1
+        try:
+            task = await self._until_sent(attempt, limit, body_sent) if body_sent is not None else None
+            start = time.monotonic()
+            if task is not None:
+                result = await asyncio.wait_for(task, limit)
+            elif delay is not None and delay < limit:
+                result = await asyncio.wait_for(self._hedged(attempt, limit, delay), limit)
+            else:
+                result = await asyncio.wait_for(attempt(limit), limit)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self._samples().append(limit)
+            self._failed()
+            raise VendorTimeout(f"{self.name} timed out after {limit:.1f}s")
+        except passthrough:
+            self.breaker.release()
+            raise
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception:
+            self._failed()
+            raise
+
+        self._samples().append(time.monotonic() - start)
+        self.stats["successes"] += 1
+        if probing:
+            print(f"[Vendor] {self.name} recovered, circuit closed")
+        self.breaker.record_success()
+        return result
+
+    def _failed(self):
+        self.stats["failures"] += 1
+        if self.breaker.record_failure():
+            print(f"[Vendor] {self.name} circuit opened after {self.breaker.failures} failures")
+
+    def metrics(self) -> dict:
+        p95 = self.p95()
+        return {
+            **self.stats,
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "samples": len(self._samples()),
+            "limits": self.limiter.metrics(),
+        }
+
+
+google_translate = Vendor("google_translate", "GOOGLE_TRANSLATE")
+deepgram = Vendor("deepgram", "DEEPGRAM")
+cartesia = Vendor("cartesia", "CARTESIA")
+
+VENDORS = (google_translate, deepgram, cartesia)
+
+
+def get_vendor_metrics() -> dict:
+    return {vendor.name: vendor.metrics() for vendor in VENDORS}
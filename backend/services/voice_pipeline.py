@@ -0,0 +1,117 @@
+"""Voice message stages: speech-to-text → translation → text-to-speech.
+
+`POST /chat/voice` (routers/chat.py) runs these in one request instead of
+the client calling /voice/transcribe, /chat/send and /voice/speak in turn.
+Each stage records its latency in a StageTimings, returned with the
+message so slow stages are visible per request.
+
+Synthesized audio also goes into the TTS cache (services/tts_cache.py), so
+repeated phrases skip Cartesia. The cache evicts, so messages keep their
+audio in durable storage (services/voice_storage.py) instead.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator
+from config import get_settings
+from services.deepgram_stt import (
+    transcribe_audio, transcribe_audio_auto_detect, limit_audio_stream, AudioTooLarge, UploadError,
+)
+from services.audio_processing import normalize_for_stt
+from services.translation_service import translate_text
+from services.cartesia_tts import synthesize_speech, resolve_voice
+from services.tts_cache import tts_cache, cache_key
+
+
+class VoicePipelineError(Exception):
+    """A stage failed in a way the message can't be sent without."""
+
+    def __init__(self, stage: str, message: str, status_code: int = 502):
+        super().__init__(message)
+        self.stage = stage
+        self.status_code = status_code
+
+
+class StageTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ms: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ms[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    def summary(self) -> dict:
+        return {**self.ms, "total": round((time.perf_counter() - self.started) * 1000, 1)}
+
+
+async def transcribe(audio: AsyncIterator[bytes], language: str | None, mime: str, timings: StageTimings) -> dict:
+    """Transcript of an audio stream, relayed to Deepgram as it is read."""
+    chunks = limit_audio_stream(audio, get_settings().STT_MAX_UPLOAD_BYTES)
+    with timings.stage("stt"):
+        try:
+            chunks, mime = await normalize_for_stt(chunks, mime)
+            if language:
+                result = await transcribe_audio(chunks, language=language, mime_type=mime)
+            else:
+                result = await transcribe_audio_auto_detect(chunks, mime_type=mime)
+        except AudioTooLarge as exc:
+            raise VoicePipelineError("stt", str(exc), status_code=413)
+        except UploadError as exc:
+            raise VoicePipelineError("stt", str(exc), status_code=400)
+
+    if result.get("error"):
+        raise VoicePipelineError("stt", result["error"])
+    if not result.get("transcript", "").strip():
+        raise VoicePipelineError("stt", "No speech detected", status_code=422)
+
+    words = result.get("words") or []
+    result["duration_seconds"] = round(words[-1].get("end", 0)) if words else None
+    return result
+
+
+async def translate(text: str, source_language: str, target_language: str, timings: StageTimings) -> dict:
+    """Translation of the transcript; falls back to the original text."""
+    with timings.stage("translate"):
+        try:
+            return await translate_text(text, source_language, target_language)
+        except Exception as e:
+            print(f"[VoicePipeline] Translation failed: {e}")
+            return {
+                "translated_text": text,
+                "has_idiom": False,
+                "idiom_explanation": None,
+                "cultural_note": None,
+            }
+
+
+def audio_key(text: str, language: str, output_format: str = "mp3") -> str:
+    """TTS cache key the synthesized `text` will be stored under."""
+    voice_id, output_format = resolve_voice(language, None, output_format)
+    return cache_key(text, language, voice_id, output_format)
+
+
+async def synthesize(text: str, language: str, timings: StageTimings, output_format: str = "mp3") -> tuple[bytes, str]:
+    """(audio, content type) of `text` spoken in `language`, via the TTS cache."""
+    key = audio_key(text, language, output_format)
+    with timings.stage("tts"):
+        cached = await tts_cache.get(key)
+        if cached:
+            audio, content_type = cached
+            if isinstance(audio, bytes):
+                return audio, content_type
+            try:
+                return await asyncio.to_thread(lambda: audio[:]), content_type
+            finally:
+                audio.close()
+
+        result = await synthesize_speech(text=text, language=language, output_format=output_format)
+        if not result["success"]:
+            raise VoicePipelineError("tts", result.get("error", "TTS failed"))
+        await tts_cache.put(key, result["audio_bytes"], result["content_type"])
+    return result["audio_bytes"], result["content_type"]
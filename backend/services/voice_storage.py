@@ -0,0 +1,61 @@
+"""Durable storage for voice message audio (Supabase Storage).
+
+The TTS cache is per-instance and evicts entries, so audio that a message
+row refers to can't live there. The sender's recording and its synthesized
+translation are uploaded to the VOICE_STORAGE_BUCKET bucket under
+`{relationship_id}/{name}` and served to the relationship's members by
+GET /voice/messages/{relationship_id}/{name} (routers/voice.py).
+"""
+
+import asyncio
+import mimetypes
+from services.supabase_client import get_supabase
+from config import get_settings
+
+EXTENSIONS = {
+    "audio/mpeg": "mp3",
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/webm": "webm",
+    "audio/ogg": "ogg",
+    "audio/mp4": "m4a",
+    "audio/x-m4a": "m4a",
+    "audio/aac": "aac",
+}
+CONTENT_TYPES = {ext: ct for ct, ext in reversed(EXTENSIONS.items())}
+
+
+def file_name(stem: str, content_type: str) -> str:
+    ext = EXTENSIONS.get(content_type.split(";")[0].strip()) or (mimetypes.guess_extension(content_type) or ".bin")[1:]
+    return f"{stem}.{ext}"
+
+
+def content_type_for(name: str) -> str:
+    ext = name.rsplit(".", 1)[-1]
+    return CONTENT_TYPES.get(ext) or mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def audio_url(relationship_id: str, name: str) -> str:
+    return f"/api/v1/voice/messages/{relationship_id}/{name}"
+
+
+def _bucket():
+    return get_supabase().storage.from_(get_settings().VOICE_STORAGE_BUCKET)
+
+
+async def save(relationship_id: str, name: str, data: bytes, content_type: str) -> str:
+    """Upload audio for a message; returns the URL to store on the row."""
+    path = f"{relationship_id}/{name}"
+    await asyncio.to_thread(
+        lambda: _bucket().upload(path, data, {"content-type": content_type, "upsert": "true"})
+    )
+    return audio_url(relationship_id, name)
+
+
+async def load(relationship_id: str, name: str) -> bytes | None:
+    """Stored audio, or None if there is no such object."""
+    try:
+        return await asyncio.to_thread(lambda: _bucket().download(f"{relationship_id}/{name}"))
+    except Exception as e:
+        print(f"[VoiceStorage] Download of {relationship_id}/{name} failed: {e}")
+        return None
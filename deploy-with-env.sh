@@ -91,6 +91,7 @@ gcloud run deploy $SERVICE_NAME \
 SUPABASE_URL=$SUPABASE_URL,\
 SUPABASE_ANON_KEY=$SUPABASE_ANON_KEY,\
 SUPABASE_SERVICE_KEY=$SUPABASE_SERVICE_KEY,\
+SUPABASE_JWT_SECRET=$SUPABASE_JWT_SECRET,\
 GOOGLE_TRANSLATE_API_KEY=$GOOGLE_TRANSLATE_API_KEY,\
 DEEPGRAM_API_KEY=$DEEPGRAM_API_KEY,\
 CARTESIA_API_KEY=$CARTESIA_API_KEY"
@@ -79,6 +79,7 @@ export const api = {
   removeLanguage: (userId: string, langCode: string) => request(`/profiles/${userId}/languages/${langCode}`, { method: 'DELETE' }),
   getRelationships: (userId: string) => request(`/profiles/${userId}/relationships`),
   getNotifications: (userId: string) => request(`/profiles/${userId}/notifications`),
+  getCounts: (userId: string) => request(`/profiles/${userId}/counts`),
   markNotificationRead: (userId: string, notifId: string) => request(`/profiles/${userId}/notifications/${notifId}/read`, { method: 'PUT' }),
   markAllNotificationsRead: (userId: string) => request(`/profiles/${userId}/notifications/read-all`, { method: 'PUT' }),
   deleteNotification: (userId: string, notifId: string) => request(`/profiles/${userId}/notifications/${notifId}`, { method: 'DELETE' }),
@@ -143,6 +144,7 @@ export const api = {
   sendMessage: (data: any) => request('/chat/send', { method: 'POST', body: JSON.stringify(data) }),
   getMessages: (relationshipId: string, limit?: number) => request(`/chat/messages/${relationshipId}?limit=${limit || 50}`),
   getRelationship: (relationshipId: string) => request(`/chat/relationship/${relationshipId}`),
+  resumeRelationship: (relationshipId: string) => request(`/chat/relationship/${relationshipId}/resume`, { method: 'POST' }),
   
   // Contests
   createContest: (data: any) => request('/contests/create', { method: 'POST', body: JSON.stringify(data) }),
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""Backfill achievement counters and unlocks for existing users.
+
+Run once after applying supabase/add_achievement_counters.sql:
+    cd backend && python ../scripts/backfill_achievements.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from services.achievement_engine import backfill_achievements  # noqa: E402
+
+print("🏅 Backfilling achievements...")
+result = backfill_achievements()
+print(f"✅ Done — {result['counters_scanned']} counters evaluated")
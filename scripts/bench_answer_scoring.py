@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Accuracy and speed check for contest answer scoring.
+
+Scores labelled (correct answer, given answer, answer language) cases and
+reports how many earn the points they should: full, half or none. Then
+times `score_answer()` over the same answers:
+    python scripts/bench_answer_scoring.py [--rounds N]
+
+The exit status is non-zero if any case is scored differently from its
+label.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from services.answer_scoring import normalize_answer, answer_similarity, score_answer  # noqa: E402
+
+POINTS = 10
+FULL, HALF, NONE = POINTS, POINTS // 2, 0
+
+# (correct answer, given answer, answering user's language, expected points)
+CASES = [
+    # Same answer, different surface form
+    ("pizza", "Pizza!", "en", FULL),
+    ("a cat", "cats", "en", FULL),
+    ("dogs", "my dog", "en", FULL),
+    ("feijoada", "Feijoada.", "pt", FULL),
+    ("crème brûlée", "creme brulee", "en", FULL),
+    ("ice cream", "icecream", "en", FULL),
+    ("Los Angeles", "los angeles", "en", FULL),
+    ("Die Hard", "die hard", "en", FULL),
+    ("Die Hard", "Die Hard", "de", FULL),
+    ("pizza", "la pizza", "es", FULL),
+    ("sushi", "le sushi", "fr", FULL),
+    ("the beatles", "Beatles", "en", FULL),
+    ("blue", "I think blue", "en", FULL),
+    ("straße", "strasse", "de", FULL),
+    ("寿司", "寿司", "ja", FULL),
+    # Typos
+    ("spaghetti", "spagetti", "en", FULL),
+    ("margherita pizza", "margarita pizza", "en", FULL),
+    ("basketball", "basketbal", "en", FULL),
+    ("taylor swift", "tailor swift", "en", FULL),
+    # One answer contains the other
+    ("harry potter", "potter", "en", HALF),
+    ("Harry Potter", "Harry Potter and the Philosopher's Stone", "en", HALF),
+    ("Los Angeles", "angeles", "en", HALF),
+    ("chicken curry", "curry", "en", HALF),
+    # Different answers
+    ("dancing", "singing", "en", NONE),
+    ("harry potter", "harry styles", "en", NONE),
+    ("red", "green", "en", NONE),
+    ("cat", "car", "en", NONE),
+    ("green curry", "red curry", "en", NONE),
+    ("new york", "new delhi", "en", NONE),
+    ("pizza", "pasta", "en", NONE),
+    ("swimming", "skiing", "en", NONE),
+    ("", "anything", "en", NONE),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000, help="timing passes over the cases")
+    args = parser.parse_args()
+
+    expected = [normalize_answer(correct) for correct, _, _, _ in CASES]
+    wrong = 0
+    print(f"{'correct answer':<18} {'given':<42} {'lang':<5} {'sim':>5} {'points':>6} {'want':>5}")
+    for (correct, given, language, want), norm in zip(CASES, expected):
+        points = score_answer(norm, given, POINTS, language) if norm else 0
+        similarity = max(answer_similarity(norm, normalize_answer(given, lang)) for lang in {"en", language})
+        mark = "" if points == want else "  ✗"
+        wrong += points != want
+        print(f"{correct:<18} {given:<42} {language:<5} {similarity:>5.2f} {points:>6} {want:>5}{mark}")
+
+    print(f"\naccuracy: {len(CASES) - wrong}/{len(CASES)} cases scored as labelled")
+
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        for (_, given, language, _), norm in zip(CASES, expected):
+            score_answer(norm, given, POINTS, language)
+    per_answer = (time.perf_counter() - started) / (args.rounds * len(CASES))
+    print(f"speed: {per_answer * 1e6:.1f}µs per scored answer ({args.rounds * len(CASES):,} answers)")
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
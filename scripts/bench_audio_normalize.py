@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Benchmark for audio normalization before speech-to-text.
+
+Builds synthetic speech-like WAV uploads in the formats browsers commonly
+send, runs them through `normalize_for_stt()` in upload-sized chunks and
+reports bytes sent to the vendor and the modelled end-to-end latency
+(local processing + upload over the given uplink), against sending the
+original upload:
+    python scripts/bench_audio_normalize.py [--seconds S] [--uplink-mbps M] [--chunk-bytes N]
+
+Audio is converted while it streams, so the "streamed" column overlaps
+processing with the upload and is the number the routes actually see.
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from services.audio_processing import normalize_for_stt, wav_header, ffmpeg_available  # noqa: E402
+
+FORMATS = [
+    (48000, 2),
+    (44100, 2),
+    (48000, 1),
+    (44100, 1),
+    (22050, 1),
+    (16000, 1),
+]
+
+
+def speech_like_wav(rate: int, channels: int, seconds: float, rng: random.Random) -> bytes:
+    """Voiced harmonics with a syllable-rate envelope and a little noise."""
+    frames = int(rate * seconds)
+    pitch = rng.uniform(110, 220)
+    step = 2 * math.pi / rate
+    samples = array("h")
+    for i in range(frames):
+        envelope = 0.5 + 0.5 * math.sin(i * step * 4)
+        voiced = sum(math.sin(i * step * pitch * h) / h for h in (1, 2, 3, 5))
+        value = int(6000 * envelope * voiced + rng.gauss(0, 300))
+        value = max(-32768, min(32767, value))
+        samples.extend([value] * channels)
+    return wav_header(channels, rate, 16, frames) + samples.tobytes()
+
+
+async def normalize(data: bytes, chunk_bytes: int) -> tuple[int, str, float]:
+    """(bytes out, mime out, processing seconds) for one upload."""
+    async def chunks():
+        for offset in range(0, len(data), chunk_bytes):
+            yield data[offset:offset + chunk_bytes]
+
+    start = time.perf_counter()
+    out, mime = await normalize_for_stt(chunks(), "audio/wav")
+    size = 0
+    async for chunk in out:
+        size += len(chunk)
+    return size, mime, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of each clip")
+    parser.add_argument("--uplink-mbps", type=float, default=2.0, help="server → vendor bandwidth to model")
+    parser.add_argument("--chunk-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bytes_per_second = args.uplink_mbps * 1_000_000 / 8
+    print(f"{args.seconds:g}s clips, uplink {args.uplink_mbps:g} Mbps, {args.chunk_bytes} byte chunks"
+          f" (ffmpeg path {'on' if ffmpeg_available() else 'off'})\n")
+    print(f"{'format':<12} {'bytes in':>10} {'bytes out':>10} {'saved':>7} "
+          f"{'process':>9} {'orig e2e':>9} {'new e2e':>9} {'streamed':>9}")
+
+    total_in = total_out = 0
+    for rate, channels in FORMATS:
+        data = speech_like_wav(rate, channels, args.seconds, rng)
+        size, mime, processing = asyncio.run(normalize(data, args.chunk_bytes))
+        original = len(data) / bytes_per_second
+        upload = size / bytes_per_second
+        total_in += len(data)
+        total_out += size
+        label = f"{rate // 1000}k/{'stereo' if channels == 2 else 'mono'}"
+        print(
+            f"{label:<12} {len(data):>10} {size:>10} {1 - size / len(data):>7.1%} "
+            f"{processing * 1000:>7.0f}ms {original * 1000:>7.0f}ms "
+            f"{(processing + upload) * 1000:>7.0f}ms {max(processing, upload) * 1000:>7.0f}ms"
+        )
+
+    print(f"\ntotal: {total_in} → {total_out} bytes ({1 - total_out / total_in:.1%} less sent to STT)")
+
+
+if __name__ == "__main__":
+    main()
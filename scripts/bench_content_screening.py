@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Throughput benchmark for chat content screening.
+
+Screens a synthetic corpus (default one million messages, original +
+translated text, ~0.5% containing a risky phrase) and reports throughput
+and per-message latency against the 1 ms budget:
+    python scripts/bench_content_screening.py [--messages N] [--seed S]
+
+First it checks a few labelled messages, including everyday chat that
+must not be escalated; the exit status is non-zero if one is screened at
+a different severity.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from services.content_screening import screen_message, SCREEN_BUDGET_MS, TERMS  # noqa: E402
+
+SENTENCES = [
+    ("Hello! How was your day? I cooked feijoada with my grandmother today.",
+     "¡Hola! ¿Cómo estuvo tu día? Hoy cociné feijoada con mi abuela."),
+    ("My favorite festival is Diwali, we light lamps all night long.",
+     "Mon festival préféré est Diwali, nous allumons des lampes toute la nuit."),
+    ("Ich habe heute im Park Fußball gespielt und danach Kuchen gegessen.",
+     "I played football in the park today and ate cake afterwards."),
+    ("今日は学校で友達と一緒に昼ごはんを食べました。", "I had lunch with my friends at school today."),
+    ("오늘 날씨가 정말 좋아서 산책을 했어요.", "The weather was really nice today so I went for a walk."),
+    ("我周末和家人一起去爬山了，风景很美。", "I went hiking with my family at the weekend, the view was beautiful."),
+    ("आज मैंने अपनी माँ के साथ खाना बनाया।", "Today I cooked with my mother."),
+    ("Сегодня я читал книгу о космосе, очень интересно!", "Today I read a book about space, very interesting!"),
+    ("Hoje fui à praia com meus primos e jogamos vôlei.", "Today I went to the beach with my cousins and played volleyball."),
+    ("Tell me more about your town, what do people eat for breakfast there?",
+     "Cuéntame más sobre tu pueblo, ¿qué desayuna la gente allí?"),
+]
+RISKY = [term for terms in TERMS.values() for term in terms]
+
+# (message, expected severity: None = not flagged)
+LABELLED = [
+    ("I dont want to hurt you", None),
+    ("you will regret not trying this pizza", None),
+    ("take off your shoes before you come in", None),
+    ("我好想死你了", None),
+    ("我想死你了！", None),
+    ("vou me matar de rir", "medium"),
+    ("I cut myself shaving", "medium"),
+    ("we watched a documentary about suicide prevention", "medium"),
+    ("i will hurt you", "high"),
+    ("take off your clothes", "high"),
+    ("i want to kill myself", "high"),
+    ("quero me matar", "high"),
+    ("我不想活了", "high"),
+    ("don't tell your parents about this", "high"),
+]
+
+
+def check_labelled() -> int:
+    wrong = 0
+    for text, want in LABELLED:
+        result = screen_message(text, None)
+        got = result["severity"] if result else None
+        if got != want:
+            wrong += 1
+            print(f"❌ {text!r}: screened as {got}, expected {want} ({result and result['terms']})")
+    print(f"🏷️  {len(LABELLED) - wrong}/{len(LABELLED)} labelled messages screened as expected")
+    return wrong
+
+
+def build_corpus(n: int, rng: random.Random) -> list[tuple[str, str]]:
+    corpus = []
+    for _ in range(n):
+        original, translated = rng.choice(SENTENCES)
+        if rng.random() < 0.005:
+            original = f"{original} {rng.choice(RISKY)}"
+        corpus.append((original, translated))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    wrong = check_labelled()
+    print(f"🧪 Building {args.messages:,} synthetic messages...")
+    corpus = build_corpus(args.messages, random.Random(args.seed))
+
+    latencies = []
+    hits = 0
+    clock = time.perf_counter
+    started = clock()
+    for original, translated in corpus:
+        t0 = clock()
+        if screen_message(original, translated):
+            hits += 1
+        latencies.append(clock() - t0)
+    elapsed = clock() - started
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1e6  # noqa: E731
+    over_budget = sum(1 for t in latencies if t * 1000 > SCREEN_BUDGET_MS)
+
+    print(f"✅ Screened {len(corpus):,} messages in {elapsed:.2f}s "
+          f"({len(corpus) / elapsed:,.0f} msg/s), {hits:,} flagged")
+    print(f"   latency p50 {pct(0.50):.1f}µs  p99 {pct(0.99):.1f}µs  max {latencies[-1] * 1e6:.1f}µs")
+    print(f"   over the {SCREEN_BUDGET_MS} ms budget: {over_budget:,}")
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
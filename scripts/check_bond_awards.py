@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Concurrency check for bond point awards against a real Supabase project.
+
+Fires N awards at one relationship in parallel from a thread pool (each
+a separate request, as from separate app instances) and checks that bond_points,
+care_score and contests_completed moved by exactly the sum of the awards
+and that bond_point_ledger has one row per award. Every award is then
+sent again with the same reference, as a retry would, and must change
+nothing:
+    python scripts/check_bond_awards.py RELATIONSHIP_ID [--awards N] [--delta D] [--direct]
+
+--direct exercises the compare-and-set fallback used when the
+award_bond_points RPC isn't installed. Uses SUPABASE_URL /
+SUPABASE_SERVICE_KEY from the environment (or backend/.env); point it at a
+test project, since the awards are real. The exit status is non-zero if a
+check fails.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from services import bond_service  # noqa: E402
+from services.supabase_client import get_supabase  # noqa: E402
+
+FIELDS = "bond_points, care_score, contests_completed"
+
+
+def _counters(db, relationship_id: str) -> dict:
+    return db.table("relationships").select(FIELDS).eq("id", relationship_id).execute().data[0]
+
+
+def _award(relationship_id: str, delta: int, reference_id: str, direct: bool):
+    if direct:
+        return bond_service._award_directly(relationship_id, delta, 0, "concurrency_check", reference_id, 1, 0)
+    return asyncio.run(bond_service.award_bond_points(
+        relationship_id, delta, reason="concurrency_check", reference_id=reference_id, contests_completed=1,
+    ))
+
+
+def _award_all(args, references: list[str]) -> tuple[list, list]:
+    results, errors = [], []
+    with ThreadPoolExecutor(args.threads) as pool:
+        futures = [pool.submit(_award, args.relationship_id, args.delta, ref, args.direct) for ref in references]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                errors.append(exc)
+    return results, errors
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("relationship_id")
+    parser.add_argument("--awards", type=int, default=50)
+    parser.add_argument("--delta", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--direct", action="store_true", help="test the fallback instead of the RPC")
+    args = parser.parse_args()
+
+    db = get_supabase()
+    references = [str(uuid.uuid4()) for _ in range(args.awards)]
+    before = _counters(db, args.relationship_id)
+
+    _, errors = _award_all(args, references)
+    after = _counters(db, args.relationship_id)
+    ledger = db.table("bond_point_ledger") \
+        .select("bond_delta") \
+        .in_("reference_id", references) \
+        .execute().data or []
+
+    retried, retry_errors = _award_all(args, references)
+    after_retry = _counters(db, args.relationship_id)
+
+    applied = args.awards - len(errors)
+    checks = [
+        (not errors, f"{applied}/{args.awards} awards applied" + (f" ({errors[0]})" if errors else "")),
+        (after["bond_points"] - before["bond_points"] == applied * args.delta,
+         f"bond_points {before['bond_points']} → {after['bond_points']} (expected +{applied * args.delta})"),
+        (after["contests_completed"] - before["contests_completed"] == applied,
+         f"contests_completed {before['contests_completed']} → {after['contests_completed']} (expected +{applied})"),
+        (after["care_score"] == before["care_score"], f"care_score unchanged at {after['care_score']}"),
+        (len(ledger) == applied and sum(r["bond_delta"] for r in ledger) == applied * args.delta,
+         f"{len(ledger)} ledger rows totalling {sum(r['bond_delta'] for r in ledger)}"),
+        (not retry_errors and after_retry == after and all(r and r.get("already_awarded") for r in retried),
+         f"retrying all {args.awards} awards changed nothing"
+         + (f" ({retry_errors[0]})" if retry_errors else f" (bond_points {after_retry['bond_points']})")),
+    ]
+    for ok, label in checks:
+        print(f"{'PASS' if ok else 'FAIL'}  {label}")
+    return 0 if all(ok for ok, _ in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Protocol check for the /voice/ws/transcribe WebSocket.
+
+Mounts the voice router in a local app with STT_STREAM_BACKEND="fake"
+(services/streaming_stt.py FakeSTTStream: one word per 4000 bytes of
+audio) and drives the socket with FastAPI's TestClient, checking the
+ready → interim → final → done sequence, a stop with no speech, and that
+an unauthenticated client is closed with 4401:
+    python scripts/check_ws_transcribe.py
+
+Token verification is replaced by a fixed token so no Supabase project is
+needed. The exit status is non-zero if a check fails.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+for name in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_KEY"):
+    os.environ.setdefault(name, "check")
+os.environ["STT_STREAM_BACKEND"] = "fake"
+
+from fastapi import FastAPI, WebSocketDisconnect  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from routers import voice  # noqa: E402
+
+TOKEN = "check-token"
+USER_ID = "00000000-0000-0000-0000-000000000001"
+CHUNK = b"\0" * 4000
+PATH = "/api/v1/voice/ws/transcribe"
+
+
+async def _authenticate(websocket):
+    return USER_ID if websocket.query_params.get("token") == TOKEN else None
+
+
+def _receive_all(ws) -> list[dict]:
+    events = []
+    while not events or events[-1]["type"] != "done":
+        events.append(ws.receive_json())
+    return events
+
+
+def check_transcript(client) -> tuple[bool, str]:
+    with client.websocket_connect(f"{PATH}?token={TOKEN}&language=en") as ws:
+        ready = ws.receive_json()
+        for _ in range(3):
+            ws.send_bytes(CHUNK)
+        ws.send_json({"type": "stop"})
+        events = _receive_all(ws)
+
+    interim = [e["text"] for e in events if e["type"] == "transcript" and not e["is_final"]]
+    final = [e["text"] for e in events if e["type"] == "transcript" and e["is_final"]]
+    ok = (
+        ready == {"type": "ready"}
+        and interim == ["this", "this is", "this is a"]
+        and final == ["this is a"]
+        and all(e.get("language") == "en" for e in events if e["type"] == "transcript")
+    )
+    return ok, f"3 chunks → interim {interim}, final {final}"
+
+
+def check_silence(client) -> tuple[bool, str]:
+    with client.websocket_connect(f"{PATH}?token={TOKEN}") as ws:
+        ws.receive_json()
+        ws.send_bytes(CHUNK[:1000])
+        ws.send_json({"type": "stop"})
+        events = _receive_all(ws)
+    return events == [{"type": "done"}], f"stop without speech → {[e['type'] for e in events]}"
+
+
+def check_unauthorized(client) -> tuple[bool, str]:
+    code = None
+    with client.websocket_connect(PATH) as ws:
+        ws.send_json({"type": "auth", "token": "wrong"})
+        try:
+            ws.receive_json()
+        except WebSocketDisconnect as exc:
+            code = exc.code
+    return code == voice.WS_UNAUTHORIZED, f"bad token → close code {code}"
+
+
+def main() -> int:
+    voice.authenticate_websocket = _authenticate
+    app = FastAPI()
+    app.include_router(voice.router, prefix="/api/v1")
+
+    with TestClient(app) as client:
+        checks = [check(client) for check in (check_transcript, check_silence, check_unauthorized)]
+    for ok, label in checks:
+        print(f"{'PASS' if ok else 'FAIL'}  {label}")
+    return 0 if all(ok for ok, _ in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
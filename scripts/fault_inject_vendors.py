@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Fault-injection harness for the vendor resilience layer.
+
+Starts a local stub server standing in for Google Translate, Deepgram and
+Cartesia, points the services at it and drives real `translate_text`,
+`transcribe_audio` and `synthesize_speech` calls through a sequence of
+faults:
+
+    healthy    every response in ~20 ms
+    tail       10% of responses take 3 s     → hedged retries absorb them
+               (Translate; STT and TTS aren't hedged)
+    brownout   every response takes 12 s     → adaptive timeout, then breaker
+               (Translate; STT and TTS keep their static timeouts)
+    outage     every response is a 503       → breaker opens, fast fallbacks
+    recovery   healthy again                 → a probe closes the breaker
+
+Each phase reports latency and fallback counts per vendor and checks the
+behaviour above; the exit status is non-zero if a check fails:
+    python scripts/fault_inject_vendors.py [--calls N] [--concurrency C]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+# Keys only need to be non-empty; every request goes to the stub server
+for name in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_KEY",
+             "GOOGLE_TRANSLATE_API_KEY", "DEEPGRAM_API_KEY", "CARTESIA_API_KEY"):
+    os.environ.setdefault(name, "fault-injection")
+os.environ.setdefault("VENDOR_BREAKER_OPEN_SECONDS", "2")
+
+from services import translation_service, deepgram_stt, cartesia_tts  # noqa: E402
+from services.vendor_client import VENDORS, get_vendor_metrics  # noqa: E402
+
+
+# ─── Stub vendor server ────────────────────────────────────────────────────────
+
+class Faults:
+    latency = 0.02
+    slow_fraction = 0.0
+    slow_latency = 0.0
+    status = 200
+
+
+def _response_body(path: str, body: bytes) -> tuple[bytes, str]:
+    if path.endswith("/detect"):
+        return json.dumps({"data": {"detections": [[{"language": "es", "confidence": 1}]]}}).encode(), "application/json"
+    if "/translate" in path:
+        # One translation per `q`, which is a list for batched requests
+        q = json.loads(body or b"{}").get("q", "")
+        texts = q if isinstance(q, list) else [q]
+        translations = [{"translatedText": f"<{text}>"} for text in texts]
+        return json.dumps({"data": {"translations": translations}}).encode(), "application/json"
+    if "/listen" in path:
+        result = {"results": {"channels": [{"alternatives": [{"transcript": "hola", "confidence": 0.9, "words": []}]}]}}
+        return json.dumps(result).encode(), "application/json"
+    return bytes(4096), "audio/mpeg"
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict) -> bytes:
+    if "content-length" in headers:
+        return await reader.readexactly(int(headers["content-length"]))
+    body = b""
+    if headers.get("transfer-encoding") == "chunked":
+        while (size := int((await reader.readline()).strip() or b"0", 16)):
+            body += await reader.readexactly(size)
+            await reader.readline()
+        await reader.readline()
+    return body
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request_line = (await reader.readline()).decode()
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            key, _, value = line.decode().partition(":")
+            headers[key.strip().lower()] = value.strip()
+        body = await _read_body(reader, headers)
+
+        slow = random.random() < Faults.slow_fraction
+        await asyncio.sleep(Faults.slow_latency if slow else Faults.latency)
+
+        status = Faults.status
+        payload, content_type = _response_body(request_line.split()[1], body) if status == 200 else (b"unavailable", "text/plain")
+        writer.write(
+            f"HTTP/1.1 {status} X\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+# ─── Scenario ──────────────────────────────────────────────────────────────────
+
+_sequence = iter(range(1 << 62))
+
+
+async def _translate() -> bool:
+    # A distinct text per call, so caching and coalescing don't hide calls
+    text = f"hola amigo {next(_sequence)}"
+    result = await translation_service.translate_text(text, "es", "en")
+    return result["translated_text"] == f"<{text}>"
+
+
+async def _transcribe() -> bool:
+    result = await deepgram_stt.transcribe_audio(bytes(8000), language="es", mime_type="audio/wav")
+    return not result.get("error")
+
+
+async def _synthesize() -> bool:
+    result = await cartesia_tts.synthesize_speech("hola amigo", language="es")
+    return result["success"]
+
+
+CALLS = {"google_translate": _translate, "deepgram": _transcribe, "cartesia": _synthesize}
+
+
+async def run_phase(calls: int, concurrency: int, vendors=tuple(CALLS)) -> dict:
+    """Latency percentiles and fallback count per vendor for one phase."""
+    report = {}
+    for vendor in vendors:
+        call = CALLS[vendor]
+        latencies, fallbacks = [], 0
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one():
+            nonlocal fallbacks
+            async with gate:
+                start = time.monotonic()
+                ok = await call()
+                latencies.append(time.monotonic() - start)
+                fallbacks += not ok
+
+        await asyncio.gather(*(one() for _ in range(calls)))
+        latencies.sort()
+        report[vendor] = {
+            "p50": latencies[len(latencies) // 2],
+            "p95": latencies[int(0.95 * (len(latencies) - 1))],
+            "max": latencies[-1],
+            "fallbacks": fallbacks,
+            "state": get_vendor_metrics()[vendor]["state"],
+        }
+    return report
+
+
+def print_phase(name: str, report: dict):
+    print(f"\n── {name}")
+    for vendor, r in report.items():
+        print(f"   {vendor:<17} p50 {r['p50'] * 1000:>7.0f}ms  p95 {r['p95'] * 1000:>7.0f}ms  "
+              f"max {r['max'] * 1000:>7.0f}ms  fallbacks {r['fallbacks']:>3}  breaker {r['state']}")
+
+
+async def main(args) -> int:
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    base = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    translation_service.GOOGLE_TRANSLATE_URL = f"{base}/language/translate/v2"
+    translation_service.GOOGLE_DETECT_URL = f"{base}/language/translate/v2/detect"
+    deepgram_stt.DEEPGRAM_STT_URL = f"{base}/v1/listen"
+    cartesia_tts.CARTESIA_TTS_URL = f"{base}/tts/bytes"
+
+    failures = []
+
+    def check(ok: bool, label: str):
+        print(f"   {'PASS' if ok else 'FAIL'}  {label}")
+        if not ok:
+            failures.append(label)
+
+    async with server:
+        report = await run_phase(args.calls, args.concurrency)
+        print_phase("healthy", report)
+        check(all(r["fallbacks"] == 0 for r in report.values()), "no fallbacks while healthy")
+
+        Faults.slow_fraction, Faults.slow_latency = 0.1, 3.0
+        report = await run_phase(args.calls, args.concurrency)
+        print_phase("tail: 10% of responses take 3 s", report)
+        check(report["google_translate"]["p95"] < 1.0, "google_translate hedging keeps p95 under 1 s")
+
+        Faults.slow_fraction, Faults.latency = 0.0, 12.0
+        report = await run_phase(args.calls, args.concurrency, ("google_translate",))
+        print_phase("brownout: every response takes 12 s", report)
+        for vendor, r in report.items():
+            check(r["max"] < 5.0, f"{vendor} adaptive timeout caps the wait under 5 s")
+            check(r["state"] == "open", f"{vendor} breaker opens")
+
+        Faults.latency, Faults.status = 0.02, 503
+        report = await run_phase(args.calls, args.concurrency)
+        print_phase("outage: 503 from every vendor", report)
+        check(all(r["p95"] < 0.1 for r in report.values()), "fallbacks are immediate once open")
+
+        Faults.status = 200
+        await asyncio.sleep(float(os.environ["VENDOR_BREAKER_OPEN_SECONDS"]) + 0.5)
+        report = await run_phase(args.calls, args.concurrency)
+        print_phase("recovery", report)
+        check(all(r["state"] == "closed" for r in report.values()), "breakers close after a successful probe")
+
+    print("\nvendor metrics:")
+    for vendor in VENDORS:
+        print(f"   {vendor.name}: {vendor.metrics()}")
+    print(f"\n{len(failures)} check(s) failed" if failures else "\nall checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=60, help="calls per vendor per phase")
+    parser.add_argument("--concurrency", type=int, default=10)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Simulation of translation micro-batching under chat load.
+
+Starts a local stub standing in for Google Translate (fixed latency per
+request, one translation per `q` item), points translation_service at it
+and has simulated users send distinct messages at random moments across a
+few language pairs. Each run is repeated with TRANSLATE_BATCH_ENABLED off
+and on, reporting requests sent to Google, caller latency percentiles and
+fallbacks (a message that came back untranslated):
+    python scripts/sim_translate_batching.py [--messages N] [--spread S] [--latency-ms L]
+
+The exit status is non-zero if batching sent more requests than it saved
+or any message fell back.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+for name in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_KEY", "GOOGLE_TRANSLATE_API_KEY"):
+    os.environ.setdefault(name, "simulation")
+
+from config import get_settings  # noqa: E402
+from services import translation_service  # noqa: E402
+
+PAIRS = [("es", "en"), ("en", "hi"), ("pt", "ja"), ("en", "es")]
+
+
+class Stub:
+    latency = 0.08
+    requests = 0
+    texts = 0
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        await reader.readline()
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            key, _, value = line.decode().partition(":")
+            headers[key.strip().lower()] = value.strip()
+        body = json.loads(await reader.readexactly(int(headers.get("content-length", 0))) or b"{}")
+
+        q = body.get("q", "")
+        texts = q if isinstance(q, list) else [q]
+        Stub.requests += 1
+        Stub.texts += len(texts)
+        await asyncio.sleep(Stub.latency)
+
+        payload = json.dumps({"data": {"translations": [{"translatedText": f"<{t}>"} for t in texts]}}).encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run(messages: int, spread: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    latencies, fallbacks = [], 0
+    Stub.requests = Stub.texts = 0
+
+    async def send(i: int):
+        nonlocal fallbacks
+        await asyncio.sleep(rng.random() * spread)
+        source, target = rng.choice(PAIRS)
+        text = f"message {i} from a simulated user"
+        start = time.monotonic()
+        result = await translation_service.translate_text(text, source, target)
+        latencies.append(time.monotonic() - start)
+        fallbacks += result["translated_text"] != f"<{text}>"
+
+    started = time.monotonic()
+    await asyncio.gather(*(send(i) for i in range(messages)))
+    latencies.sort()
+    return {
+        "requests": Stub.requests,
+        "texts": Stub.texts,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(0.95 * (len(latencies) - 1))],
+        "max": latencies[-1],
+        "fallbacks": fallbacks,
+        "wall": time.monotonic() - started,
+    }
+
+
+async def main(args) -> int:
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    translation_service.GOOGLE_TRANSLATE_URL = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/translate"
+    Stub.latency = args.latency_ms / 1000
+    settings = get_settings()
+
+    print(f"{args.messages} messages over {args.spread:g}s, {len(PAIRS)} language pairs, "
+          f"{args.latency_ms:g} ms per Google request, window {settings.TRANSLATE_BATCH_WINDOW_MS} ms\n")
+    print(f"{'batching':<9} {'requests':>9} {'texts':>7} {'p50':>8} {'p95':>8} {'max':>8} {'fallbacks':>10}")
+    reports = {}
+    async with server:
+        for enabled in (False, True):
+            settings.TRANSLATE_BATCH_ENABLED = enabled
+            r = reports[enabled] = await run(args.messages, args.spread, args.seed)
+            print(f"{'on' if enabled else 'off':<9} {r['requests']:>9} {r['texts']:>7} "
+                  f"{r['p50'] * 1000:>6.0f}ms {r['p95'] * 1000:>6.0f}ms {r['max'] * 1000:>6.0f}ms {r['fallbacks']:>10}")
+
+    off, on = reports[False], reports[True]
+    print(f"\nbatching sent {1 - on['requests'] / off['requests']:.0%} fewer requests; "
+          f"p95 {on['p95'] * 1000:.0f}ms vs {off['p95'] * 1000:.0f}ms")
+    print(f"translation metrics: {translation_service.get_translation_metrics()}")
+    return 0 if on["requests"] < off["requests"] and not on["fallbacks"] and not off["fallbacks"] else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1500)
+    parser.add_argument("--spread", type=float, default=1.0, help="seconds over which messages arrive")
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--seed", type=int, default=7)
+    sys.exit(asyncio.run(main(parser.parse_args())))
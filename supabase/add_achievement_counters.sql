@@ -0,0 +1,120 @@
+-- ============================================================
+-- ACHIEVEMENT COUNTERS
+-- Run this in Supabase SQL Editor
+-- ============================================================
+-- Per-user running totals for each achievement criteria_type, updated
+-- incrementally by services/achievement_engine.py as events happen, so
+-- unlocking an achievement never requires scanning history.
+
+CREATE TABLE IF NOT EXISTS user_achievement_counters (
+    user_id UUID NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    criteria_type VARCHAR(30) NOT NULL, -- same values as achievements.criteria_type
+    value INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (user_id, criteria_type)
+);
+
+-- Add p_delta to a counter, or raise it to p_set_max (for "highest so far"
+-- criteria such as level_reached / streak_days). Returns old and new value.
+CREATE OR REPLACE FUNCTION bump_achievement_counter(
+    p_user_id UUID,
+    p_criteria_type TEXT,
+    p_delta INTEGER DEFAULT 1,
+    p_set_max INTEGER DEFAULT NULL
+)
+RETURNS TABLE (old_value INTEGER, new_value INTEGER) AS $$
+DECLARE
+    previous INTEGER;
+BEGIN
+    INSERT INTO user_achievement_counters (user_id, criteria_type, value)
+    VALUES (p_user_id, p_criteria_type, 0)
+    ON CONFLICT (user_id, criteria_type) DO NOTHING;
+
+    SELECT c.value INTO previous
+    FROM user_achievement_counters c
+    WHERE c.user_id = p_user_id AND c.criteria_type = p_criteria_type
+    FOR UPDATE;
+
+    UPDATE user_achievement_counters c
+    SET value = CASE WHEN p_set_max IS NULL THEN previous + p_delta ELSE GREATEST(previous, p_set_max) END,
+        updated_at = NOW()
+    WHERE c.user_id = p_user_id AND c.criteria_type = p_criteria_type
+    RETURNING previous, c.value INTO old_value, new_value;
+
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- One-off (re-runnable) backfill of all counters from existing history.
+-- Counters only ever move up, so running it again is safe.
+CREATE OR REPLACE FUNCTION backfill_achievement_counters()
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO user_achievement_counters (user_id, criteria_type, value)
+    SELECT user_id, criteria_type, value FROM (
+        SELECT sender_id AS user_id, 'messages_sent' AS criteria_type, COUNT(*)::INTEGER AS value
+        FROM messages
+        GROUP BY sender_id
+
+        UNION ALL
+        SELECT u.user_id, 'contests_won', COUNT(*)::INTEGER
+        FROM contests c
+        JOIN relationships r ON r.id = c.relationship_id
+        CROSS JOIN LATERAL (VALUES (r.user_a_id), (r.user_b_id)) AS u(user_id)
+        WHERE c.status = 'completed' AND c.total_score >= c.max_points * 0.7
+        GROUP BY u.user_id
+
+        UNION ALL
+        SELECT u.user_id, 'level_reached', MAX(r.level)
+        FROM relationships r
+        CROSS JOIN LATERAL (VALUES (r.user_a_id), (r.user_b_id)) AS u(user_id)
+        GROUP BY u.user_id
+
+        UNION ALL
+        SELECT u.user_id, 'streak_days', MAX(r.longest_streak)
+        FROM relationships r
+        CROSS JOIN LATERAL (VALUES (r.user_a_id), (r.user_b_id)) AS u(user_id)
+        GROUP BY u.user_id
+
+        UNION ALL
+        SELECT (p->>'user_id')::UUID, 'games_played', COUNT(*)::INTEGER
+        FROM game_sessions gs
+        CROSS JOIN LATERAL jsonb_array_elements(gs.players) AS p
+        WHERE gs.status = 'completed' AND p->>'user_id' IS NOT NULL
+        GROUP BY 1
+
+        UNION ALL
+        SELECT user_id, 'family_rooms_joined', COUNT(*)::INTEGER
+        FROM family_room_members
+        GROUP BY user_id
+
+        UNION ALL
+        SELECT host_id, 'potlucks_hosted', COUNT(*)::INTEGER
+        FROM cultural_potlucks
+        GROUP BY host_id
+    ) totals
+    WHERE user_id IN (SELECT id FROM profiles)
+    ON CONFLICT (user_id, criteria_type) DO UPDATE
+    SET value = GREATEST(user_achievement_counters.value, EXCLUDED.value),
+        updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+-- Credit an achievement's reward to the user's lifetime bond points when it
+-- is unlocked. Duplicate unlocks are ignored by the UNIQUE constraint, so
+-- each reward is paid once.
+CREATE OR REPLACE FUNCTION credit_achievement_reward()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE profiles
+    SET total_bond_points = COALESCE(total_bond_points, 0) + COALESCE(
+        (SELECT bond_points_reward FROM achievements WHERE id = NEW.achievement_id), 0)
+    WHERE id = NEW.user_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_credit_achievement_reward ON user_achievements;
+CREATE TRIGGER trigger_credit_achievement_reward
+    AFTER INSERT ON user_achievements
+    FOR EACH ROW EXECUTE FUNCTION credit_achievement_reward();
@@ -0,0 +1,159 @@
+-- ============================================================
+-- RELATIONSHIP ACTIVITY INDEX (streaks + inactivity)
+-- Run this in Supabase SQL Editor
+-- ============================================================
+-- One row per relationship per UTC day with per-partner message counts,
+-- maintained by a trigger on message insert. Streaks are advanced from
+-- the bucket in O(1) and inactive relationships are found with an
+-- indexed range query on relationships.last_interaction_at — neither
+-- needs to scan `messages`.
+
+CREATE TABLE IF NOT EXISTS relationship_activity_days (
+    relationship_id UUID NOT NULL REFERENCES relationships(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    user_a_messages INTEGER NOT NULL DEFAULT 0,
+    user_b_messages INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (relationship_id, day)
+);
+
+-- Last UTC day on which both partners wrote (the day the streak counts up to)
+ALTER TABLE relationships ADD COLUMN IF NOT EXISTS last_streak_day DATE;
+-- last_streak_day when a streak milestone was last published, so each
+-- milestone is announced once however many sweeps see it
+ALTER TABLE relationships ADD COLUMN IF NOT EXISTS streak_milestone_day DATE;
+
+CREATE INDEX IF NOT EXISTS idx_relationships_active_interaction
+    ON relationships(last_interaction_at) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_relationships_streak_day
+    ON relationships(last_streak_day) WHERE streak_days > 0;
+
+-- A day counts towards the streak once both partners have sent a message.
+CREATE OR REPLACE FUNCTION track_relationship_activity()
+RETURNS TRIGGER AS $$
+DECLARE
+    rel RECORD;
+    today DATE := (NOW() AT TIME ZONE 'UTC')::DATE;
+    bucket RECORD;
+BEGIN
+    SELECT user_a_id, user_b_id INTO rel FROM relationships WHERE id = NEW.relationship_id;
+    IF rel IS NULL THEN
+        RETURN NEW;
+    END IF;
+
+    INSERT INTO relationship_activity_days (relationship_id, day, user_a_messages, user_b_messages)
+    VALUES (
+        NEW.relationship_id, today,
+        CASE WHEN NEW.sender_id = rel.user_a_id THEN 1 ELSE 0 END,
+        CASE WHEN NEW.sender_id = rel.user_b_id THEN 1 ELSE 0 END
+    )
+    ON CONFLICT (relationship_id, day) DO UPDATE
+    SET user_a_messages = relationship_activity_days.user_a_messages + EXCLUDED.user_a_messages,
+        user_b_messages = relationship_activity_days.user_b_messages + EXCLUDED.user_b_messages
+    RETURNING user_a_messages, user_b_messages INTO bucket;
+
+    IF bucket.user_a_messages > 0 AND bucket.user_b_messages > 0 THEN
+        UPDATE relationships
+        SET streak_days = CASE
+                WHEN last_streak_day = today THEN streak_days
+                WHEN last_streak_day = today - 1 THEN streak_days + 1
+                ELSE 1
+            END,
+            longest_streak = GREATEST(longest_streak, CASE
+                WHEN last_streak_day = today THEN streak_days
+                WHEN last_streak_day = today - 1 THEN streak_days + 1
+                ELSE 1
+            END),
+            last_streak_day = today
+        WHERE id = NEW.relationship_id
+          AND last_streak_day IS DISTINCT FROM today;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS messages_activity_trigger ON messages;
+CREATE TRIGGER messages_activity_trigger AFTER INSERT ON messages
+    FOR EACH ROW EXECUTE FUNCTION track_relationship_activity();
+
+-- Pause active relationships with no message since p_cutoff, unless either
+-- partner has announced an absence ('away' / 'break' with a future return
+-- date). Returns the paused relationships so callers can notify partners.
+CREATE OR REPLACE FUNCTION pause_inactive_relationships(p_cutoff TIMESTAMPTZ, p_limit INTEGER DEFAULT 500)
+RETURNS TABLE (id UUID, user_a_id UUID, user_b_id UUID, last_interaction_at TIMESTAMPTZ) AS $$
+BEGIN
+    RETURN QUERY
+    WITH paused AS (
+        UPDATE relationships r
+        SET status = 'paused'
+        WHERE r.id IN (
+            SELECT c.id
+            FROM relationships c
+            WHERE c.status = 'active'
+              AND c.last_interaction_at < p_cutoff
+              AND NOT EXISTS (
+                  SELECT 1 FROM profiles p
+                  WHERE p.id IN (c.user_a_id, c.user_b_id)
+                    AND p.status IN ('away', 'break')
+                    AND p.status_return_date > NOW()
+              )
+            ORDER BY c.last_interaction_at
+            LIMIT p_limit
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING r.id, r.user_a_id, r.user_b_id, r.last_interaction_at
+    )
+    SELECT * FROM paused;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reset streaks whose last counted day is older than yesterday.
+CREATE OR REPLACE FUNCTION reset_broken_streaks()
+RETURNS INTEGER AS $$
+DECLARE
+    affected INTEGER;
+BEGIN
+    UPDATE relationships
+    SET streak_days = 0
+    WHERE streak_days > 0
+      AND last_streak_day < (NOW() AT TIME ZONE 'UTC')::DATE - 1;
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill the buckets and streak day from existing messages.
+INSERT INTO relationship_activity_days (relationship_id, day, user_a_messages, user_b_messages)
+SELECT m.relationship_id,
+       (m.created_at AT TIME ZONE 'UTC')::DATE,
+       COUNT(*) FILTER (WHERE m.sender_id = r.user_a_id),
+       COUNT(*) FILTER (WHERE m.sender_id = r.user_b_id)
+FROM messages m
+JOIN relationships r ON r.id = m.relationship_id
+GROUP BY 1, 2
+ON CONFLICT (relationship_id, day) DO NOTHING;
+
+-- Streaks from the buckets: consecutive "both wrote" days form islands
+-- (day - row_number is constant within a run of consecutive days).
+WITH both_days AS (
+    SELECT relationship_id, day,
+           day - (ROW_NUMBER() OVER (PARTITION BY relationship_id ORDER BY day))::INTEGER AS grp
+    FROM relationship_activity_days
+    WHERE user_a_messages > 0 AND user_b_messages > 0
+), islands AS (
+    SELECT relationship_id, COUNT(*)::INTEGER AS len, MAX(day) AS last_day
+    FROM both_days
+    GROUP BY relationship_id, grp
+), latest AS (
+    SELECT DISTINCT ON (relationship_id)
+           relationship_id, len, last_day,
+           MAX(len) OVER (PARTITION BY relationship_id) AS longest
+    FROM islands
+    ORDER BY relationship_id, last_day DESC
+)
+UPDATE relationships r
+SET last_streak_day = l.last_day,
+    streak_days = CASE WHEN l.last_day >= (NOW() AT TIME ZONE 'UTC')::DATE - 1 THEN l.len ELSE 0 END,
+    longest_streak = GREATEST(r.longest_streak, l.longest)
+FROM latest l
+WHERE l.relationship_id = r.id AND r.last_streak_day IS NULL;
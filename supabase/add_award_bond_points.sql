@@ -0,0 +1,98 @@
+-- ============================================================
+-- ATOMIC BOND POINT AWARDS + LEDGER
+-- Run this in Supabase SQL Editor
+-- ============================================================
+-- Applies bond/care deltas server-side in a single UPDATE so concurrent
+-- awards never overwrite each other. The existing check_level_up trigger
+-- still fires because bond_points changes, and every award is recorded in
+-- bond_point_ledger for auditing. The level before the award is read under
+-- the row lock and returned as `previous_level`, so the backend announces a
+-- level only when this award is the one that reached it.
+--
+-- An award with a reference_id is applied at most once per (reason,
+-- reference_id): the ledger row is inserted first, and if one already
+-- exists the call changes nothing and returns the row with
+-- `already_awarded`. Retried contest completions and game finishes can
+-- call it again safely.
+
+CREATE TABLE IF NOT EXISTS bond_point_ledger (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    relationship_id UUID NOT NULL REFERENCES relationships(id) ON DELETE CASCADE,
+
+    bond_delta INTEGER NOT NULL,
+    care_delta INTEGER NOT NULL DEFAULT 0,
+    reason VARCHAR(50), -- 'contest_completed', 'game_completed', ...
+    reference_id UUID, -- contest / game session that earned the points
+
+    bond_points_after INTEGER,
+    level_after INTEGER,
+
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+ALTER TABLE bond_point_ledger ADD COLUMN IF NOT EXISTS level_before INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_bond_point_ledger_relationship ON bond_point_ledger(relationship_id, created_at DESC);
+
+-- Fails if earlier retries already recorded the same award twice; resolve
+-- those rows (and the points they added) before running this
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bond_point_ledger_award
+    ON bond_point_ledger(reason, reference_id)
+    WHERE reference_id IS NOT NULL;
+
+-- Earlier versions returned SETOF relationships
+DROP FUNCTION IF EXISTS award_bond_points(UUID, INTEGER, INTEGER, TEXT, UUID, INTEGER, INTEGER);
+
+CREATE OR REPLACE FUNCTION award_bond_points(
+    p_relationship_id UUID,
+    p_delta INTEGER,
+    p_care_delta INTEGER DEFAULT 0,
+    p_reason TEXT DEFAULT NULL,
+    p_reference_id UUID DEFAULT NULL,
+    p_contests_completed INTEGER DEFAULT 0,
+    p_contests_won INTEGER DEFAULT 0
+)
+RETURNS JSONB AS $$
+DECLARE
+    previous_level INTEGER;
+    ledger_id UUID;
+    updated relationships;
+BEGIN
+    SELECT level INTO previous_level
+    FROM relationships
+    WHERE id = p_relationship_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO bond_point_ledger (
+        relationship_id, bond_delta, care_delta, reason, reference_id, level_before
+    ) VALUES (
+        p_relationship_id, p_delta, p_care_delta, p_reason, p_reference_id, previous_level
+    )
+    ON CONFLICT (reason, reference_id) WHERE reference_id IS NOT NULL DO NOTHING
+    RETURNING id INTO ledger_id;
+
+    IF ledger_id IS NULL THEN
+        SELECT * INTO updated FROM relationships WHERE id = p_relationship_id;
+        RETURN to_jsonb(updated) || jsonb_build_object('previous_level', updated.level, 'already_awarded', TRUE);
+    END IF;
+
+    UPDATE relationships
+    SET bond_points = bond_points + p_delta,
+        care_score = LEAST(100, GREATEST(0, care_score + p_care_delta)),
+        contests_completed = contests_completed + p_contests_completed,
+        contests_won = contests_won + p_contests_won
+    WHERE id = p_relationship_id
+    RETURNING * INTO updated;
+
+    UPDATE bond_point_ledger
+    SET bond_points_after = updated.bond_points,
+        level_after = updated.level
+    WHERE id = ledger_id;
+
+    RETURN to_jsonb(updated) || jsonb_build_object('previous_level', previous_level, 'already_awarded', FALSE);
+END;
+$$ LANGUAGE plpgsql;
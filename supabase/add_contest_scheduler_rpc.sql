@@ -0,0 +1,30 @@
+-- ============================================================
+-- CONTEST SCHEDULER: ELIGIBLE RELATIONSHIPS
+-- Run this in Supabase SQL Editor
+-- ============================================================
+-- Returns one batch of active relationships due a weekly contest:
+-- matched before the cutoff, with no contest created since the cutoff
+-- and none still scheduled. The "no recent contest" check runs in the
+-- database, so the scheduler never reads every active relationship.
+-- Called from services/contest_scheduler.py.
+
+CREATE INDEX IF NOT EXISTS idx_contests_relationship_created
+    ON contests(relationship_id, created_at DESC);
+
+CREATE OR REPLACE FUNCTION find_contest_eligible_relationships(
+    p_cutoff TIMESTAMPTZ,
+    p_limit INTEGER
+)
+RETURNS TABLE (id UUID, user_a_id UUID, user_b_id UUID) AS $$
+    SELECT r.id, r.user_a_id, r.user_b_id
+    FROM relationships r
+    WHERE r.status = 'active'
+      AND r.matched_at <= p_cutoff
+      AND NOT EXISTS (
+          SELECT 1 FROM contests c
+          WHERE c.relationship_id = r.id
+            AND (c.created_at >= p_cutoff OR c.status = 'scheduled')
+      )
+    ORDER BY r.last_interaction_at DESC NULLS LAST
+    LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
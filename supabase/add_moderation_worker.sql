@@ -0,0 +1,94 @@
+-- ============================================================
+-- MODERATION WORKER (claiming + automated decisions)
+-- Run this in Supabase SQL Editor
+-- ============================================================
+-- Lets backend workers (services/moderation_worker.py) claim
+-- moderation_queue items by priority with FOR UPDATE SKIP LOCKED, so
+-- several workers/instances never process the same item, and records
+-- the automated check results in moderation_decisions.
+
+ALTER TABLE moderation_queue ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+ALTER TABLE moderation_queue ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+ALTER TABLE moderation_queue ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE moderation_queue ADD COLUMN IF NOT EXISTS auto_decision VARCHAR(20);
+ALTER TABLE moderation_queue ADD COLUMN IF NOT EXISTS priority_rank SMALLINT
+    GENERATED ALWAYS AS (
+        CASE priority WHEN 'urgent' THEN 0 WHEN 'high' THEN 1 WHEN 'normal' THEN 2 ELSE 3 END
+    ) STORED;
+
+-- Pending items without an auto_decision still need the automated check;
+-- pending items with one are waiting for a human moderator
+DROP INDEX IF EXISTS idx_moderation_queue_claimable;
+CREATE INDEX idx_moderation_queue_claimable
+    ON moderation_queue(priority_rank, created_at)
+    WHERE status = 'pending' AND auto_decision IS NULL;
+
+CREATE TABLE IF NOT EXISTS moderation_decisions (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    queue_item_id UUID NOT NULL REFERENCES moderation_queue(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES profiles(id),
+    decision VARCHAR(20) NOT NULL, -- 'escalate', 'flag', 'clear'
+    findings JSONB DEFAULT '{}'::jsonb, -- {"categories": {...}, "samples": [...]}
+    messages_scanned INTEGER DEFAULT 0,
+    duration_ms INTEGER,
+    worker TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_moderation_decisions_item ON moderation_decisions(queue_item_id);
+CREATE INDEX IF NOT EXISTS idx_messages_sender_created ON messages(sender_id, created_at);
+
+-- Claim up to p_limit unchecked pending items, most urgent and oldest
+-- first. Items a worker claimed but never finished (claimed_at older than
+-- p_lease_seconds) are handed out again, or left to a human as 'failed'
+-- once they have been claimed p_max_attempts times.
+DROP FUNCTION IF EXISTS claim_moderation_items(TEXT, INTEGER, INTEGER);
+CREATE OR REPLACE FUNCTION claim_moderation_items(
+    p_worker TEXT,
+    p_limit INTEGER DEFAULT 10,
+    p_lease_seconds INTEGER DEFAULT 300,
+    p_max_attempts INTEGER DEFAULT 3
+)
+RETURNS SETOF moderation_queue AS $$
+BEGIN
+    UPDATE moderation_queue
+    SET status = 'pending',
+        claimed_by = NULL,
+        claimed_at = NULL,
+        auto_decision = CASE WHEN attempts >= p_max_attempts THEN 'failed' END,
+        notes = CASE WHEN attempts >= p_max_attempts
+                     THEN 'Automated check did not finish after ' || attempts || ' attempts'
+                     ELSE notes END
+    WHERE status = 'in_review'
+      AND claimed_by IS NOT NULL
+      AND claimed_at < NOW() - make_interval(secs => p_lease_seconds);
+
+    RETURN QUERY
+    WITH claimed AS (
+        UPDATE moderation_queue q
+        SET status = 'in_review',
+            claimed_by = p_worker,
+            claimed_at = NOW(),
+            attempts = q.attempts + 1
+        WHERE q.id IN (
+            SELECT c.id
+            FROM moderation_queue c
+            WHERE c.status = 'pending'
+              AND c.auto_decision IS NULL
+            ORDER BY c.priority_rank, c.created_at
+            LIMIT p_limit
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING q.*
+    )
+    SELECT * FROM claimed ORDER BY priority_rank, created_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Checked items used to be left in_review with no claim, where neither
+-- workers nor the lease expiry would pick them up: hand them to moderators
+UPDATE moderation_queue
+SET status = 'pending'
+WHERE status = 'in_review'
+  AND claimed_by IS NULL
+  AND auto_decision IS NOT NULL;
@@ -0,0 +1,63 @@
+-- ============================================================
+-- PRE-NORMALIZED CONTEST ANSWERS
+-- Run this in Supabase SQL Editor (after add_contest_generation_rpc.sql)
+-- ============================================================
+-- Correct answers are normalized once in Python when a question is
+-- created (services/answer_scoring.py) so scoring a submission does not
+-- have to re-normalize them. Existing rows are normalized lazily on
+-- first scoring.
+
+ALTER TABLE contest_questions
+ADD COLUMN IF NOT EXISTS correct_answer_normalized TEXT DEFAULT NULL;
+
+-- Store the normalized answer when questions are created through the RPC
+CREATE OR REPLACE FUNCTION create_contest_with_questions(
+    p_contest JSONB,
+    p_questions JSONB,
+    p_fact_ids UUID[] DEFAULT '{}'
+)
+RETURNS JSONB AS $$
+DECLARE
+    c contests;
+    new_contest contests;
+BEGIN
+    c := jsonb_populate_record(NULL::contests, p_contest);
+
+    INSERT INTO contests (
+        relationship_id, contest_type, title, description,
+        scheduled_at, starts_at, ends_at, time_limit_minutes, status, max_points
+    ) VALUES (
+        c.relationship_id, COALESCE(c.contest_type, 'weekly'), c.title, c.description,
+        COALESCE(c.scheduled_at, NOW()), c.starts_at, c.ends_at,
+        COALESCE(c.time_limit_minutes, 10), COALESCE(c.status, 'scheduled'), COALESCE(c.max_points, 50)
+    )
+    RETURNING * INTO new_contest;
+
+    INSERT INTO contest_questions (
+        contest_id, question_text, question_type, question_about_user,
+        correct_answer, correct_answer_normalized, confidence_score, points, question_order
+    )
+    SELECT
+        new_contest.id, q.question_text, COALESCE(q.question_type, 'open'), q.question_about_user,
+        q.correct_answer, q.correct_answer_normalized, q.confidence_score,
+        COALESCE(q.points, 10), COALESCE(q.question_order, 0)
+    FROM jsonb_populate_recordset(NULL::contest_questions, COALESCE(p_questions, '[]'::jsonb)) q;
+
+    IF array_length(p_fact_ids, 1) > 0 THEN
+        UPDATE chat_facts
+        SET used_in_contest = TRUE,
+            times_used = times_used + 1,
+            updated_at = NOW()
+        WHERE id = ANY(p_fact_ids);
+    END IF;
+
+    RETURN jsonb_build_object(
+        'contest', to_jsonb(new_contest),
+        'questions', COALESCE((
+            SELECT jsonb_agg(to_jsonb(cq) ORDER BY cq.question_order)
+            FROM contest_questions cq
+            WHERE cq.contest_id = new_contest.id
+        ), '[]'::jsonb)
+    );
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,139 @@
+-- ============================================================
+-- UNREAD COUNTERS (notifications + messages)
+-- Run this in Supabase SQL Editor
+-- ============================================================
+-- Maintains per-user unread notification counts and per-user,
+-- per-relationship unread message counts so badge refreshes are a
+-- single primary-key lookup instead of a scan of notifications/messages.
+
+CREATE TABLE IF NOT EXISTS notification_counters (
+    user_id UUID PRIMARY KEY REFERENCES profiles(id) ON DELETE CASCADE,
+    unread_count INTEGER NOT NULL DEFAULT 0 CHECK (unread_count >= 0),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS message_counters (
+    user_id UUID NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    relationship_id UUID NOT NULL REFERENCES relationships(id) ON DELETE CASCADE,
+    unread_count INTEGER NOT NULL DEFAULT 0 CHECK (unread_count >= 0),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (user_id, relationship_id)
+);
+
+-- ─── Notifications ──────────────────────────────────────────
+CREATE OR REPLACE FUNCTION bump_notification_counter(p_user_id UUID, p_delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO notification_counters (user_id, unread_count)
+    VALUES (p_user_id, GREATEST(p_delta, 0))
+    ON CONFLICT (user_id) DO UPDATE
+    SET unread_count = GREATEST(notification_counters.unread_count + p_delta, 0),
+        updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION track_notification_unread()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NOT COALESCE(NEW.is_read, FALSE) THEN
+            PERFORM bump_notification_counter(NEW.user_id, 1);
+        END IF;
+        RETURN NEW;
+    ELSIF TG_OP = 'UPDATE' THEN
+        IF COALESCE(OLD.is_read, FALSE) AND NOT COALESCE(NEW.is_read, FALSE) THEN
+            PERFORM bump_notification_counter(NEW.user_id, 1);
+        ELSIF NOT COALESCE(OLD.is_read, FALSE) AND COALESCE(NEW.is_read, FALSE) THEN
+            PERFORM bump_notification_counter(NEW.user_id, -1);
+        END IF;
+        RETURN NEW;
+    ELSIF TG_OP = 'DELETE' THEN
+        IF NOT COALESCE(OLD.is_read, FALSE) THEN
+            PERFORM bump_notification_counter(OLD.user_id, -1);
+        END IF;
+        RETURN OLD;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notifications_unread_trigger ON notifications;
+CREATE TRIGGER notifications_unread_trigger
+    AFTER INSERT OR UPDATE OF is_read OR DELETE ON notifications
+    FOR EACH ROW EXECUTE FUNCTION track_notification_unread();
+
+-- ─── Messages ───────────────────────────────────────────────
+-- The recipient of a message is whichever relationship member did not send it.
+CREATE OR REPLACE FUNCTION bump_message_counter(p_relationship_id UUID, p_sender_id UUID, p_delta INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    recipient UUID;
+BEGIN
+    SELECT CASE WHEN user_a_id = p_sender_id THEN user_b_id ELSE user_a_id END
+    INTO recipient
+    FROM relationships
+    WHERE id = p_relationship_id;
+
+    IF recipient IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO message_counters (user_id, relationship_id, unread_count)
+    VALUES (recipient, p_relationship_id, GREATEST(p_delta, 0))
+    ON CONFLICT (user_id, relationship_id) DO UPDATE
+    SET unread_count = GREATEST(message_counters.unread_count + p_delta, 0),
+        updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION track_message_unread()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NOT COALESCE(NEW.is_read, FALSE) AND NOT COALESCE(NEW.is_deleted, FALSE) THEN
+            PERFORM bump_message_counter(NEW.relationship_id, NEW.sender_id, 1);
+        END IF;
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- A message counts as unread while it is neither read nor deleted
+        IF (NOT COALESCE(OLD.is_read, FALSE) AND NOT COALESCE(OLD.is_deleted, FALSE))
+           AND (COALESCE(NEW.is_read, FALSE) OR COALESCE(NEW.is_deleted, FALSE)) THEN
+            PERFORM bump_message_counter(NEW.relationship_id, NEW.sender_id, -1);
+        ELSIF (COALESCE(OLD.is_read, FALSE) OR COALESCE(OLD.is_deleted, FALSE))
+           AND (NOT COALESCE(NEW.is_read, FALSE) AND NOT COALESCE(NEW.is_deleted, FALSE)) THEN
+            PERFORM bump_message_counter(NEW.relationship_id, NEW.sender_id, 1);
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS messages_unread_trigger ON messages;
+CREATE TRIGGER messages_unread_trigger
+    AFTER INSERT OR UPDATE OF is_read, is_deleted ON messages
+    FOR EACH ROW EXECUTE FUNCTION track_message_unread();
+
+-- ─── Backfill from existing rows ────────────────────────────
+INSERT INTO notification_counters (user_id, unread_count)
+SELECT user_id, COUNT(*)
+FROM notifications
+WHERE is_read = FALSE
+GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET unread_count = EXCLUDED.unread_count, updated_at = NOW();
+
+INSERT INTO message_counters (user_id, relationship_id, unread_count)
+SELECT
+    CASE WHEN r.user_a_id = m.sender_id THEN r.user_b_id ELSE r.user_a_id END,
+    m.relationship_id,
+    COUNT(*)
+FROM messages m
+JOIN relationships r ON r.id = m.relationship_id
+WHERE m.is_read = FALSE AND m.is_deleted = FALSE
+GROUP BY 1, 2
+ON CONFLICT (user_id, relationship_id) DO UPDATE SET unread_count = EXCLUDED.unread_count, updated_at = NOW();
+
+-- Partial index so the "mark as read" UPDATEs only touch unread rows
+CREATE INDEX IF NOT EXISTS idx_messages_unread ON messages(relationship_id, sender_id) WHERE is_read = FALSE;
+
+-- Verify the changes
+-- SELECT * FROM notification_counters ORDER BY unread_count DESC LIMIT 10;
+-- SELECT * FROM message_counters ORDER BY unread_count DESC LIMIT 10;
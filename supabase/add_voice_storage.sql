@@ -0,0 +1,13 @@
+-- ============================================================
+-- VOICE MESSAGE STORAGE
+-- Run this in Supabase SQL Editor
+-- ============================================================
+-- Private bucket for voice message audio: the sender's recording
+-- (messages.voice_url) and its synthesized translation
+-- (messages.translated_voice_url), stored as {relationship_id}/{name}.
+-- The backend reads and writes it with the service key and serves it
+-- to relationship members via GET /api/v1/voice/messages/...
+
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('voice-messages', 'voice-messages', false)
+ON CONFLICT (id) DO NOTHING;